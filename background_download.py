@@ -6,14 +6,73 @@ Downloads 8 years of GPS data with rate limiting, progress tracking, and resume
 """
 
 import os
-import json
+import re
 import time
 import logging
 import signal
 import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, Set
+from pathlib import Path
+from typing import Dict, Any, Optional, Iterable, List, Set
 from strava_client import StravaClient
+from strava_config import load_config
+from strava_files import (
+    read_json, write_json, dump_json_line, save_activity_coords,
+    ACTIVITY_FILENAME_ID, ACTIVITY_INDEX_FILENAME
+)
+from strava_utils import INDOOR_ACTIVITY_TYPES
+
+
+# Activity IDs of legacy monthly shards are read from the leading key of each
+# line, without parsing the JSON
+SHARD_LINE_ID = re.compile(rb'^\{"activity_id":\s*(\d+)[,}]')
+
+
+class ShardedIdSet:
+    """Set of activity IDs split into independently locked shards
+    
+    Membership checks read a single shard without locking; adds only
+    contend with other writers hashing to the same shard.
+    """
+    
+    SHARD_COUNT = 16
+    
+    def __init__(self, ids: Iterable[int] = ()):
+        self._shards = [set() for _ in range(self.SHARD_COUNT)]
+        self._locks = [threading.Lock() for _ in range(self.SHARD_COUNT)]
+        for activity_id in ids:
+            self._shards[activity_id & 0xF].add(activity_id)
+            
+    def add(self, activity_id: int):
+        index = activity_id & 0xF
+        with self._locks[index]:
+            self._shards[index].add(activity_id)
+            
+    def __contains__(self, activity_id: int) -> bool:
+        return activity_id in self._shards[activity_id & 0xF]
+        
+    def __len__(self) -> int:
+        return sum(map(len, self._shards))
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that reuses the formatted timestamp until the second rolls over"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_second = None
+        self._cached_time = ""
+        
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_time = time.strftime(datefmt or self.default_time_format, self.converter(second))
+            self._cached_second = second
+        if datefmt:
+            return self._cached_time
+        return self.default_msec_format % (self._cached_time, record.msecs)
 
 
 class BackgroundDownloader:
@@ -22,9 +81,15 @@ class BackgroundDownloader:
         self.config = self.load_config()
         self.client = None
         self.stop_requested = False
+        self._stop_event = threading.Event()
         self.state_file = "download_state.json"
+        self.ids_file = "download_state.ids"
         self.log_file = "background_download.log"
-        self.downloaded_activities: Set[int] = set()
+        self.downloaded_activities = ShardedIdSet()
+        self._newly_downloaded: List[int] = []
+        self._newly_downloaded_lock = threading.Lock()
+        self.index_file = None
+        self.index_lock = threading.Lock()
         
         # Setup logging
         self.setup_logging()
@@ -47,7 +112,7 @@ class BackgroundDownloader:
         console_handler.setLevel(logging.INFO)
         
         # Formatter
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        formatter = CachedTimeFormatter('%(asctime)s - %(levelname)s - %(message)s')
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
         
@@ -58,14 +123,14 @@ class BackgroundDownloader:
         """Handle interrupt signals for graceful shutdown"""
         self.logger.info(f"Received signal {signum}. Initiating graceful shutdown...")
         self.stop_requested = True
+        self._stop_event.set()
         
     def load_config(self) -> Dict[str, Any]:
         """Load configuration from file"""
         if not os.path.exists(self.config_file):
             self.create_default_config()
             
-        with open(self.config_file, 'r') as f:
-            return json.load(f)
+        return load_config(self.config_file, create_if_missing=False)
             
     def create_default_config(self):
         """Create default configuration file"""
@@ -85,28 +150,40 @@ class BackgroundDownloader:
                 "batch_size": 50,
                 "retry_attempts": 3,
                 "retry_delay": 300,
-                "save_progress_interval": 10
+                "save_progress_interval": 10,
+                "workers": 8
             }
         }
         
-        with open(self.config_file, 'w') as f:
-            json.dump(default_config, f, indent=2)
+        write_json(self.config_file, default_config)
             
         print(f"Created {self.config_file}. Please update with your Strava API credentials.")
         
     def load_state(self) -> Dict[str, Any]:
-        """Load download state from file"""
+        """Load download state and the downloaded activity IDs from file"""
+        if os.path.exists(self.ids_file):
+            try:
+                ids = array('q')
+                with open(self.ids_file, 'rb') as f:
+                    data = f.read()
+                # Ignore a partially written trailing ID left by a crash
+                ids.frombytes(data[:len(data) - len(data) % ids.itemsize])
+                self.downloaded_activities = ShardedIdSet(ids)
+            except Exception as e:
+                self.logger.warning(f"Failed to load downloaded IDs file: {e}")
+                
         if os.path.exists(self.state_file):
             try:
-                with open(self.state_file, 'r') as f:
-                    state = json.load(f)
-                    self.downloaded_activities = set(state.get('downloaded_activities', []))
-                    return state
+                state = read_json(self.state_file)
+                # Older state files keep the full ID list inline; move it to the IDs file
+                legacy_ids = state.pop('downloaded_activities', [])
+                for activity_id in legacy_ids:
+                    self.mark_downloaded(activity_id)
+                return state
             except Exception as e:
                 self.logger.warning(f"Failed to load state file: {e}")
                 
         return {
-            'downloaded_activities': [],
             'last_page': 1,
             'total_activities': 0,
             'total_gps_points': 0,
@@ -114,14 +191,27 @@ class BackgroundDownloader:
             'last_update': None
         }
         
-    def save_state(self, state: Dict[str, Any]):
-        """Save download state to file"""
-        try:
-            state['downloaded_activities'] = list(self.downloaded_activities)
-            state['last_update'] = datetime.now().isoformat()
+    def mark_downloaded(self, activity_id: int):
+        """Record an activity as done; it is persisted on the next save_state"""
+        self.downloaded_activities.add(activity_id)
+        with self._newly_downloaded_lock:
+            self._newly_downloaded.append(activity_id)
             
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f, indent=2)
+    def save_state(self, state: Dict[str, Any], timestamp: Optional[str] = None):
+        """Save download state (timestamp defaults to now in ISO format)
+        
+        Only IDs downloaded since the last save are appended to the IDs
+        file, so each checkpoint costs O(new IDs) rather than O(all IDs).
+        """
+        try:
+            with self._newly_downloaded_lock:
+                new_ids, self._newly_downloaded = self._newly_downloaded, []
+            if new_ids:
+                with open(self.ids_file, 'ab') as f:
+                    array('q', new_ids).tofile(f)
+                    
+            state['last_update'] = timestamp or datetime.now().isoformat()
+            write_json(self.state_file, state, indent=False)
                 
         except Exception as e:
             self.logger.error(f"Failed to save state: {e}")
@@ -173,8 +263,55 @@ class BackgroundDownloader:
             self.logger.warning(f"Failed to estimate activity count: {e}")
             return 1000  # Default estimate
             
-    def download_activity_safely(self, activity: Dict[str, Any], output_dir: str) -> Optional[Dict[str, Any]]:
-        """Download a single activity with error handling and retries"""
+    def _scan_downloaded(self, output_dir: Path) -> Set[int]:
+        """Collect IDs of activities already saved in output_dir"""
+        activity_ids = set()
+        
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('activity_'):
+                    match = ACTIVITY_FILENAME_ID.match(entry.name)
+                    if match:
+                        activity_ids.add(int(match.group(1)))
+                elif entry.name.startswith('activities_') and entry.name.endswith('.ndjson'):
+                    with open(entry.path, 'rb') as f:
+                        for line in f:
+                            match = SHARD_LINE_ID.match(line)
+                            if match:
+                                activity_ids.add(int(match.group(1)))
+                                
+        return activity_ids
+        
+    def get_worker_count(self) -> int:
+        """Number of download workers, capped by the remaining 15-minute request budget"""
+        workers = self.config.get("download", {}).get("workers", 8)
+        remaining = self.client.get_rate_budget()[0]
+        return max(1, min(workers, remaining))
+        
+    def append_to_index(self, output_dir: Path, metadata: Dict[str, Any]):
+        """Append one activity's metadata line to the activity index"""
+        line = dump_json_line(metadata)
+        
+        with self.index_lock:
+            if self.index_file is None:
+                self.index_file = open(output_dir / ACTIVITY_INDEX_FILENAME, 'ab')
+            self.index_file.write(line)
+            self.index_file.flush()
+            
+    def close_index(self):
+        """Close the activity index file"""
+        with self.index_lock:
+            if self.index_file is not None:
+                self.index_file.close()
+                self.index_file = None
+            
+    def download_activity_safely(self, activity: Dict[str, Any], output_dir: Path,
+                                 download_timestamp: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Download a single activity with error handling and retries
+        
+        download_timestamp is the ISO time recorded in the index; the page
+        loop passes one string for the whole page (defaults to now).
+        """
         activity_id = activity['id']
         
         # Skip if already downloaded
@@ -193,46 +330,37 @@ class BackgroundDownloader:
                 activity_date = activity.get('start_date', '').split('T')[0]
                 activity_name = activity.get('name', f'Activity_{activity_id}')
                 
-                # Skip non-GPS activities
-                if activity_type in ['WeightTraining', 'Yoga', 'Workout', 'Crosstraining']:
-                    self.downloaded_activities.add(activity_id)
-                    return None
-                    
                 self.logger.info(f"Downloading activity {activity_id} ({activity_type}) - {activity_date} - Attempt {attempt + 1}")
                 
                 gps_points = self.client.download_activity_gps_data(activity_id)
                 
                 if gps_points:
-                    # Create safe filename
+                    # Coordinates go to a binary file; metadata to the index
                     safe_name = ''.join(c for c in activity_name if c.isalnum() or c in ' -_').strip()[:50]
-                    filename = f"activity_{activity_date.replace('-', '')}_{activity_id}_{safe_name}.json"
-                    filepath = os.path.join(output_dir, filename)
+                    filename = f"activity_{activity_date}_{activity_id}_{safe_name}.npy"
+                    filepath = output_dir / filename
+                    save_activity_coords(filepath, gps_points)
                     
-                    # Save activity data
-                    activity_data = {
+                    self.append_to_index(output_dir, {
                         'activity_id': activity_id,
                         'activity_type': activity_type,
                         'activity_name': activity_name,
                         'start_date': activity['start_date'],
-                        'gps_points': gps_points,
                         'total_points': len(gps_points),
-                        'download_timestamp': datetime.now().isoformat()
-                    }
-                    
-                    with open(filepath, 'w') as f:
-                        json.dump(activity_data, f, indent=2)
+                        'download_timestamp': download_timestamp or datetime.now().isoformat()
+                    })
                         
-                    self.downloaded_activities.add(activity_id)
+                    self.mark_downloaded(activity_id)
                     self.logger.info(f"✓ Saved {len(gps_points)} GPS points to {filename}")
                     
                     return {
                         'filename': filename,
-                        'filepath': filepath,
+                        'filepath': str(filepath),
                         'activity_type': activity_type,
                         'gps_points_count': len(gps_points)
                     }
                 else:
-                    self.downloaded_activities.add(activity_id)
+                    self.mark_downloaded(activity_id)
                     self.logger.info(f"Activity {activity_id} has no GPS data")
                     return None
                     
@@ -241,11 +369,9 @@ class BackgroundDownloader:
                 
                 if attempt < max_attempts - 1:
                     self.logger.info(f"Retrying in {retry_delay} seconds...")
-                    # Sleep in small chunks to allow for interruption
-                    for _ in range(retry_delay):
-                        if self.stop_requested:
-                            return None
-                        time.sleep(1)
+                    # Wake immediately if a stop signal arrives during the wait
+                    if self._stop_event.wait(retry_delay):
+                        return None
                 else:
                     self.logger.error(f"Failed to download activity {activity_id} after {max_attempts} attempts")
                     
@@ -261,8 +387,8 @@ class BackgroundDownloader:
             return
             
         # Create output directory
-        output_dir = self.config["data"]["output_dir"]
-        os.makedirs(output_dir, exist_ok=True)
+        output_dir = Path(self.config["data"]["output_dir"])
+        output_dir.mkdir(parents=True, exist_ok=True)
         
         # Load previous state
         state = self.load_state()
@@ -274,6 +400,10 @@ class BackgroundDownloader:
             state['total_activities'] = self.get_activity_count_estimate()
             self.logger.info(f"Estimated total activities: {state['total_activities']}")
             
+        # Files on disk are authoritative even if the state file was lost
+        for activity_id in self._scan_downloaded(output_dir):
+            self.downloaded_activities.add(activity_id)
+            
         # Download activities
         page = state.get('last_page', 1)
         downloaded_count = len(self.downloaded_activities)
@@ -282,37 +412,62 @@ class BackgroundDownloader:
         
         self.logger.info(f"Resuming from page {page}, {downloaded_count} activities already downloaded")
         
+        # Pages are fetched one ahead so the next listing is ready when a page finishes
+        page_fetcher = ThreadPoolExecutor(max_workers=1)
+        next_page = page_fetcher.submit(self.client.get_activities, per_page=200, page=page)
+        
         try:
             while not self.stop_requested:
                 self.logger.info(f"Fetching activities page {page}...")
                 
-                activities = self.client.get_activities(per_page=200, page=page)
+                activities = next_page.result()
                 if not activities:
                     self.logger.info("No more activities found. Download complete!")
                     break
                     
+                next_page = page_fetcher.submit(self.client.get_activities, per_page=200, page=page + 1)
+                
                 page_start_time = time.time()
+                page_timestamp = datetime.now().isoformat()
                 page_downloaded = 0
                 page_points = 0
                 
-                for i, activity in enumerate(activities):
-                    if self.stop_requested:
-                        break
-                        
-                    result = self.download_activity_safely(activity, output_dir)
-                    if result:
-                        page_downloaded += 1
-                        page_points += result['gps_points_count']
-                        total_gps_points += result['gps_points_count']
-                        
-                    # Save progress periodically
-                    if (i + 1) % save_interval == 0:
-                        state['last_page'] = page
-                        state['total_gps_points'] = total_gps_points
-                        self.save_state(state)
-                        
-                        progress = (len(self.downloaded_activities) / state['total_activities']) * 100
-                        self.logger.info(f"Progress: {progress:.1f}% ({len(self.downloaded_activities)}/{state['total_activities']} activities)")
+                # Non-GPS activities are marked done without being submitted or logged
+                pending = []
+                for activity in activities:
+                    if activity['id'] in self.downloaded_activities:
+                        continue
+                    if activity.get('type', 'Unknown') in INDOOR_ACTIVITY_TYPES:
+                        self.mark_downloaded(activity['id'])
+                        continue
+                    pending.append(activity)
+                
+                with ThreadPoolExecutor(max_workers=self.get_worker_count()) as executor:
+                    futures = [executor.submit(self.download_activity_safely, activity, output_dir, page_timestamp)
+                               for activity in pending]
+                    
+                    for i, future in enumerate(as_completed(futures)):
+                        if self.stop_requested:
+                            # Drop queued downloads; shutdown(cancel_futures=) needs Python 3.9
+                            for pending_future in futures:
+                                pending_future.cancel()
+                            break
+                            
+                        result = future.result()
+                        if result:
+                            page_downloaded += 1
+                            page_points += result['gps_points_count']
+                            total_gps_points += result['gps_points_count']
+                            
+                        # Save progress periodically
+                        if (i + 1) % save_interval == 0:
+                            state['last_page'] = page
+                            state['total_gps_points'] = total_gps_points
+                            self.save_state(state, page_timestamp)
+                            
+                            done = len(self.downloaded_activities)
+                            progress = (done / state['total_activities']) * 100
+                            self.logger.info(f"Progress: {progress:.1f}% ({done}/{state['total_activities']} activities)")
                         
                 if self.stop_requested:
                     break
@@ -329,8 +484,9 @@ class BackgroundDownloader:
                 page += 1
                 
                 # Rate limiting info
-                self.logger.info(f"Rate limit usage: {self.client.rate_limiter.short_term_requests}/100 (15min), "
-                                f"{self.client.rate_limiter.daily_requests}/1000 (daily)")
+                limiter = self.client.rate_limiter
+                self.logger.info(f"Rate limit usage: {limiter.short_term_requests}/{limiter.short_term_limit} (15min), "
+                                f"{limiter.daily_requests}/{limiter.daily_limit} (daily)")
                 
         except KeyboardInterrupt:
             self.logger.info("Download interrupted by user")
@@ -339,6 +495,10 @@ class BackgroundDownloader:
             import traceback
             self.logger.error(traceback.format_exc())
         finally:
+            next_page.cancel()
+            page_fetcher.shutdown(wait=False)
+            self.close_index()
+            
             # Final state save
             state['total_gps_points'] = total_gps_points
             self.save_state(state)
@@ -352,7 +512,7 @@ class BackgroundDownloader:
             self.logger.info(f"Activities downloaded: {len(self.downloaded_activities)}")
             self.logger.info(f"Total GPS points: {total_gps_points:,}")
             self.logger.info(f"Files saved in: {output_dir}")
-            self.logger.info(f"State saved in: {self.state_file}")
+            self.logger.info(f"State saved in: {self.state_file}, {self.ids_file}")
             self.logger.info(f"Log saved in: {self.log_file}")
             
             if self.stop_requested:
@@ -1,22 +1,22 @@
 #!/usr/bin/env python3
 
-import json
-import requests
-import time
+import math
 from datetime import datetime
+from strava_client import create_session, seconds_until_rate_limit_reset
+from strava_config import load_config
 
 # Load config
-with open('config.json', 'r') as f:
-    config = json.load(f)
+config = load_config(create_if_missing=False)
 
 access_token = config['strava']['access_token']
-headers = {'Authorization': f'Bearer {access_token}'}
+session = create_session()
+session.headers['Authorization'] = f'Bearer {access_token}'
 
 print("Checking Strava API Rate Limit Status")
 print("=" * 40)
 
 # Make a simple request to check headers
-response = requests.get('https://www.strava.com/api/v3/athlete', headers=headers)
+response = session.get('https://www.strava.com/api/v3/athlete')
 
 print(f"Response Status: {response.status_code}")
 print(f"Timestamp: {datetime.now()}")
@@ -49,15 +49,8 @@ if response.status_code == 429:
     print("2. Check if you have been making too many requests")
     print("3. Strava limits: 100 requests per 15 minutes, 1000 per day")
     
-    # Calculate wait time (rough estimate)
-    current_minute = datetime.now().minute
-    next_quarter = ((current_minute // 15) + 1) * 15
-    if next_quarter >= 60:
-        next_quarter = 0
-    
-    minutes_to_wait = (next_quarter - current_minute) % 15
-    if minutes_to_wait == 0:
-        minutes_to_wait = 15
+    # Calculate wait time until the next 15-minute window
+    minutes_to_wait = math.ceil(seconds_until_rate_limit_reset(buffer_seconds=0) / 60)
     
     print(f"4. Estimated wait time: {minutes_to_wait} minutes")
     
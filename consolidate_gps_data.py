@@ -7,10 +7,11 @@ Consolidates individual activity JSON files into unified GPS data files
 compatible with heatmap generation. Refactored to use centralized utilities.
 """
 
+import argparse
 from strava_config import StravaConfig
 from strava_files import StravaFileManager
 from strava_progress import StravaProgressReporter
-from strava_utils import handle_keyboard_interrupt
+from strava_utils import handle_keyboard_interrupt, print_debug_traceback
 from heatmap_utils import (
     validate_gps_data_structure,
     format_gps_summary,
@@ -20,6 +21,21 @@ from heatmap_utils import (
 
 def main():
     """Main GPS data consolidation process"""
+    parser = argparse.ArgumentParser(
+        description='Consolidate individual activity files into a unified GPS dataset'
+    )
+    parser.add_argument(
+        '--legacy-format',
+        action='store_true',
+        help='Write gps_data_*.json instead of compressed float32 gps_data_*.npz'
+    )
+    parser.add_argument(
+        '--arrow',
+        action='store_true',
+        help='Write memory-mappable gps_data_*.arrow (requires pyarrow)'
+    )
+    args = parser.parse_args()
+    
     try:
         # Initialize utilities
         config_manager = StravaConfig()
@@ -51,14 +67,15 @@ def main():
             )
             
             # Log each activity for progress tracking
+            log_activity = progress_reporter.log_activity_processed
             for activity in activities:
                 mock_activity_info = {
                     'id': activity.get('activity_id', 'unknown'),
                     'type': activity.get('activity_type', 'Unknown'),
                     'name': activity.get('activity_name', 'Unnamed')
                 }
-                gps_count = len(activity.get('gps_points', []))
-                progress_reporter.log_activity_processed(mock_activity_info, gps_count)
+                log_activity(mock_activity_info, len(activity.get('gps_points', ())))
+            progress_reporter.flush()
             
         except Exception as e:
             progress_reporter.add_error(f"Failed to load activity files: {e}")
@@ -98,7 +115,12 @@ def main():
         print("\n💾 Saving consolidated GPS data...")
         try:
             # Save with timestamp and latest versions
-            timestamped_path, latest_path = file_manager.save_gps_data(gps_data_dict)
+            if args.legacy_format:
+                timestamped_path, latest_path = file_manager.save_gps_data(gps_data_dict)
+            elif args.arrow:
+                timestamped_path, latest_path = file_manager.save_gps_data_arrow(gps_data_dict)
+            else:
+                timestamped_path, latest_path = file_manager.save_gps_data_npz(gps_data_dict)
             
             progress_reporter.log_file_operation("saved", timestamped_path)
             progress_reporter.log_file_operation("saved", latest_path)
@@ -133,8 +155,7 @@ def main():
         handle_keyboard_interrupt("GPS Data Consolidation")
     except Exception as e:
         print(f"❌ GPS data consolidation failed: {e}")
-        import traceback
-        traceback.print_exc()
+        print_debug_traceback()
 
 
 if __name__ == "__main__":
@@ -13,11 +13,13 @@ from strava_config import StravaConfig
 from strava_auth import StravaAuthenticator
 from strava_files import StravaFileManager
 from strava_progress import StravaProgressReporter
-from strava_utils import handle_keyboard_interrupt
+from strava_utils import handle_keyboard_interrupt, print_debug_traceback, parse_download_args
 
 
 def main():
     """Main download process for individual activities"""
+    args = parse_download_args('Download individual activity GPS data from Strava, one JSON file per activity')
+    
     try:
         # Initialize utilities
         config_manager = StravaConfig()
@@ -44,10 +46,11 @@ def main():
         # Download GPS data to individual files
         print("\n📥 Downloading individual activity GPS data from Strava...")
         try:
-            file_info = client.download_individual_activity_gps_data(file_manager.output_dir)
+            file_info = client.download_individual_activity_gps_data(
+                file_manager.output_dir, incremental=not args.full)
             
             if not file_info:
-                print("❌ No GPS data found. Make sure you have activities with GPS tracks.")
+                print("❌ No new GPS data found. Make sure you have activities with GPS tracks.")
                 return
             
             print(f"✅ Downloaded GPS data from {len(file_info)} activities")
@@ -71,9 +74,10 @@ def main():
             progress_reporter.log_file_operation("saved", athlete_latest)
             
             # Save activities summary
-            summary_timestamped, _ = file_manager.save_json_file(
+            summary_timestamped = file_manager.save_json_file(
                 file_info, 
-                f"activities_summary_{file_manager.generate_timestamp()}.json"
+                f"activities_summary_{file_manager.generate_timestamp()}.json",
+                indent=False
             )
             progress_reporter.log_file_operation("saved", summary_timestamped, count=len(file_info))
             
@@ -99,8 +103,7 @@ def main():
             
         except Exception as e:
             progress_reporter.add_error(f"Failed to download GPS data: {e}")
-            import traceback
-            traceback.print_exc()
+            print_debug_traceback()
             return
         
         print(f"\n🎉 Individual activity download complete! Files saved in: {file_manager.output_dir}")
@@ -109,8 +112,7 @@ def main():
         handle_keyboard_interrupt("Individual Activity Download")
     except Exception as e:
         print(f"❌ Download failed: {e}")
-        import traceback
-        traceback.print_exc()
+        print_debug_traceback()
 
 
 if __name__ == "__main__":
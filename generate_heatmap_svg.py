@@ -8,26 +8,359 @@ Refactored to use centralized utilities for configuration, file operations,
 progress reporting, and data validation.
 """
 
+import os
+import sys
 import argparse
-import json
-from heatmap_generator import HeatmapGenerator
-from map_data import MapDataProvider
-from svg_renderer import SVGRenderer
-from strava_config import StravaConfig
-from strava_files import StravaFileManager
-from strava_progress import StravaProgressReporter
-from strava_utils import handle_keyboard_interrupt
-from heatmap_utils import (
-    validate_gps_data_structure, 
-    validate_heatmap_config,
-    format_gps_summary,
-    calculate_gps_bounds,
-    estimate_processing_time,
-    calculate_heatmap_resolution,
-    filter_gps_data_by_region
+from concurrent.futures import ThreadPoolExecutor
+from strava_utils import handle_keyboard_interrupt, print_debug_traceback
+
+
+# Point overlays drawn from local GeoJSON files, one record each:
+# (key under boundaries.usa, per-feature enable settings key, default data file,
+#  SVGRenderer method, label, regions it is drawn for,
+#  {method argument: (overlay config key, default)})
+OVERLAYS = (
+    ("state_parks", "minnesota_state_parks", "map_cache/minnesota_state_parks.json",
+     "add_state_parks", "state parks", ('minnesota', 'saint_paul_100km'),
+     {"stroke_color": ("color", "#ff0000"), "fill_color": ("fill", "none"),
+      "radius": ("radius", 20), "stroke_width": ("stroke_width", 2)}),
+    ("national_parks", "us_national_parks", "map_cache/us_national_parks.json",
+     "add_national_parks", "national parks", ('usa', 'all', 'minnesota', 'saint_paul_100km'),
+     {"stroke_color": ("color", "#ff6b00"), "fill_color": ("fill", "none"),
+      "size": ("size", 12), "stroke_width": ("stroke_width", 2)}),
+    ("cities", "us_cities", "map_cache/us_cities.json",
+     "add_cities", "cities", ('usa', 'all'),
+     {"stroke_color": ("color", "#ff0000"), "fill_color": ("fill", "none"),
+      "size": ("size", 16), "stroke_width": ("stroke_width", 2)}),
 )
 
 
+def render_region(region, args, config, gps_data, athlete_info, map_provider, progress_reporter,
+                  data_bounds=None, activity_bounds=None):
+    """
+    Generate and save the heatmap SVG for one --region value
+    
+    Args:
+        region: Region name ('all' renders every activity)
+        args: Parsed command line arguments
+        config: Loaded configuration dictionary
+        gps_data: Validated GPS data for all activities
+        athlete_info: Athlete profile used in the title
+        map_provider: MapDataProvider shared across regions so loaded
+            boundary files and filtered paths are reused
+        progress_reporter: Progress reporter for the whole run
+        data_bounds: (min_lat, max_lat, min_lon, max_lon) of gps_data if
+            already known (measured while loading); used while the region
+            keeps every activity
+        activity_bounds: calculate_activity_bounds(gps_data), shared by the
+            filtered regions of one run
+    """
+    from heatmap_generator import HeatmapGenerator
+    from svg_renderer import SVGRenderer
+    from strava_files import load_geojson
+    from heatmap_utils import (
+        format_gps_summary,
+        calculate_gps_bounds,
+        estimate_processing_time,
+        calculate_heatmap_resolution,
+        apply_region
+    )
+    
+    # Apply region filtering if specified
+    all_gps_data = gps_data
+    gps_data = apply_region(gps_data, region, verbose=not progress_reporter.quiet,
+                            activity_bounds=activity_bounds)
+    if not gps_data:
+        progress_reporter.add_error(f"No GPS data found in region '{region}'")
+        return
+    if region != 'all':
+        progress_reporter.log_file_operation("filtered", f"GPS data ({len(gps_data)} activities in {region})")
+    
+    # Measured once; the summary, resolution estimate and final stats share it
+    if data_bounds is not None and gps_data is all_gps_data:
+        gps_bounds = data_bounds
+    else:
+        gps_bounds = calculate_gps_bounds(gps_data)
+    
+    # Show GPS data summary
+    progress_reporter.log("\n" + format_gps_summary(gps_data, bounds=gps_bounds))
+    
+    # Calculate optimal resolution and estimate processing time
+    output_config = config["output"]
+    svg_width, svg_height = output_config["width"], output_config["height"]
+    grid_width, grid_height, density = calculate_heatmap_resolution(
+        gps_data, 
+        svg_width, 
+        svg_height,
+        bounds=gps_bounds
+    )
+    
+    processing_time = estimate_processing_time(gps_data, grid_width, grid_height)
+    progress_reporter.log(f"\n📈 Heatmap settings:")
+    progress_reporter.log(f"  Grid resolution: {grid_width} x {grid_height}")
+    progress_reporter.log(f"  Point density: {density:.1f} points per grid cell")
+    progress_reporter.log(f"  Estimated processing time: {processing_time}")
+    
+    # Generate heatmap
+    progress_reporter.log("\n🔥 Generating heatmap...")
+    try:
+        # Grids are reused across runs while the data, bounds and resolution
+        # match; kept next to the GPS data rather than in the working directory
+        grid_cache_dir = os.path.join(config.get("data", {}).get("output_dir", "strava_data"), "heatmap_cache")
+        heatmap_gen = HeatmapGenerator(cache_dir=grid_cache_dir)
+        heatmap_grid = heatmap_gen.generate_heatmap(gps_data, gps_bounds=gps_bounds)
+        bounds = grid_bounds = heatmap_gen.get_bounds()
+        
+        progress_reporter.log_file_operation(
+            "generated", 
+            f"heatmap grid ({heatmap_grid.shape[0]}x{heatmap_grid.shape[1]})"
+        )
+        progress_reporter.log(f"✅ Generated heatmap with bounds: {bounds}")
+        
+        # Expand bounds for USA region to include eastern states like Maine (excluding Alaska and Hawaii)
+        if region in ['usa', 'all']:
+            min_lat, min_lon, max_lat, max_lon = bounds
+            # Extend to cover contiguous 48 states only (exclude Alaska and Hawaii)
+            extended_min_lat = max(24, min_lat)    # Southern border (exclude Hawaii)
+            extended_max_lat = min(49, max_lat)    # Northern border (exclude Alaska)
+            extended_min_lon = max(-125, min_lon)  # Western border (exclude Alaska)
+            extended_max_lon = max(-66, max_lon)   # Include Maine and eastern states
+            bounds = (extended_min_lat, extended_min_lon, extended_max_lat, extended_max_lon)
+            progress_reporter.log(f"🗺️  Extended bounds for contiguous USA (excluding Alaska/Hawaii): {bounds}")
+        
+    except Exception as e:
+        progress_reporter.add_error(f"Failed to generate heatmap: {e}")
+        return
+    
+    # Overlay files are read in the background while boundaries load
+    boundary_config = config.get("boundaries", {})
+    overlay_loads = {}
+    overlay_executor = ThreadPoolExecutor(max_workers=len(OVERLAYS))
+    for config_key, _, default_file, _, _, regions, _ in OVERLAYS:
+        overlay_config = boundary_config.get("usa", {}).get(config_key, {})
+        if region in regions and overlay_config.get("enabled", False):
+            data_file = overlay_config.get("data_file", default_file)
+            overlay_loads[config_key] = (data_file, overlay_executor.submit(load_geojson, data_file))
+    overlay_executor.shutdown(wait=False)
+    
+    # Load detailed map boundaries
+    progress_reporter.log("\n🗺️  Loading geographic boundaries...")
+    try:
+        boundary_data = map_provider.get_detailed_boundaries(bounds)
+        
+        # Remove Minnesota city boundaries for minnesota and saint_paul_100km regions
+        if region in ['minnesota', 'saint_paul_100km'] and 'minnesota_cities' in boundary_data:
+            progress_reporter.log(f"  Removing Minnesota city boundaries for {region} region...")
+            del boundary_data['minnesota_cities']
+        
+        progress_reporter.log_file_operation(
+            "loaded", 
+            f"geographic boundaries ({sum(map(len, boundary_data.values()))} paths)"
+        )
+        
+    except Exception as e:
+        progress_reporter.add_warning(f"Failed to load map boundaries: {e}")
+        progress_reporter.add_warning("Continuing without geographic boundaries")
+        boundary_data = {}
+    
+    # Create SVG
+    progress_reporter.log("\n🎨 Creating SVG visualization...")
+    try:
+        style_config = config["style"]
+        track_color = style_config["track_color"]
+        track_opacity = style_config["track_opacity"]
+        
+        renderer = SVGRenderer(
+            width=svg_width,
+            height=svg_height,
+            coord_precision=output_config.get("precision", 2),
+            # Half a pixel: dropped vertices cannot visibly move a line
+            simplify_tolerance=0.0 if args.no_simplify else 0.5,
+            jobs=args.jobs
+        )
+        
+        # Which detailed boundary set (if any) covers the map
+        region_kind = map_provider.classify_region(bounds) if boundary_data else 'other'
+        
+        # Determine projection type based on region
+        projection_type = 'equirectangular'  # default
+        if region in ['minnesota', 'saint_paul_100km']:
+            projection_type = 'utm'
+            progress_reporter.log(f"  Using UTM Zone 15N projection for {region} region...")
+        elif region in ['usa', 'all']:
+            projection_type = 'albers'
+            progress_reporter.log(f"  Using Albers Equal Area Conic projection for {region} region...")
+        else:
+            progress_reporter.log(f"  Using equirectangular projection...")
+        
+        # Create SVG with bounds and background color
+        renderer.create_svg(bounds, style_config["background_color"], projection_type)
+        
+        # Add detailed boundary lines based on configuration; the layers are
+        # projected and formatted together once they are all collected
+        boundary_layers = []
+        
+        # World boundaries (coastlines) - skip for Japan/USA regions (use detailed boundaries instead)
+        if boundary_data.get('world') and boundary_config.get("world", {}).get("enabled", True):
+            # Skip world boundaries if we're in Japan or USA regions (use detailed boundaries instead)
+            if region_kind == 'other':
+                world_config = boundary_config["world"]
+                progress_reporter.log(f"  Adding {len(boundary_data['world'])} world boundary lines...")
+                boundary_layers.append((
+                    boundary_data['world'],
+                    world_config.get("color", "#000000"),
+                    world_config.get("width", "1.0")
+                ))
+            else:
+                progress_reporter.log("  Skipping world boundaries (using detailed regional boundaries instead)...")
+        
+        # Japan prefecture boundaries
+        if boundary_data.get('japan_prefectures') and boundary_config.get("japan", {}).get("prefectures", {}).get("enabled", True):
+            japan_config = boundary_config["japan"]["prefectures"]
+            progress_reporter.log(f"  Adding {len(boundary_data['japan_prefectures'])} Japan prefecture boundaries...")
+            boundary_layers.append((
+                boundary_data['japan_prefectures'],
+                japan_config.get("color", "#666666"),
+                japan_config.get("width", "0.5")
+            ))
+        
+        # US state boundaries
+        if boundary_data.get('us_states') and boundary_config.get("usa", {}).get("states", {}).get("enabled", True):
+            usa_config = boundary_config["usa"]["states"]
+            progress_reporter.log(f"  Adding {len(boundary_data['us_states'])} US state boundaries...")
+            boundary_layers.append((
+                boundary_data['us_states'],
+                usa_config.get("color", "#666666"),
+                usa_config.get("width", "0.5")
+            ))
+        
+        # Minnesota city boundaries
+        if boundary_data.get('minnesota_cities') and boundary_config.get("usa", {}).get("minnesota_cities", {}).get("enabled", True):
+            mn_config = boundary_config["usa"]["minnesota_cities"]
+            progress_reporter.log(f"  Adding {len(boundary_data['minnesota_cities'])} Minnesota city boundaries...")
+            boundary_layers.append((
+                boundary_data['minnesota_cities'],
+                mn_config.get("color", "#999999"),
+                mn_config.get("width", "0.3")
+            ))
+        
+        # Lakes and water bodies
+        if boundary_data.get('lakes'):
+            lakes_enabled = (boundary_config.get("japan", {}).get("lakes", {}).get("enabled", True) or 
+                           boundary_config.get("usa", {}).get("lakes", {}).get("enabled", True))
+            if lakes_enabled:
+                # Use Japan lake config if in Japan region, otherwise USA lake config
+                lake_country = 'japan' if region_kind == 'japan' else 'usa'
+                lake_config = boundary_config.get(lake_country, {}).get("lakes", {})
+                
+                progress_reporter.log(f"  Adding {len(boundary_data['lakes'])} lake boundaries...")
+                boundary_layers.append((
+                    boundary_data['lakes'],
+                    lake_config.get("color", "#000000"),
+                    lake_config.get("width", "0.3")
+                ))
+        
+        renderer.add_boundary_paths_batched(boundary_layers)
+        
+        # Add GPS tracks
+        if args.raster_heatmap:
+            progress_reporter.log(f"  Adding heatmap image ({heatmap_grid.shape[1]}x{heatmap_grid.shape[0]}) from {len(gps_data)} activities...")
+            renderer.add_heatmap_image(
+                heatmap_grid,
+                grid_bounds,
+                color=track_color,
+                opacity=track_opacity
+            )
+        else:
+            progress_reporter.log(f"  Adding GPS tracks from {len(gps_data)} activities...")
+            add_tracks = renderer.add_track_segments if args.merge_tracks else renderer.add_gps_tracks
+            add_tracks(
+                gps_data,
+                stroke_color=track_color,
+                stroke_width=style_config["track_width"],
+                opacity=track_opacity
+            )
+        
+        # Point overlays (parks, cities) from local GeoJSON files
+        for config_key, settings_key, _, method, label, regions, style in OVERLAYS:
+            if region not in regions:
+                continue
+            
+            if config_key not in overlay_loads:
+                progress_reporter.log(f"  {label.capitalize()} rendering disabled in configuration")
+                continue
+            
+            overlay_config = boundary_config["usa"][config_key]
+            data_file, overlay_load = overlay_loads[config_key]
+            try:
+                progress_reporter.log(f"  Loading {label} from {data_file}...")
+                features = overlay_load.result().get("features")
+                if not features:
+                    progress_reporter.log(f"  No {label} found in data file")
+                    continue
+                
+                # Features not listed in the individual settings are enabled
+                settings = config.get(settings_key, {})
+                enabled = [feature for feature in features
+                           if settings.get(feature.get("properties", {}).get("name", ""), True)]
+                if not enabled:
+                    progress_reporter.log(f"  No {label} enabled in configuration")
+                    continue
+                
+                progress_reporter.log(f"  Adding {len(enabled)} {label} (filtered from {len(features)} total)...")
+                getattr(renderer, method)(
+                    enabled,
+                    **{arg: overlay_config.get(key, default) for arg, (key, default) in style.items()}
+                )
+            except FileNotFoundError:
+                progress_reporter.add_warning(f"{label.capitalize()} file not found: {data_file}")
+            except Exception as e:
+                progress_reporter.add_warning(f"Failed to load {label}: {e}")
+        
+        # Add title and metadata
+        athlete_name = f"{athlete_info['firstname']} {athlete_info['lastname']}"
+        if region != 'all':
+            region_title = region.replace('_', ' ').title()
+            renderer.add_title(f"{athlete_name}'s Strava Activity Heatmap - {region_title}")
+        else:
+            renderer.add_title(f"{athlete_name}'s Strava Activity Heatmap")
+        renderer.add_legend()
+        
+        # Save SVG with region-specific filename
+        base_filename = output_config["filename"]
+        if region != 'all':
+            name_parts = base_filename.rsplit('.', 1)
+            if len(name_parts) == 2:
+                output_file = f"{name_parts[0]}_{region}.{name_parts[1]}"
+            else:
+                output_file = f"{base_filename}_{region}"
+        else:
+            output_file = base_filename
+        if args.compress and not output_file.endswith('.svgz'):
+            output_file = output_file[:-4] + '.svgz' if output_file.endswith('.svg') else output_file + '.svgz'
+        
+        renderer.save_svg(output_file)
+        
+        progress_reporter.log_file_operation("saved", output_file)
+        
+    except Exception as e:
+        progress_reporter.add_error(f"Failed to create SVG: {e}")
+        return
+    
+    # Show final summary
+    bounds_info = gps_bounds
+    additional_stats = {
+        'Output file': output_file,
+        'SVG dimensions': f"{svg_width} x {svg_height} pixels",
+        'Geographic bounds': f"({bounds_info[0]:.3f}, {bounds_info[2]:.3f}) to ({bounds_info[1]:.3f}, {bounds_info[3]:.3f})",
+        'Boundary paths included': sum(map(len, boundary_data.values())),
+        'Heatmap grid size': f"{grid_width} x {grid_height}"
+    }
+    
+    progress_reporter.show_summary(additional_stats)
+    print(f"\n🎉 Heatmap generation complete! SVG saved as: {output_file}")
+
+
 def main():
     """Main heatmap generation process"""
     # Parse command line arguments
@@ -46,22 +379,75 @@ Examples:
   python generate_heatmap_svg.py
   python generate_heatmap_svg.py --region japan
   python generate_heatmap_svg.py --region saint_paul_100km
+  python generate_heatmap_svg.py --region all japan usa
+  python generate_heatmap_svg.py --no-simplify
+  python generate_heatmap_svg.py --region usa --jobs 4
+  python generate_heatmap_svg.py --compress
+  python generate_heatmap_svg.py --raster-heatmap
         '''
     )
     
     parser.add_argument(
         '--region', 
+        nargs='+',
         choices=['all', 'japan', 'usa', 'minnesota', 'saint_paul_100km'],
-        default='all',
-        help='Filter GPS data by geographic region (default: all)'
+        default=['all'],
+        help='Filter GPS data by geographic region; several regions are rendered in one run (default: all)'
+    )
+    
+    parser.add_argument(
+        '--no-simplify',
+        action='store_true',
+        help='Write every GPS and boundary point instead of simplifying paths to 0.5px'
+    )
+    
+    parser.add_argument(
+        '--merge-tracks',
+        action='store_true',
+        help='Draw each 1px-snapped segment once (smaller SVG; overlaps do not darken)'
+    )
+    
+    parser.add_argument(
+        '--raster-heatmap',
+        action='store_true',
+        help='Draw the heatmap grid as one embedded PNG instead of a path per activity'
+    )
+    
+    parser.add_argument(
+        '--quiet',
+        action='store_true',
+        help='Only print warnings, errors and the final summary'
+    )
+    
+    parser.add_argument(
+        '--compress',
+        action='store_true',
+        help='Write gzip-compressed SVG (.svgz)'
+    )
+    
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Worker processes used to format GPS track paths (default: 1)'
     )
     
     args = parser.parse_args()
     
+    if args.quiet:
+        # Nothing needs to reach the terminal line by line
+        sys.stdout.reconfigure(line_buffering=False, write_through=False)
+    
+    # Heavy modules (NumPy, map and rendering code) are imported where they
+    # are first needed so --help and configuration errors return quickly
+    from strava_config import StravaConfig
+    from strava_progress import StravaProgressReporter
+    from heatmap_utils import validate_gps_data_file, validate_heatmap_config, calculate_activity_bounds
+    
     try:
         # Initialize utilities
         config_manager = StravaConfig()
-        progress_reporter = StravaProgressReporter("Strava Heatmap SVG Generator")
+        progress_reporter = StravaProgressReporter("Strava Heatmap SVG Generator", quiet=args.quiet)
         
         # Start operation
         progress_reporter.start_operation(
@@ -69,7 +455,7 @@ Examples:
         )
         
         # Load and validate configuration
-        print("🔧 Loading configuration...")
+        progress_reporter.log("🔧 Loading configuration...")
         config = config_manager.load()
         
         # Validate heatmap-specific configuration
@@ -80,17 +466,19 @@ Examples:
             return
         
         # Setup file manager
+        from strava_files import StravaFileManager
         file_manager = StravaFileManager(config_manager.get_output_dir())
         
         # Load GPS data
-        print("📊 Loading GPS data...")
+        progress_reporter.log("📊 Loading GPS data...")
         try:
             data_config = config["data"]
-            gps_data = file_manager.load_json_file(data_config["gps_data_file"])
-            
-            # Convert string keys to integers for backward compatibility
-            if gps_data and isinstance(next(iter(gps_data.keys())), str):
-                gps_data = {int(k): v for k, v in gps_data.items()}
+            # Activities are float32 views into one array (binary cache is
+            # written on first load from JSON)
+            gps_data_path = file_manager.find_gps_data_file(data_config["gps_data_file"])
+            gps_data = file_manager.load_gps_data_file(data_config["gps_data_file"], as_arrays=True)
+            # Measured while streaming (None otherwise); spares render_region a full scan
+            data_bounds = file_manager.gps_bounds
             
             # Load athlete info
             try:
@@ -109,9 +497,9 @@ Examples:
             progress_reporter.add_error(f"Failed to load GPS data: {e}")
             return
         
-        # Validate GPS data structure
-        print("✅ Validating GPS data...")
-        is_valid_gps, gps_issues = validate_gps_data_structure(gps_data)
+        # Validate GPS data structure (skipped if this file already passed)
+        progress_reporter.log("✅ Validating GPS data...")
+        is_valid_gps, gps_issues = validate_gps_data_file(gps_data, gps_data_path)
         if not is_valid_gps:
             for issue in gps_issues[:5]:  # Show first 5 issues
                 progress_reporter.add_error(f"GPS data error: {issue}")
@@ -123,358 +511,24 @@ Examples:
             progress_reporter.add_error("No valid GPS data found")
             return
         
-        # Apply region filtering if specified
-        if args.region != 'all':
-            print(f"\n🌏 Filtering GPS data for region: {args.region}...")
-            original_count = len(gps_data)
-            gps_data = filter_gps_data_by_region(gps_data, args.region)
-            filtered_count = len(gps_data)
-            
-            if not gps_data:
-                progress_reporter.add_error(f"No GPS data found in region '{args.region}'")
-                return
-            
-            print(f"  Filtered from {original_count} to {filtered_count} activities")
-            progress_reporter.log_file_operation("filtered", f"GPS data ({filtered_count} activities in {args.region})")
-        
-        # Show GPS data summary
-        print("\n" + format_gps_summary(gps_data))
-        
-        # Calculate optimal resolution and estimate processing time
-        output_config = config["output"]
-        grid_width, grid_height, density = calculate_heatmap_resolution(
-            gps_data, 
-            output_config["width"], 
-            output_config["height"]
-        )
-        
-        processing_time = estimate_processing_time(gps_data, grid_width, grid_height)
-        print(f"\n📈 Heatmap settings:")
-        print(f"  Grid resolution: {grid_width} x {grid_height}")
-        print(f"  Point density: {density:.1f} points per grid cell")
-        print(f"  Estimated processing time: {processing_time}")
-        
-        # Generate heatmap
-        print("\n🔥 Generating heatmap...")
-        try:
-            heatmap_gen = HeatmapGenerator()
-            heatmap_grid = heatmap_gen.generate_heatmap(gps_data)
-            bounds = heatmap_gen.get_bounds()
-            
-            progress_reporter.log_file_operation(
-                "generated", 
-                f"heatmap grid ({heatmap_grid.shape[0]}x{heatmap_grid.shape[1]})"
-            )
-            print(f"✅ Generated heatmap with bounds: {bounds}")
-            
-            # Expand bounds for USA region to include eastern states like Maine (excluding Alaska and Hawaii)
-            if args.region in ['usa', 'all']:
-                min_lat, min_lon, max_lat, max_lon = bounds
-                # Extend to cover contiguous 48 states only (exclude Alaska and Hawaii)
-                extended_min_lat = max(24, min_lat)    # Southern border (exclude Hawaii)
-                extended_max_lat = min(49, max_lat)    # Northern border (exclude Alaska)
-                extended_min_lon = max(-125, min_lon)  # Western border (exclude Alaska)
-                extended_max_lon = max(-66, max_lon)   # Include Maine and eastern states
-                bounds = (extended_min_lat, extended_min_lon, extended_max_lat, extended_max_lon)
-                print(f"🗺️  Extended bounds for contiguous USA (excluding Alaska/Hawaii): {bounds}")
-            
-        except Exception as e:
-            progress_reporter.add_error(f"Failed to generate heatmap: {e}")
-            return
-        
-        # Load detailed map boundaries
-        print("\n🗺️  Loading geographic boundaries...")
-        try:
-            map_provider = MapDataProvider()
-            boundary_data = map_provider.get_detailed_boundaries(bounds)
-            
-            # Remove Minnesota city boundaries for minnesota and saint_paul_100km regions
-            if args.region in ['minnesota', 'saint_paul_100km'] and 'minnesota_cities' in boundary_data:
-                print(f"  Removing Minnesota city boundaries for {args.region} region...")
-                del boundary_data['minnesota_cities']
-            
-            progress_reporter.log_file_operation(
-                "loaded", 
-                f"geographic boundaries ({sum(len(paths) for paths in boundary_data.values())} paths)"
-            )
-            
-        except Exception as e:
-            progress_reporter.add_warning(f"Failed to load map boundaries: {e}")
-            progress_reporter.add_warning("Continuing without geographic boundaries")
-            boundary_data = {}
-        
-        # Create SVG
-        print("\n🎨 Creating SVG visualization...")
-        try:
-            style_config = config["style"]
-            
-            renderer = SVGRenderer(
-                width=output_config["width"],
-                height=output_config["height"]
-            )
-            
-            # Determine projection type based on region
-            projection_type = 'equirectangular'  # default
-            if args.region in ['minnesota', 'saint_paul_100km']:
-                projection_type = 'utm'
-                print(f"  Using UTM Zone 15N projection for {args.region} region...")
-            elif args.region in ['usa', 'all']:
-                projection_type = 'albers'
-                print(f"  Using Albers Equal Area Conic projection for {args.region} region...")
-            else:
-                print(f"  Using equirectangular projection...")
-            
-            # Create SVG with bounds and background color
-            renderer.create_svg(bounds, style_config["background_color"], projection_type)
-            
-            # Add detailed boundary lines based on configuration
-            boundary_config = config.get("boundaries", {})
-            
-            # World boundaries (coastlines) - skip for Japan/USA regions (use detailed boundaries instead)
-            if boundary_data.get('world') and boundary_config.get("world", {}).get("enabled", True):
-                # Skip world boundaries if we're in Japan or USA regions (use detailed boundaries instead)
-                skip_world = (map_provider.is_japan_region(bounds) or map_provider.is_usa_region(bounds))
-                if not skip_world:
-                    world_config = boundary_config["world"]
-                    print(f"  Adding {len(boundary_data['world'])} world boundary lines...")
-                    renderer.add_boundary_paths(
-                        boundary_data['world'],
-                        stroke_color=world_config.get("color", "#000000"),
-                        stroke_width=world_config.get("width", "1.0")
-                    )
-                else:
-                    print("  Skipping world boundaries (using detailed regional boundaries instead)...")
-            
-            # Japan prefecture boundaries
-            if boundary_data.get('japan_prefectures') and boundary_config.get("japan", {}).get("prefectures", {}).get("enabled", True):
-                japan_config = boundary_config["japan"]["prefectures"]
-                print(f"  Adding {len(boundary_data['japan_prefectures'])} Japan prefecture boundaries...")
-                renderer.add_boundary_paths(
-                    boundary_data['japan_prefectures'],
-                    stroke_color=japan_config.get("color", "#666666"),
-                    stroke_width=japan_config.get("width", "0.5")
-                )
-            
-            # US state boundaries
-            if boundary_data.get('us_states') and boundary_config.get("usa", {}).get("states", {}).get("enabled", True):
-                usa_config = boundary_config["usa"]["states"]
-                print(f"  Adding {len(boundary_data['us_states'])} US state boundaries...")
-                renderer.add_boundary_paths(
-                    boundary_data['us_states'],
-                    stroke_color=usa_config.get("color", "#666666"),
-                    stroke_width=usa_config.get("width", "0.5")
-                )
-            
-            # Minnesota city boundaries
-            if boundary_data.get('minnesota_cities') and boundary_config.get("usa", {}).get("minnesota_cities", {}).get("enabled", True):
-                mn_config = boundary_config["usa"]["minnesota_cities"]
-                print(f"  Adding {len(boundary_data['minnesota_cities'])} Minnesota city boundaries...")
-                renderer.add_boundary_paths(
-                    boundary_data['minnesota_cities'],
-                    stroke_color=mn_config.get("color", "#999999"),
-                    stroke_width=mn_config.get("width", "0.3")
-                )
-            
-            # Lakes and water bodies
-            if boundary_data.get('lakes'):
-                lakes_enabled = (boundary_config.get("japan", {}).get("lakes", {}).get("enabled", True) or 
-                               boundary_config.get("usa", {}).get("lakes", {}).get("enabled", True))
-                if lakes_enabled:
-                    # Use Japan lake config if in Japan region, otherwise USA lake config
-                    if map_provider.is_japan_region(bounds):
-                        lake_config = boundary_config.get("japan", {}).get("lakes", {})
-                    else:
-                        lake_config = boundary_config.get("usa", {}).get("lakes", {})
-                    
-                    print(f"  Adding {len(boundary_data['lakes'])} lake boundaries...")
-                    renderer.add_boundary_paths(
-                        boundary_data['lakes'],
-                        stroke_color=lake_config.get("color", "#000000"),
-                        stroke_width=lake_config.get("width", "0.3")
-                    )
-            
-            # Add GPS tracks
-            print(f"  Adding GPS tracks from {len(gps_data)} activities...")
-            renderer.add_gps_tracks(
-                gps_data,
-                stroke_color=style_config["track_color"],
-                stroke_width=style_config["track_width"],
-                opacity=style_config["track_opacity"]
-            )
-            
-            # Add state parks if enabled and we're in a Minnesota region
-            if args.region in ['minnesota', 'saint_paul_100km']:
-                parks_config = boundary_config.get("usa", {}).get("state_parks", {})
-                if parks_config.get("enabled", False):
-                    try:
-                        parks_file = parks_config.get("data_file", "map_cache/minnesota_state_parks.json")
-                        print(f"  Loading state parks from {parks_file}...")
-                        
-                        with open(parks_file, 'r') as f:
-                            parks_data = json.load(f)
-                        
-                        # Get individual park settings
-                        park_settings = config.get("minnesota_state_parks", {})
-                        
-                        if parks_data.get("features"):
-                            # Filter parks based on individual settings
-                            enabled_parks = []
-                            for park in parks_data["features"]:
-                                park_name = park.get("properties", {}).get("name", "")
-                                if park_settings.get(park_name, True):  # Default to True if not specified
-                                    enabled_parks.append(park)
-                            
-                            if enabled_parks:
-                                print(f"  Adding {len(enabled_parks)} state parks (filtered from {len(parks_data['features'])} total)...")
-                                renderer.add_state_parks(
-                                    enabled_parks,
-                                    stroke_color=parks_config.get("color", "#ff0000"),
-                                    fill_color=parks_config.get("fill", "none"),
-                                    radius=parks_config.get("radius", 20),
-                                    stroke_width=parks_config.get("stroke_width", 2)
-                                )
-                            else:
-                                print("  No state parks enabled in configuration")
-                        else:
-                            print("  No state parks found in data file")
-                    except FileNotFoundError:
-                        progress_reporter.add_warning(f"State parks file not found: {parks_file}")
-                    except Exception as e:
-                        progress_reporter.add_warning(f"Failed to load state parks: {e}")
-                else:
-                    print("  State parks rendering disabled in configuration")
-            
-            # Add national parks if enabled and we're in a USA region
-            if args.region in ['usa', 'all', 'minnesota', 'saint_paul_100km']:
-                parks_config = boundary_config.get("usa", {}).get("national_parks", {})
-                if parks_config.get("enabled", False):
-                    try:
-                        parks_file = parks_config.get("data_file", "map_cache/us_national_parks.json")
-                        print(f"  Loading national parks from {parks_file}...")
-                        
-                        with open(parks_file, 'r') as f:
-                            parks_data = json.load(f)
-                        
-                        # Get individual park settings
-                        park_settings = config.get("us_national_parks", {})
-                        
-                        if parks_data.get("features"):
-                            # Filter parks based on individual settings
-                            enabled_parks = []
-                            for park in parks_data["features"]:
-                                park_name = park.get("properties", {}).get("name", "")
-                                if park_settings.get(park_name, True):  # Default to True if not specified
-                                    enabled_parks.append(park)
-                            
-                            if enabled_parks:
-                                print(f"  Adding {len(enabled_parks)} national parks (filtered from {len(parks_data['features'])} total)...")
-                                renderer.add_national_parks(
-                                    enabled_parks,
-                                    stroke_color=parks_config.get("color", "#ff6b00"),
-                                    fill_color=parks_config.get("fill", "none"),
-                                    size=parks_config.get("size", 12),
-                                    stroke_width=parks_config.get("stroke_width", 2)
-                                )
-                            else:
-                                print("  No national parks enabled in configuration")
-                        else:
-                            print("  No national parks found in data file")
-                    except FileNotFoundError:
-                        progress_reporter.add_warning(f"National parks file not found: {parks_file}")
-                    except Exception as e:
-                        progress_reporter.add_warning(f"Failed to load national parks: {e}")
-                else:
-                    print("  National parks rendering disabled in configuration")
-            
-            # Add cities if enabled and we're in a USA region
-            if args.region in ['usa', 'all']:
-                cities_config = boundary_config.get("usa", {}).get("cities", {})
-                if cities_config.get("enabled", False):
-                    try:
-                        cities_file = cities_config.get("data_file", "map_cache/us_cities.json")
-                        print(f"  Loading cities from {cities_file}...")
-                        
-                        with open(cities_file, 'r') as f:
-                            cities_data = json.load(f)
-                        
-                        # Get individual city settings
-                        city_settings = config.get("us_cities", {})
-                        
-                        if cities_data.get("features"):
-                            # Filter cities based on individual settings
-                            enabled_cities = []
-                            for city in cities_data["features"]:
-                                city_name = city.get("properties", {}).get("name", "")
-                                if city_settings.get(city_name, True):  # Default to True if not specified
-                                    enabled_cities.append(city)
-                            
-                            if enabled_cities:
-                                print(f"  Adding {len(enabled_cities)} cities (filtered from {len(cities_data['features'])} total)...")
-                                renderer.add_cities(
-                                    enabled_cities,
-                                    stroke_color=cities_config.get("color", "#ff0000"),
-                                    fill_color=cities_config.get("fill", "none"),
-                                    size=cities_config.get("size", 16),
-                                    stroke_width=cities_config.get("stroke_width", 2)
-                                )
-                            else:
-                                print("  No cities enabled in configuration")
-                        else:
-                            print("  No cities found in data file")
-                    except FileNotFoundError:
-                        progress_reporter.add_warning(f"Cities file not found: {cities_file}")
-                    except Exception as e:
-                        progress_reporter.add_warning(f"Failed to load cities: {e}")
-                else:
-                    print("  Cities rendering disabled in configuration")
-            
-            # Add title and metadata
-            athlete_name = f"{athlete_info['firstname']} {athlete_info['lastname']}"
-            if args.region != 'all':
-                region_title = args.region.replace('_', ' ').title()
-                renderer.add_title(f"{athlete_name}'s Strava Activity Heatmap - {region_title}")
-            else:
-                renderer.add_title(f"{athlete_name}'s Strava Activity Heatmap")
-            renderer.add_legend()
-            
-            # Save SVG with region-specific filename
-            base_filename = output_config["filename"]
-            if args.region != 'all':
-                name_parts = base_filename.rsplit('.', 1)
-                if len(name_parts) == 2:
-                    output_file = f"{name_parts[0]}_{args.region}.{name_parts[1]}"
-                else:
-                    output_file = f"{base_filename}_{args.region}"
-            else:
-                output_file = base_filename
-            
-            renderer.save_svg(output_file)
-            
-            progress_reporter.log_file_operation("saved", output_file)
-            
-        except Exception as e:
-            progress_reporter.add_error(f"Failed to create SVG: {e}")
-            return
-        
-        # Show final summary
-        bounds_info = calculate_gps_bounds(gps_data)
-        additional_stats = {
-            'Output file': output_file,
-            'SVG dimensions': f"{output_config['width']} x {output_config['height']} pixels",
-            'Geographic bounds': f"({bounds_info[0]:.3f}, {bounds_info[2]:.3f}) to ({bounds_info[1]:.3f}, {bounds_info[3]:.3f})",
-            'Boundary paths included': sum(len(paths) for paths in boundary_data.values()),
-            'Heatmap grid size': f"{grid_width} x {grid_height}"
-        }
-        
-        progress_reporter.show_summary(additional_stats)
-        print(f"\n🎉 Heatmap generation complete! SVG saved as: {output_file}")
+        # GPS data, athlete info and loaded boundary files are shared by
+        # every requested region
+        from map_data import MapDataProvider
+        map_provider = MapDataProvider(verbose=not args.quiet)
+        regions = list(dict.fromkeys(args.region))
+        # Per-activity boxes let every filtered region skip far-away activities
+        activity_bounds = None
+        if any(region != 'all' for region in regions):
+            activity_bounds = calculate_activity_bounds(gps_data)
+        for region in regions:
+            render_region(region, args, config, gps_data, athlete_info, map_provider, progress_reporter,
+                          data_bounds=data_bounds, activity_bounds=activity_bounds)
         
     except KeyboardInterrupt:
         handle_keyboard_interrupt("Heatmap Generation")
     except Exception as e:
         print(f"❌ Heatmap generation failed: {e}")
-        import traceback
-        traceback.print_exc()
+        print_debug_traceback()
 
 
 if __name__ == "__main__":
@@ -1,14 +1,13 @@
 #!/usr/bin/env python3
 
-import json
 from strava_client import StravaClient
+from strava_files import read_json, write_json
 
 def get_new_token_with_correct_scope():
     """Get a new token with the correct activity:read_all scope"""
     
     # Load config
-    with open('config.json', 'r') as f:
-        config = json.load(f)
+    config = read_json('config.json')
     
     strava_config = config['strava']
     
@@ -72,9 +71,9 @@ def get_new_token_with_correct_scope():
         # Update config file
         config['strava']['access_token'] = token_data['access_token']
         config['strava']['refresh_token'] = token_data['refresh_token']
+        config['strava']['expires_at'] = token_data['expires_at']
         
-        with open('config.json', 'w') as f:
-            json.dump(config, f, indent=2)
+        write_json('config.json', config)
         
         print("✓ Config file updated with new tokens!")
         print()
@@ -1,30 +1,89 @@
+import os
+import hashlib
 import numpy as np
-from typing import List, Tuple, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Any, Optional
 import math
 from collections import defaultdict
+from heatmap_utils import (calculate_gps_bounds, count_total_gps_points, flatten_gps_data,
+                           create_cache_directory, safe_filename_for_bounds)
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+try:
+    from scipy import ndimage
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _rasterize_tracks_numba(coords, offsets, min_lat, min_lon, lat_scale, lon_scale, grid):
+        # Same cells as HeatmapGenerator._points_to_grid and the same walk as
+        # _bresenham_line; tracks run in parallel and only ever write 1
+        rows, cols = grid.shape
+        for t in prange(offsets.shape[0] - 1):
+            start, end = offsets[t], offsets[t + 1]
+            if end - start < 2:
+                continue
+            prev_x = 0
+            prev_y = 0
+            for i in range(start, end):
+                # float() widens float32 input so cells match the NumPy path
+                x = min(max(int((float(coords[i, 0]) - min_lat) * lat_scale), 0), rows - 1)
+                y = min(max(int((float(coords[i, 1]) - min_lon) * lon_scale), 0), cols - 1)
+                grid[x, y] = 1
+                
+                if i > start and abs(x - prev_x) + abs(y - prev_y) > 1:
+                    x0, y0 = prev_x, prev_y
+                    dx = abs(x - x0)
+                    dy = abs(y - y0)
+                    x_inc = 1 if x > x0 else -1
+                    y_inc = 1 if y > y0 else -1
+                    error = dx - dy
+                    # Both endpoints are already marked; only the cells
+                    # strictly between them are written
+                    for _ in range(dx + dy - 1):
+                        if error > 0:
+                            x0 += x_inc
+                            error -= 2 * dy
+                        else:
+                            y0 += y_inc
+                            error += 2 * dx
+                        grid[x0, y0] = 1
+                prev_x = x
+                prev_y = y
+
+
+# Long segments per thread pool task in the NumPy rasterizer
+RASTER_CHUNK_SEGMENTS = 1 << 14
+
+# Bump when the cells a track marks or the grid dtype change, so cached grids are not reused
+GRID_CACHE_VERSION = 2
 
 
 class HeatmapGenerator:
-    def __init__(self, bounds: Tuple[float, float, float, float] = None, resolution: int = 1000):
+    def __init__(self, bounds: Tuple[float, float, float, float] = None, resolution: int = 1000,
+                 cache_dir: Optional[str] = None):
         self.bounds = bounds  # (min_lat, min_lon, max_lat, max_lon)
         self.resolution = resolution
+        # Rasterized grids are saved here and reused for identical input (None disables)
+        self.cache_dir = cache_dir
         self.grid = None
         self.lat_scale = None
         self.lon_scale = None
         
-    def _calculate_bounds(self, gps_data: Dict[int, List[List[float]]]) -> Tuple[float, float, float, float]:
-        all_points = []
-        for activity_points in gps_data.values():
-            all_points.extend(activity_points)
-        
-        if not all_points:
+    def _calculate_bounds(self, gps_data: Dict[int, List[List[float]]],
+                          gps_bounds: Optional[Tuple[float, float, float, float]] = None
+                          ) -> Tuple[float, float, float, float]:
+        if not count_total_gps_points(gps_data):
             return (0, 0, 0, 0)
         
-        lats = [point[0] for point in all_points]
-        lons = [point[1] for point in all_points]
-        
-        min_lat, max_lat = min(lats), max(lats)
-        min_lon, max_lon = min(lons), max(lons)
+        # Usually already measured for the GPS summary
+        min_lat, max_lat, min_lon, max_lon = gps_bounds or calculate_gps_bounds(gps_data)
         
         # Add larger margin to ensure all boundary features are included
         lat_margin = (max_lat - min_lat) * 0.15
@@ -39,7 +98,7 @@ class HeatmapGenerator:
         
         self.lat_scale = self.resolution / (max_lat - min_lat)
         self.lon_scale = self.resolution / (max_lon - min_lon)
-        self.grid = np.zeros((self.resolution, self.resolution))
+        self.grid = np.zeros((self.resolution, self.resolution), dtype=np.uint8)
     
     def _lat_lon_to_grid(self, lat: float, lon: float) -> Tuple[int, int]:
         min_lat, min_lon, _, _ = self.bounds
@@ -52,6 +111,18 @@ class HeatmapGenerator:
         
         return grid_lat, grid_lon
     
+    def _points_to_grid(self, points: np.ndarray) -> np.ndarray:
+        """Vectorized _lat_lon_to_grid for an N x 2 array of (lat, lon)"""
+        min_lat, min_lon, _, _ = self.bounds
+        
+        cells = np.empty(points.shape, dtype=np.int64)
+        # astype truncates toward zero, like int()
+        cells[:, 0] = ((points[:, 0] - min_lat) * self.lat_scale).astype(np.int64)
+        cells[:, 1] = ((points[:, 1] - min_lon) * self.lon_scale).astype(np.int64)
+        np.clip(cells, 0, self.resolution - 1, out=cells)
+        
+        return cells
+    
     def _grid_to_lat_lon(self, grid_lat: int, grid_lon: int) -> Tuple[float, float]:
         min_lat, min_lon, _, _ = self.bounds
         
@@ -60,23 +131,6 @@ class HeatmapGenerator:
         
         return lat, lon
     
-    def _add_line_to_grid(self, start_point: List[float], end_point: List[float]):
-        start_lat, start_lon = start_point
-        end_lat, end_lon = end_point
-        
-        start_grid = self._lat_lon_to_grid(start_lat, start_lon)
-        end_grid = self._lat_lon_to_grid(end_lat, end_lon)
-        
-        # Bresenham's line algorithm adaptation for drawing lines on grid
-        x0, y0 = start_grid
-        x1, y1 = end_grid
-        
-        points = self._bresenham_line(x0, y0, x1, y1)
-        
-        for x, y in points:
-            if 0 <= x < self.resolution and 0 <= y < self.resolution:
-                self.grid[x, y] = 1
-    
     def _bresenham_line(self, x0: int, y0: int, x1: int, y1: int) -> List[Tuple[int, int]]:
         points = []
         dx = abs(x1 - x0)
@@ -102,37 +156,208 @@ class HeatmapGenerator:
                 
         return points
     
-    def generate_heatmap(self, gps_data: Dict[int, List[List[float]]]) -> np.ndarray:
+    def generate_heatmap(self, gps_data: Dict[int, List[List[float]]],
+                         gps_bounds: Optional[Tuple[float, float, float, float]] = None) -> np.ndarray:
+        """
+        Rasterize every track into the grid
+        
+        Args:
+            gps_data: GPS data dictionary
+            gps_bounds: calculate_gps_bounds(gps_data) if the caller already
+                has it; the grid bounds add a margin around it
+            
+        Returns:
+            The grid (uint8, 1 where a track passes)
+        """
         if self.bounds is None:
-            self.bounds = self._calculate_bounds(gps_data)
+            self.bounds = self._calculate_bounds(gps_data, gps_bounds)
         
         self._setup_grid(self.bounds)
         
-        for activity_id, activity_points in gps_data.items():
-            if len(activity_points) < 2:
-                continue
-                
-            for i in range(len(activity_points) - 1):
-                self._add_line_to_grid(activity_points[i], activity_points[i + 1])
+        # All tracks as one coords array (track i owns
+        # coords[offsets[i]:offsets[i + 1]]), binned in one pass. Array-backed
+        # data is used in place; tracks with fewer than 2 points are skipped.
+        coords, offsets = flatten_gps_data(gps_data)
+        
+        if self.cache_dir is None:
+            return self._rasterize(coords, offsets)
+        
+        cache_file = self._grid_cache_file(coords, offsets)
+        try:
+            with np.load(cache_file) as cached:
+                self.grid = cached['grid']
+            return self.grid
+        except (OSError, ValueError, KeyError):
+            pass
         
+        self._rasterize(coords, offsets)
+        try:
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                np.savez_compressed(f, grid=self.grid, bounds=np.array(self.bounds, dtype=np.float64))
+            os.replace(tmp_file, cache_file)
+            self._prune_grid_cache(cache_file)
+        except OSError as e:
+            print(f"    Warning: could not write {cache_file}: {e}")
         return self.grid
     
+    def _prune_grid_cache(self, cache_file: str):
+        """Delete grids cached for older data at the same bounds and resolution"""
+        cache_dir, keep = os.path.split(cache_file)
+        # Everything up to the data hash: heatmap_<bounds>_<resolution>_
+        prefix = keep.rsplit('_', 1)[0] + '_'
+        for entry in os.listdir(cache_dir):
+            if entry != keep and entry.startswith(prefix) and entry.endswith('.npz') and len(entry) == len(keep):
+                try:
+                    os.remove(os.path.join(cache_dir, entry))
+                except OSError:
+                    pass
+    
+    def _grid_cache_file(self, coords: np.ndarray, offsets: np.ndarray) -> str:
+        """Cache path for the grid of these points at the current bounds and resolution"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((GRID_CACHE_VERSION, tuple(map(float, self.bounds)),
+                            self.resolution, str(coords.dtype))).encode())
+        digest.update(np.ascontiguousarray(coords).data)
+        digest.update(np.ascontiguousarray(offsets).data)
+        
+        min_lat, min_lon, max_lat, max_lon = self.bounds
+        name = f"heatmap_{safe_filename_for_bounds(min_lat, max_lat, min_lon, max_lon)}_{self.resolution}"
+        return os.path.join(create_cache_directory(self.cache_dir), f"{name}_{digest.hexdigest()}.npz")
+    
+    def _rasterize(self, coords: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """Mark the cells of every track in the freshly set up grid"""
+        lengths = np.diff(offsets)
+        drawn = lengths >= 2
+        if not drawn.any():
+            return self.grid
+        
+        if NUMBA_AVAILABLE:
+            min_lat, min_lon, _, _ = self.bounds
+            _rasterize_tracks_numba(coords, offsets, min_lat, min_lon,
+                                    self.lat_scale, self.lon_scale, self.grid)
+            return self.grid
+        
+        if not drawn.all():
+            coords = coords[np.repeat(drawn, lengths)]
+            offsets = np.zeros(np.count_nonzero(drawn) + 1, dtype=np.int64)
+            np.cumsum(lengths[drawn], out=offsets[1:])
+        cells = self._points_to_grid(np.asarray(coords, dtype=np.float64))
+        delta = np.diff(cells, axis=0)
+        steps = np.abs(delta[:, 0]) + np.abs(delta[:, 1])
+        
+        # Consecutive points usually share a cell (pauses, dense sampling);
+        # only the first point of each run needs writing
+        moved = np.empty(len(cells), dtype=bool)
+        moved[0] = True
+        np.not_equal(steps, 0, out=moved[1:])
+        self.grid[cells[moved, 0], cells[moved, 1]] = 1
+        
+        # A segment within one cell step marks only its two endpoints;
+        # only longer segments need to be walked with Bresenham. The last
+        # point of a track is not joined to the next track's first point.
+        steps[offsets[1:-1] - 1] = 0
+        long_segments = np.flatnonzero(steps > 1)
+        if len(long_segments) > RASTER_CHUNK_SEGMENTS and (os.cpu_count() or 1) > 1:
+            # NumPy releases the GIL while computing and scattering cells, and
+            # every write is an idempotent 1, so chunks share the grid unlocked
+            chunks = [long_segments[i:i + RASTER_CHUNK_SEGMENTS]
+                      for i in range(0, len(long_segments), RASTER_CHUNK_SEGMENTS)]
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                list(executor.map(lambda chunk: self._mark_bresenham_cells(cells[chunk], cells[chunk + 1]),
+                                  chunks))
+        elif len(long_segments):
+            self._mark_bresenham_cells(cells[long_segments], cells[long_segments + 1])
+        
+        return self.grid
+    
+    def _mark_bresenham_cells(self, starts: np.ndarray, ends: np.ndarray):
+        """
+        Mark the cells _bresenham_line visits after leaving each start, for many segments at once
+        
+        The walk takes |dx| x-steps and |dy| y-steps; x-step i comes before
+        y-step j exactly when (2i + 1)|dy| < (2j + 1)|dx| (the error test in
+        _bresenham_line), so the cell reached by every step has a closed form
+        and no step needs to be simulated. Cells are written straight into
+        the grid through flat indices, without building (x, y) pairs.
+        
+        Args:
+            starts: M x 2 int array of segment start cells
+            ends: M x 2 int array of segment end cells
+        """
+        grid = self.grid.reshape(-1)
+        width = self.grid.shape[1]
+        delta = ends - starts
+        sign = np.where(delta > 0, 1, -1)
+        dx = np.abs(delta[:, 0])
+        dy = np.abs(delta[:, 1])
+        
+        def step_index(counts):
+            # Segment of each step and the step's index within its segment
+            segment = np.repeat(np.arange(len(counts)), counts)
+            index = np.arange(len(segment)) - np.repeat(np.cumsum(counts) - counts, counts)
+            return segment, index
+        
+        # x-step i is preceded by the y-steps j with (2j + 1)dx <= (2i + 1)dy
+        seg, i = step_index(dx)
+        x_dx, x_dy = dx[seg], dy[seg]
+        y_before = np.minimum(x_dy, ((2 * i + 1) * x_dy + x_dx) // (2 * x_dx))
+        grid[(starts[seg, 0] + (i + 1) * sign[seg, 0]) * width
+             + starts[seg, 1] + y_before * sign[seg, 1]] = 1
+        
+        # y-step j is preceded by the x-steps i with (2i + 1)dy < (2j + 1)dx
+        seg, j = step_index(dy)
+        y_dx, y_dy = dx[seg], dy[seg]
+        x_before = np.clip(-((y_dy - (2 * j + 1) * y_dx) // (2 * y_dy)), 0, y_dx)
+        grid[(starts[seg, 0] + x_before * sign[seg, 0]) * width
+             + starts[seg, 1] + (j + 1) * sign[seg, 1]] = 1
+    
     def get_heatmap_paths(self) -> List[List[Tuple[float, float]]]:
         if self.grid is None:
             return []
         
+        if SCIPY_AVAILABLE:
+            return self._label_heatmap_paths()
+        
         paths = []
         visited = np.zeros_like(self.grid, dtype=bool)
         
-        for i in range(self.resolution):
-            for j in range(self.resolution):
-                if self.grid[i, j] > 0 and not visited[i, j]:
-                    path = self._trace_path(i, j, visited)
-                    if len(path) > 1:
-                        # Convert grid coordinates to lat/lon
-                        lat_lon_path = [self._grid_to_lat_lon(x, y) for x, y in path]
-                        paths.append(lat_lon_path)
+        # Only occupied cells can start a path; argwhere keeps row-major order
+        for i, j in np.argwhere(self.grid > 0).tolist():
+            if not visited[i, j]:
+                path = self._trace_path(i, j, visited)
+                if len(path) > 1:
+                    # Convert grid coordinates to lat/lon
+                    lat_lon_path = [self._grid_to_lat_lon(x, y) for x, y in path]
+                    paths.append(lat_lon_path)
+        
+        return paths
+    
+    def _label_heatmap_paths(self) -> List[List[Tuple[float, float]]]:
+        """
+        get_heatmap_paths via scipy.ndimage.label
+        
+        Components are the same 8-connected sets in the same order; the
+        cells within each one are listed row by row instead of in
+        flood-fill order.
+        """
+        labels, _ = ndimage.label(self.grid > 0, structure=np.ones((3, 3), dtype=bool))
+        cells = np.flatnonzero(labels)
+        # Group cells by component, keeping row-major order inside each
+        cells = cells[np.argsort(labels.ravel()[cells], kind='stable')]
+        sizes = np.bincount(labels.ravel()[cells])[1:]
         
+        min_lat, min_lon, _, _ = self.bounds
+        rows, cols = np.divmod(cells, self.grid.shape[1])
+        lat_lon = np.column_stack((min_lat + rows / self.lat_scale,
+                                   min_lon + cols / self.lon_scale)).tolist()
+        
+        paths = []
+        start = 0
+        for size in sizes.tolist():
+            if size > 1:
+                paths.append([tuple(point) for point in lat_lon[start:start + size]])
+            start += size
         return paths
     
     def _trace_path(self, start_i: int, start_j: int, visited: np.ndarray) -> List[Tuple[int, int]]:
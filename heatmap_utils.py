@@ -9,6 +9,127 @@ and geographic operations used across heatmap scripts.
 
 from typing import Dict, List, Tuple, Any, Optional
 import os
+import math
+from itertools import compress
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _project_equirectangular_numba(coords, center_lat, center_lon, scale, offset_x, offset_y):
+        out = np.empty((coords.shape[0], 2))
+        for i in prange(coords.shape[0]):
+            out[i, 0] = (coords[i, 1] - center_lon) * scale + offset_x
+            out[i, 1] = (center_lat - coords[i, 0]) * scale + offset_y
+        return out
+
+
+def project_equirectangular(coords: "np.ndarray", center_lat: float, center_lon: float,
+                            scale: float, offset_x: float, offset_y: float) -> "np.ndarray":
+    """
+    Project (lat, lon) points to SVG (x, y) with the equirectangular projection
+    
+    Uses a parallel Numba kernel when numba is installed, otherwise NumPy.
+    
+    Args:
+        coords: N x 2 array of (lat, lon)
+        center_lat, center_lon: Projection center
+        scale: Pixels per degree
+        offset_x, offset_y: SVG position of the center
+        
+    Returns:
+        N x 2 float64 array of (x, y)
+    """
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    if NUMBA_AVAILABLE:
+        return _project_equirectangular_numba(coords, center_lat, center_lon, scale, offset_x, offset_y)
+    
+    out = np.empty((len(coords), 2))
+    out[:, 0] = (coords[:, 1] - center_lon) * scale + offset_x
+    out[:, 1] = (center_lat - coords[:, 0]) * scale + offset_y
+    return out
+
+
+def _first_out_of_range_point(activity_id: Any, points: List[List[float]]) -> Optional[str]:
+    """
+    Check every point of an activity at once with NumPy
+    
+    Args:
+        activity_id: Activity ID used in the issue message
+        points: List of [lat, lon] pairs
+        
+    Returns:
+        Issue for the first out-of-range (or NaN) point, "" if all points
+        are valid, or None if the points are not a numeric N x 2 array
+    """
+    try:
+        coords = np.asarray(points, dtype=np.float64)
+    except (ValueError, TypeError):
+        return None
+    if coords.ndim != 2 or coords.shape[1] != 2:
+        return None
+    
+    # Comparisons with NaN are False, so NaN coordinates are flagged too
+    lat_ok = (coords[:, 0] >= -90) & (coords[:, 0] <= 90)
+    lon_ok = (coords[:, 1] >= -180) & (coords[:, 1] <= 180)
+    bad = ~(lat_ok & lon_ok)
+    if not bad.any():
+        return ""
+    
+    i = int(bad.argmax())
+    if not lat_ok[i]:
+        return f"Activity {activity_id}: Invalid latitude {coords[i, 0]} at index {i}"
+    return f"Activity {activity_id}: Invalid longitude {coords[i, 1]} at index {i}"
+
+
+def _validate_arrays(gps_data: Dict[Any, "np.ndarray"]) -> List[str]:
+    """
+    Range-check array-backed GPS data with one mask over all points
+    
+    Args:
+        gps_data: {activity_id: N x 2 float array of (lat, lon)}
+        
+    Returns:
+        Issues in activity order: empty activities and the first
+        out-of-range (or NaN) point of each activity that has one
+    """
+    lengths = np.fromiter(map(len, gps_data.values()), dtype=np.int64, count=len(gps_data))
+    starts = np.zeros(len(gps_data), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    coords = np.concatenate(list(gps_data.values())) if lengths.any() else np.empty((0, 2))
+    
+    # Comparisons with NaN are False, so NaN coordinates are flagged too
+    lat_ok = (coords[:, 0] >= -90) & (coords[:, 0] <= 90)
+    lon_ok = (coords[:, 1] >= -180) & (coords[:, 1] <= 180)
+    bad_points = np.flatnonzero(~(lat_ok & lon_ok))
+    
+    # First bad point of each activity that has any
+    bad_activities, first = np.unique(
+        np.searchsorted(starts, bad_points, side='right') - 1, return_index=True
+    )
+    first_bad = dict(zip(bad_activities.tolist(), bad_points[first].tolist()))
+    
+    issues = []
+    for i, activity_id in enumerate(gps_data.keys()):
+        if lengths[i] == 0:
+            issues.append(f"Activity {activity_id}: No GPS points found")
+        elif i in first_bad:
+            j = first_bad[i]
+            index = j - int(starts[i])
+            if not lat_ok[j]:
+                issues.append(f"Activity {activity_id}: Invalid latitude {coords[j, 0]} at index {index}")
+            else:
+                issues.append(f"Activity {activity_id}: Invalid longitude {coords[j, 1]} at index {index}")
+    return issues
 
 
 def validate_gps_data_structure(gps_data: Any) -> Tuple[bool, List[str]]:
@@ -31,6 +152,14 @@ def validate_gps_data_structure(gps_data: Any) -> Tuple[bool, List[str]]:
         issues.append("GPS data is empty")
         return False, issues
     
+    # Array-backed data (see StravaFileManager.load_gps_data_file) is
+    # checked in one vectorized pass
+    if (NUMPY_AVAILABLE and
+            all(isinstance(points, np.ndarray) and points.ndim == 2 and points.shape[1] == 2
+                for points in gps_data.values())):
+        issues = _validate_arrays(gps_data)
+        return len(issues) == 0, issues
+    
     # Check structure of entries
     for activity_id, points in gps_data.items():
         try:
@@ -40,7 +169,8 @@ def validate_gps_data_structure(gps_data: Any) -> Tuple[bool, List[str]]:
             issues.append(f"Invalid activity ID: {activity_id}")
             continue
         
-        if not isinstance(points, list):
+        is_array = NUMPY_AVAILABLE and isinstance(points, np.ndarray)
+        if not (isinstance(points, list) or is_array):
             issues.append(f"Activity {activity_id}: GPS points must be a list")
             continue
         
@@ -48,6 +178,14 @@ def validate_gps_data_structure(gps_data: Any) -> Tuple[bool, List[str]]:
             issues.append(f"Activity {activity_id}: No GPS points found")
             continue
         
+        # With NumPy every point is range-checked in one vectorized pass
+        if NUMPY_AVAILABLE:
+            issue = _first_out_of_range_point(activity_id, points)
+            if issue is not None:
+                if issue:
+                    issues.append(issue)
+                continue
+        
         # Validate a few sample points
         sample_size = min(5, len(points))
         for i in range(sample_size):
@@ -71,28 +209,185 @@ def validate_gps_data_structure(gps_data: Any) -> Tuple[bool, List[str]]:
     return len(issues) == 0, issues
 
 
+def validate_gps_data_file(gps_data: Any, data_file: str) -> Tuple[bool, List[str]]:
+    """
+    validate_gps_data_structure, skipped when data_file already passed
+    
+    A successful validation records the file's mtime and size in
+    ``<data_file>.validated``; while the file still matches that marker the
+    data is trusted without walking it again.
+    
+    Args:
+        gps_data: GPS data loaded from data_file
+        data_file: Path of the file gps_data was loaded from
+        
+    Returns:
+        Tuple of (is_valid, list_of_issues)
+    """
+    marker_file = f"{data_file}.validated"
+    try:
+        stat = os.stat(data_file)
+        stamp = repr((stat.st_mtime_ns, stat.st_size))
+    except OSError:
+        return validate_gps_data_structure(gps_data)
+    
+    try:
+        with open(marker_file, 'r', encoding='utf-8') as f:
+            if f.read() == stamp:
+                return True, []
+    except OSError:
+        pass
+    
+    is_valid, issues = validate_gps_data_structure(gps_data)
+    if is_valid:
+        try:
+            with open(marker_file, 'w', encoding='utf-8') as f:
+                f.write(stamp)
+        except OSError:
+            pass
+    return is_valid, issues
+
+
 def calculate_gps_bounds(gps_data: Dict[str, List[List[float]]]) -> Tuple[float, float, float, float]:
     """
     Calculate bounding box of all GPS points
     
+    Callers that need the bounds more than once measure them once and pass
+    them on (see the bounds arguments of calculate_heatmap_resolution,
+    format_gps_summary and HeatmapGenerator.generate_heatmap).
+    
     Args:
         gps_data: GPS data dictionary
         
     Returns:
         Tuple of (min_lat, max_lat, min_lon, max_lon)
     """
-    all_lats = []
-    all_lons = []
+    if NUMPY_AVAILABLE:
+        # One flat array (usually a view of the loaded data), reduced in C
+        coords, _ = flatten_gps_data(gps_data)
+        if len(coords) == 0:
+            return 0.0, 0.0, 0.0, 0.0
+        
+        # Per-column reductions: NumPy's axis=0 reduce over an N x 2 array
+        # walks rows one pair at a time and is an order of magnitude slower
+        lats, lons = coords[:, 0], coords[:, 1]
+        return float(lats.min()), float(lats.max()), float(lons.min()), float(lons.max())
+    
+    min_lat = min_lon = float('inf')
+    max_lat = max_lon = float('-inf')
     
+    # Single pass tracking four scalars instead of collecting every coordinate
     for points in gps_data.values():
         for lat, lon in points:
-            all_lats.append(lat)
-            all_lons.append(lon)
+            if lat < min_lat:
+                min_lat = lat
+            if lat > max_lat:
+                max_lat = lat
+            if lon < min_lon:
+                min_lon = lon
+            if lon > max_lon:
+                max_lon = lon
     
-    if not all_lats:
+    if min_lat == float('inf'):
         return 0.0, 0.0, 0.0, 0.0
     
-    return min(all_lats), max(all_lats), min(all_lons), max(all_lons)
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def simplify_polyline(xy: "np.ndarray", tolerance: float) -> "np.ndarray":
+    """
+    Simplify a polyline with the Ramer-Douglas-Peucker algorithm
+    
+    Args:
+        xy: N x 2 array of projected (x, y) coordinates
+        tolerance: Maximum distance a dropped point may lie from the
+            simplified line, in the same units as xy
+        
+    Returns:
+        Array of the kept points; first and last points are always kept
+    """
+    n = len(xy)
+    if n < 3 or tolerance <= 0:
+        return xy
+    
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        
+        dx, dy = xy[end] - xy[start]
+        offsets = xy[start + 1:end] - xy[start]
+        seg_len = math.hypot(dx, dy)
+        if seg_len == 0:
+            # Closed ring: measure from the shared endpoint
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(dx * offsets[:, 1] - dy * offsets[:, 0]) / seg_len
+        
+        i = int(distances.argmax())
+        if distances[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    
+    return xy[keep]
+
+
+def flatten_gps_data(gps_data: Dict[Any, Any]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    All GPS points as one N x 2 array plus CSR-style offsets
+    
+    When the activities are consecutive slices of one shared array (as
+    StravaFileManager.load_gps_data_file(as_arrays=True) returns them),
+    coords is a read-only view of that array and nothing is copied;
+    otherwise the points are copied into a new float64 array.
+    
+    Args:
+        gps_data: GPS data dictionary
+        
+    Returns:
+        Tuple of (coords, offsets); activity i in dict order owns
+        coords[offsets[i]:offsets[i + 1]]
+    """
+    values = list(gps_data.values())
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, values), dtype=np.int64, count=len(values)), out=offsets[1:])
+    
+    shared = _shared_coords(values, offsets)
+    if shared is not None:
+        return shared, offsets
+    
+    coords = np.empty((int(offsets[-1]), 2), dtype=np.float64)
+    for points, start, end in zip(values, offsets[:-1].tolist(), offsets[1:].tolist()):
+        if end > start:
+            coords[start:end] = points
+    return coords, offsets
+
+
+def _shared_coords(values: List[Any], offsets: "np.ndarray") -> Optional["np.ndarray"]:
+    """View spanning values if they are back-to-back N x 2 slices of one array, else None"""
+    if not values:
+        return None
+    first = values[0]
+    if not (isinstance(first, np.ndarray) and first.base is not None and
+            first.ndim == 2 and first.shape[1] == 2):
+        return None
+    
+    start = first.ctypes.data
+    row_stride = first.strides[0]
+    for points, offset in zip(values, offsets.tolist()):
+        if not (isinstance(points, np.ndarray) and points.base is first.base and
+                points.dtype == first.dtype and points.strides == first.strides and
+                points.ndim == 2 and points.ctypes.data == start + offset * row_stride):
+            return None
+    
+    # Every slice lies inside first.base, which the view keeps alive
+    return np.lib.stride_tricks.as_strided(first, shape=(int(offsets[-1]), 2), writeable=False)
 
 
 def count_total_gps_points(gps_data: Dict[str, List[List[float]]]) -> int:
@@ -105,22 +400,138 @@ def count_total_gps_points(gps_data: Dict[str, List[List[float]]]) -> int:
     Returns:
         Total number of GPS points
     """
-    return sum(len(points) for points in gps_data.values())
+    return sum(map(len, gps_data.values()))
+
+
+def calculate_activity_bounds(gps_data: Dict[Any, "np.ndarray"]) -> "np.ndarray":
+    """
+    Bounding box of every activity of array-backed GPS data
+    
+    The boxes are a coarse spatial index: a bounding box query only needs to
+    look at the points of activities whose box straddles the query edge.
+    Callers filtering the same data repeatedly compute them once and pass
+    them as activity_bounds.
+    
+    Args:
+        gps_data: {activity_id: points array of (lat, lon) pairs}
+        
+    Returns:
+        M x 4 array of (min_lat, max_lat, min_lon, max_lon) per activity in
+        dict order; NaN rows for activities without points
+    """
+    arrays = [points.reshape(-1, 2) for points in gps_data.values()]
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, arrays), dtype=np.int64, count=len(arrays)), out=offsets[1:])
+    coords = _shared_coords(arrays, offsets)
+    if coords is None:
+        coords = np.concatenate(arrays) if arrays else np.empty((0, 2))
+    
+    # Same dtype as the points so box tests round the bounds like point tests
+    dtype = coords.dtype if np.issubdtype(coords.dtype, np.floating) else np.float64
+    boxes = np.full((len(arrays), 4), np.nan, dtype=dtype)
+    nonempty = np.flatnonzero(np.diff(offsets) > 0)
+    if len(nonempty):
+        starts = offsets[nonempty]
+        # Per-column reductions (see calculate_gps_bounds)
+        lats, lons = coords[:, 0], coords[:, 1]
+        boxes[nonempty, 0] = np.minimum.reduceat(lats, starts)
+        boxes[nonempty, 1] = np.maximum.reduceat(lats, starts)
+        boxes[nonempty, 2] = np.minimum.reduceat(lons, starts)
+        boxes[nonempty, 3] = np.maximum.reduceat(lons, starts)
+    
+    return boxes
+
+
+def _filter_arrays_by_box(gps_data: Dict[Any, "np.ndarray"], box: Tuple[float, float, float, float],
+                          point_mask: Any, box_is_exact: bool,
+                          activity_bounds: Optional["np.ndarray"] = None) -> Dict[Any, "np.ndarray"]:
+    """
+    Filter array-backed GPS data, testing only points of activities near the box edge
+    
+    Activities whose bounding box misses box are dropped without looking at
+    their points. When box is the exact filter, activities whose bounding box
+    lies inside it are kept whole; the rest have point_mask applied to
+    their points in one vectorized call.
+    
+    Args:
+        gps_data: {activity_id: points array of (lat, lon) pairs}
+        box: (min_lat, max_lat, min_lon, max_lon) containing every kept point
+        point_mask: Function from an N x 2 array to a boolean keep mask
+        box_is_exact: True if point_mask keeps exactly the points inside box
+        activity_bounds: calculate_activity_bounds(gps_data) if the caller
+            already has it
+        
+    Returns:
+        {activity_id: kept points} for activities with any, as slices of
+        one shared array
+    """
+    arrays = [points.reshape(-1, 2) for points in gps_data.values()]
+    boxes = activity_bounds if activity_bounds is not None else calculate_activity_bounds(gps_data)
+    min_lat, max_lat, min_lon, max_lon = box
+    
+    # NaN boxes (no points) compare False and drop out
+    overlaps = ((boxes[:, 1] >= min_lat) & (boxes[:, 0] <= max_lat) &
+                (boxes[:, 3] >= min_lon) & (boxes[:, 2] <= max_lon))
+    candidates = np.flatnonzero(overlaps)
+    if not len(candidates):
+        return {}
+    
+    coords = np.concatenate([arrays[i] for i in candidates.tolist()])
+    offsets = np.zeros(len(candidates) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter((len(arrays[i]) for i in candidates.tolist()), dtype=np.int64,
+                          count=len(candidates)), out=offsets[1:])
+    
+    straddling = np.ones(len(candidates), dtype=bool)
+    if box_is_exact:
+        candidate_boxes = boxes[candidates]
+        straddling = ~((candidate_boxes[:, 0] >= min_lat) & (candidate_boxes[:, 1] <= max_lat) &
+                       (candidate_boxes[:, 2] >= min_lon) & (candidate_boxes[:, 3] <= max_lon))
+    
+    mask = np.ones(len(coords), dtype=bool)
+    if straddling.any():
+        rows = np.repeat(straddling, np.diff(offsets))
+        mask[rows] = point_mask(coords[rows])
+    kept = coords[mask]
+    
+    # Position of each candidate's first kept point within kept
+    kept_before = np.zeros(len(mask) + 1, dtype=np.int64)
+    np.cumsum(mask, out=kept_before[1:])
+    kept_offsets = kept_before[offsets].tolist()
+    
+    keys = list(gps_data.keys())
+    return {keys[i]: kept[kept_offsets[j]:kept_offsets[j + 1]]
+            for j, i in enumerate(candidates.tolist())
+            if kept_offsets[j + 1] > kept_offsets[j]}
 
 
 def filter_gps_data_by_bounds(gps_data: Dict[str, List[List[float]]], 
                              min_lat: float, max_lat: float,
-                             min_lon: float, max_lon: float) -> Dict[str, List[List[float]]]:
+                             min_lon: float, max_lon: float,
+                             activity_bounds: Optional["np.ndarray"] = None) -> Dict[str, List[List[float]]]:
     """
     Filter GPS data to only include points within bounds
     
+    Array-backed data is filtered through the per-activity bounding box
+    index, so repeated queries only test points near the box edges.
+    
     Args:
         gps_data: GPS data dictionary
         min_lat, max_lat, min_lon, max_lon: Bounding box
+        activity_bounds: calculate_activity_bounds(gps_data) for array-backed
+            data, if the caller already has it
         
     Returns:
         Filtered GPS data dictionary
     """
+    if (NUMPY_AVAILABLE and gps_data and
+            all(isinstance(points, np.ndarray) and points.size % 2 == 0
+                for points in gps_data.values())):
+        def inside(points):
+            lat, lon = points[:, 0], points[:, 1]
+            return (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        return _filter_arrays_by_box(gps_data, (min_lat, max_lat, min_lon, max_lon), inside, True,
+                                     activity_bounds)
+    
     filtered_data = {}
     
     for activity_id, points in gps_data.items():
@@ -137,7 +548,8 @@ def filter_gps_data_by_bounds(gps_data: Dict[str, List[List[float]]],
 
 def calculate_heatmap_resolution(gps_data: Dict[str, List[List[float]]], 
                                target_width: int = 1200, 
-                               target_height: int = 800) -> Tuple[int, int, float]:
+                               target_height: int = 800,
+                               bounds: Optional[Tuple[float, float, float, float]] = None) -> Tuple[int, int, float]:
     """
     Calculate optimal heatmap resolution based on GPS data density
     
@@ -145,6 +557,7 @@ def calculate_heatmap_resolution(gps_data: Dict[str, List[List[float]]],
         gps_data: GPS data dictionary
         target_width: Target SVG width in pixels
         target_height: Target SVG height in pixels
+        bounds: calculate_gps_bounds(gps_data) if the caller already has it
         
     Returns:
         Tuple of (grid_width, grid_height, points_per_pixel)
@@ -152,7 +565,7 @@ def calculate_heatmap_resolution(gps_data: Dict[str, List[List[float]]],
     if not gps_data:
         return target_width // 4, target_height // 4, 0.0
     
-    min_lat, max_lat, min_lon, max_lon = calculate_gps_bounds(gps_data)
+    min_lat, max_lat, min_lon, max_lon = bounds or calculate_gps_bounds(gps_data)
     total_points = count_total_gps_points(gps_data)
     
     # Calculate geographic span
@@ -185,12 +598,14 @@ def calculate_heatmap_resolution(gps_data: Dict[str, List[List[float]]],
     return grid_width, grid_height, points_per_pixel
 
 
-def format_gps_summary(gps_data: Dict[str, List[List[float]]]) -> str:
+def format_gps_summary(gps_data: Dict[str, List[List[float]]],
+                       bounds: Optional[Tuple[float, float, float, float]] = None) -> str:
     """
     Format GPS data summary for display
     
     Args:
         gps_data: GPS data dictionary
+        bounds: calculate_gps_bounds(gps_data) if the caller already has it
         
     Returns:
         Formatted summary string
@@ -200,7 +615,7 @@ def format_gps_summary(gps_data: Dict[str, List[List[float]]]) -> str:
     
     activity_count = len(gps_data)
     total_points = count_total_gps_points(gps_data)
-    min_lat, max_lat, min_lon, max_lon = calculate_gps_bounds(gps_data)
+    min_lat, max_lat, min_lon, max_lon = bounds or calculate_gps_bounds(gps_data)
     
     lat_span = max_lat - min_lat
     lon_span = max_lon - min_lon
@@ -312,13 +727,151 @@ def validate_heatmap_config(config: Dict[str, Any]) -> Tuple[bool, List[str]]:
     return len(issues) == 0, issues
 
 
-def filter_gps_data_by_region(gps_data: Dict[int, Dict], region: str) -> Dict[int, Dict]:
+def _region_mask(points: "np.ndarray", region: str) -> "np.ndarray":
+    """
+    Vectorized region membership test
+    
+    Args:
+        points: N x 2 array of (lat, lon)
+        region: Region name as accepted by filter_gps_data_by_region
+        
+    Returns:
+        Boolean array, True for points inside the region
+    """
+    lat, lon = points[:, 0], points[:, 1]
+    if region == 'japan':
+        return (lat >= 24) & (lat <= 46) & (lon >= 123) & (lon <= 146)
+    elif region == 'usa':
+        return (lat >= 24) & (lat <= 72) & (lon >= -180) & (lon <= -66)
+    elif region == 'minnesota':
+        return (lat >= 43.5) & (lat <= 49.4) & (lon >= -97.2) & (lon <= -89.5)
+    elif region == 'saint_paul_100km':
+        # Haversine distance to Saint Paul (44.9537, -93.0900)
+        # float64 so points near the 100 km edge agree with the scalar path
+        lat_r = np.radians(lat, dtype=np.float64)
+        lon_r = np.radians(lon, dtype=np.float64)
+        lat0, lon0 = math.radians(44.9537), math.radians(-93.0900)
+        a = (np.sin((lat_r - lat0) / 2) ** 2 +
+             math.cos(lat0) * np.cos(lat_r) * np.sin((lon_r - lon0) / 2) ** 2)
+        return 2 * 6371 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)) <= 100
+    return np.zeros(len(points), dtype=bool)
+
+
+def _region_box(region: str) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Bounding box (min_lat, max_lat, min_lon, max_lon) containing a region
+    
+    Exact for the rectangular regions; for saint_paul_100km a padded box
+    around the 100 km circle (0.9 degrees of latitude, under 1.3 of
+    longitude at its northern edge).
+    
+    Args:
+        region: Region name as accepted by filter_gps_data_by_region
+        
+    Returns:
+        The box, or None for unknown regions
+    """
+    if region == 'japan':
+        return (24, 46, 123, 146)
+    elif region == 'usa':
+        return (24, 72, -180, -66)
+    elif region == 'minnesota':
+        return (43.5, 49.4, -97.2, -89.5)
+    elif region == 'saint_paul_100km':
+        return (44.9537 - 1.0, 44.9537 + 1.0, -93.0900 - 1.5, -93.0900 + 1.5)
+    return None
+
+
+def _filter_arrays_by_region(gps_data: Dict[Any, "np.ndarray"], region: str,
+                             activity_bounds: Optional["np.ndarray"] = None) -> Dict[Any, "np.ndarray"]:
+    """
+    Region-filter array-backed GPS data with the per-activity bounding box index
+    
+    Args:
+        gps_data: {activity_id: N x 2 array of (lat, lon)}
+        region: Region name
+        activity_bounds: calculate_activity_bounds(gps_data) if the caller
+            already has it
+        
+    Returns:
+        {activity_id: points inside the region} for activities with any
+    """
+    box = _region_box(region)
+    if box is None:
+        return {}
+    
+    return _filter_arrays_by_box(gps_data, box, lambda points: _region_mask(points, region),
+                                 box_is_exact=region != 'saint_paul_100km', activity_bounds=activity_bounds)
+
+
+def _filter_lists_by_region(gps_data: Dict[Any, Any], region: str) -> Optional[Dict[Any, Any]]:
+    """
+    Region-filter list-based GPS data with a single mask over all points
+    
+    Args:
+        gps_data: {activity_id: [[lat, lon, ...], ...]} or
+            {activity_id: {'gps_points': [[lat, lon, ...], ...], ...}}
+        region: Region name
+        
+    Returns:
+        Filtered data in the input's structure (kept points are the
+        original point lists), or None if some activity's points are not a
+        rectangular numeric table
+    """
+    entries = []
+    for activity_id, gps_points in gps_data.items():
+        if isinstance(gps_points, list):
+            points_list = gps_points
+        elif isinstance(gps_points, dict) and 'gps_points' in gps_points:
+            points_list = gps_points['gps_points']
+        else:
+            continue
+        if not points_list:
+            continue
+        
+        try:
+            coords = np.asarray(points_list, dtype=np.float64)
+        except (ValueError, TypeError):
+            return None
+        if coords.ndim != 2 or coords.shape[1] < 2:
+            return None
+        entries.append((activity_id, gps_points, points_list, coords[:, :2]))
+    
+    if not entries:
+        return {}
+    
+    keep = _region_mask(np.concatenate([entry[3] for entry in entries]), region).tolist()
+    
+    filtered_data = {}
+    start = 0
+    for activity_id, gps_points, points_list, coords in entries:
+        end = start + len(coords)
+        filtered_points = list(compress(points_list, keep[start:end]))
+        start = end
+        
+        # Include activity only if it has GPS points in the region,
+        # keeping the same data structure as the input
+        if filtered_points:
+            if isinstance(gps_points, list):
+                filtered_data[activity_id] = filtered_points
+            else:
+                filtered_activity = gps_points.copy()
+                filtered_activity['gps_points'] = filtered_points
+                filtered_data[activity_id] = filtered_activity
+    
+    return filtered_data
+
+
+def filter_gps_data_by_region(gps_data: Dict[int, Dict], region: str,
+                              activity_bounds: Optional["np.ndarray"] = None) -> Dict[int, Dict]:
     """
     Filter GPS data by geographic region
     
     Args:
         gps_data: Dictionary with activity IDs as keys and activity data as values
         region: Region filter ('japan', 'usa', 'minnesota', 'saint_paul_100km', or 'all')
+        activity_bounds: calculate_activity_bounds(gps_data) for array-backed
+            data, if the caller already has it
     
     Returns:
         Filtered GPS data dictionary
@@ -326,7 +879,20 @@ def filter_gps_data_by_region(gps_data: Dict[int, Dict], region: str) -> Dict[in
     if region == 'all':
         return gps_data
     
-    import math
+    # Array-backed data (see StravaFileManager.load_gps_data_file) is
+    # filtered in one vectorized pass
+    if (NUMPY_AVAILABLE and gps_data and
+            all(isinstance(points, np.ndarray) and points.size % 2 == 0
+                for points in gps_data.values())):
+        return _filter_arrays_by_region(gps_data, region, activity_bounds)
+    
+    # Nested lists are stacked into one array and masked the same way when
+    # the test is the per-point haversine; for the plain bounding box
+    # regions converting the lists costs as much as the loop below
+    if NUMPY_AVAILABLE and region == 'saint_paul_100km':
+        filtered_data = _filter_lists_by_region(gps_data, region)
+        if filtered_data is not None:
+            return filtered_data
     
     def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance between two points in km using Haversine formula"""
@@ -360,6 +926,14 @@ def filter_gps_data_by_region(gps_data: Dict[int, Dict], region: str) -> Dict[in
     filtered_data = {}
     
     for activity_id, gps_points in gps_data.items():
+        # Array-backed activities are filtered with one boolean mask
+        if NUMPY_AVAILABLE and isinstance(gps_points, np.ndarray):
+            if gps_points.ndim == 2 and gps_points.shape[1] >= 2:
+                filtered_points = gps_points[_region_mask(gps_points, region)]
+                if len(filtered_points):
+                    filtered_data[activity_id] = filtered_points
+            continue
+        
         # Handle both consolidated format (activity_id -> [gps_points]) 
         # and individual format (activity_id -> {gps_points: [...]})
         if isinstance(gps_points, list):
@@ -403,6 +977,33 @@ def filter_gps_data_by_region(gps_data: Dict[int, Dict], region: str) -> Dict[in
     return filtered_data
 
 
+def apply_region(gps_data: Dict[Any, Any], region: str, verbose: bool = True,
+                 activity_bounds: Optional["np.ndarray"] = None) -> Dict[Any, Any]:
+    """
+    Apply the --region option to loaded GPS data
+    
+    Args:
+        gps_data: Dictionary with activity IDs as keys and GPS points as values
+        region: Region name ('all' leaves the data untouched)
+        verbose: Print the filtering progress
+        activity_bounds: calculate_activity_bounds(gps_data) for array-backed
+            data, shared by the regions of one run
+    
+    Returns:
+        GPS data restricted to the region (the same object for 'all';
+        empty when no activity has points in the region)
+    """
+    if region == 'all':
+        return gps_data
+    
+    if verbose:
+        print(f"\n🌏 Filtering GPS data for region: {region}...")
+    filtered_data = filter_gps_data_by_region(gps_data, region, activity_bounds)
+    if filtered_data and verbose:
+        print(f"  Filtered from {len(gps_data)} to {len(filtered_data)} activities")
+    return filtered_data
+
+
 def create_cache_directory(cache_dir: str) -> str:
     """
     Create cache directory if it doesn't exist
@@ -1,20 +1,96 @@
 import requests
-import json
-from typing import List, Dict, Tuple, Any
+import pickle
+import hashlib
+from typing import List, Dict, Tuple, Any, Optional
 import os
+import numpy as np
+from strava_files import parse_json, read_json, write_json
+try:
+    from rtree import index as rtree_index
+    RTREE_AVAILABLE = True
+except ImportError:
+    RTREE_AVAILABLE = False
+
+
+# Cached source GeoJSON file of each boundary layer
+BOUNDARY_SOURCE_FILES = {
+    'world': "world_boundaries.json",
+    'us_states': "us_states.json",
+    'japan_prefectures': "japan_prefectures.json",
+    'minnesota_cities': "minnesota_cities.json",
+    'lakes': "lakes.json",
+}
+
+# Rough (min_lat, min_lon, max_lat, max_lon) of the regions with their own
+# boundary layers; rows line up with REGION_NAMES
+REGION_NAMES = ('japan', 'usa', 'minnesota')
+REGION_BOUNDS = np.array([
+    [24.0, 123.0, 46.0, 146.0],     # Japan: 24-46N, 123-146E
+    [24.0, -180.0, 72.0, -66.0],    # USA: 24-72N, -180 to -66W
+    [43.5, -97.2, 49.4, -89.5],     # Minnesota: 43.5-49.4N, -97.2 to -89.5W
+])
+
+# Bump when the layout of get_detailed_boundaries results changes
+BOUNDARY_CACHE_VERSION = 2
 
 
 class MapDataProvider:
-    def __init__(self, cache_dir: str = "map_cache"):
+    def __init__(self, cache_dir: str = "map_cache", verbose: bool = True):
         self.cache_dir = cache_dir
+        # Progress lines are skipped when False; warnings always print
+        self.verbose = verbose
         os.makedirs(cache_dir, exist_ok=True)
+        # Feature bounding box indexes keyed by id() of the GeoJSON dict
+        self._spatial_indexes: Dict[int, Tuple[Dict[str, Any], Any, np.ndarray]] = {}
+        # Extracted boundary paths keyed by (dataset, bounds)
+        self._paths_cache: Dict[Tuple[str, Tuple[float, float, float, float]], List] = {}
+        # Names of the REGION_BOUNDS rows intersecting each bounds
+        self._region_flags: Dict[Tuple[float, float, float, float], frozenset] = {}
+    
+    def _log(self, message: str) -> None:
+        """Print a progress message when verbose"""
+        if self.verbose:
+            print(message)
+    
+    def _load_cache_file(self, cache_file: str) -> Dict[str, Any]:
+        """
+        Load a cached GeoJSON file through its pickled sidecar
+        
+        The first load parses the JSON and writes ``<name>.pkl`` next to it;
+        later runs unpickle that instead of parsing the JSON again, as long
+        as it is not older than the JSON file.
+        
+        Args:
+            cache_file: Path to the cached GeoJSON file
+            
+        Returns:
+            Parsed GeoJSON data
+        """
+        pickle_file = os.path.splitext(cache_file)[0] + ".pkl"
+        try:
+            if os.stat(pickle_file).st_mtime_ns >= os.stat(cache_file).st_mtime_ns:
+                with open(pickle_file, 'rb') as f:
+                    return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass
+        
+        data = read_json(cache_file)
+        
+        try:
+            tmp_file = f"{pickle_file}.tmp"
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, pickle_file)
+        except OSError as e:
+            print(f"    Warning: could not write {pickle_file}: {e}")
+        
+        return data
         
     def get_world_boundaries(self) -> Dict[str, Any]:
         cache_file = os.path.join(self.cache_dir, "world_boundaries.json")
         
         if os.path.exists(cache_file):
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._load_cache_file(cache_file)
         
         # Use Natural Earth data for world boundaries
         url = "https://raw.githubusercontent.com/holtzy/D3-graph-gallery/master/DATA/world.geojson"
@@ -22,10 +98,9 @@ class MapDataProvider:
         try:
             response = requests.get(url, timeout=30)
             response.raise_for_status()
-            data = response.json()
+            data = parse_json(response.content)
             
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f)
+            write_json(cache_file, data, indent=False)
             
             return data
         except Exception as e:
@@ -36,8 +111,7 @@ class MapDataProvider:
         cache_file = os.path.join(self.cache_dir, "us_states.json")
         
         if os.path.exists(cache_file):
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._load_cache_file(cache_file)
         
         # Use Natural Earth data for US states
         url = "https://raw.githubusercontent.com/PublicaMundi/MappingAPI/master/data/geojson/us-states.json"
@@ -45,10 +119,9 @@ class MapDataProvider:
         try:
             response = requests.get(url, timeout=30)
             response.raise_for_status()
-            data = response.json()
+            data = parse_json(response.content)
             
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f)
+            write_json(cache_file, data, indent=False)
             
             return data
         except Exception as e:
@@ -59,8 +132,7 @@ class MapDataProvider:
         cache_file = os.path.join(self.cache_dir, "japan_prefectures.json")
         
         if os.path.exists(cache_file):
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._load_cache_file(cache_file)
         
         # Use Japan prefecture boundaries
         url = "https://raw.githubusercontent.com/dataofjapan/land/master/japan.geojson"
@@ -68,10 +140,9 @@ class MapDataProvider:
         try:
             response = requests.get(url, timeout=30)
             response.raise_for_status()
-            data = response.json()
+            data = parse_json(response.content)
             
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f)
+            write_json(cache_file, data, indent=False)
             
             return data
         except Exception as e:
@@ -82,12 +153,11 @@ class MapDataProvider:
         cache_file = os.path.join(self.cache_dir, "minnesota_cities.json")
         
         if os.path.exists(cache_file):
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._load_cache_file(cache_file)
         
         # Use simple Minnesota city placeholders (Twin Cities area)
         # Create a basic set of major Minnesota cities as polygons
-        print("    Creating Minnesota Twin Cities area boundaries...")
+        self._log("    Creating Minnesota Twin Cities area boundaries...")
         
         # Major Twin Cities metro area cities with approximate boundaries
         cities = [
@@ -142,18 +212,16 @@ class MapDataProvider:
             "features": cities
         }
         
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f)
+        write_json(cache_file, data, indent=False)
         
-        print(f"    Created {len(cities)} Twin Cities area boundaries")
+        self._log(f"    Created {len(cities)} Twin Cities area boundaries")
         return data
 
     def get_lakes_data(self) -> Dict[str, Any]:
         cache_file = os.path.join(self.cache_dir, "lakes.json")
         
         if os.path.exists(cache_file):
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._load_cache_file(cache_file)
         
         # Use Natural Earth lakes data
         url = "https://raw.githubusercontent.com/nvkelso/natural-earth-vector/master/geojson/ne_50m_lakes.geojson"
@@ -161,10 +229,9 @@ class MapDataProvider:
         try:
             response = requests.get(url, timeout=30)
             response.raise_for_status()
-            data = response.json()
+            data = parse_json(response.content)
             
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f)
+            write_json(cache_file, data, indent=False)
             
             return data
         except Exception as e:
@@ -173,19 +240,115 @@ class MapDataProvider:
     
     def filter_boundaries_by_bounds(self, geojson_data: Dict[str, Any], 
                                   bounds: Tuple[float, float, float, float]) -> Dict[str, Any]:
-        min_lat, min_lon, max_lat, max_lon = bounds
+        features = geojson_data.get("features", [])
         filtered_features = []
+        min_lat, min_lon, max_lat, max_lon = bounds
         
-        for feature in geojson_data.get("features", []):
-            geometry = feature.get("geometry", {})
-            if self._geometry_intersects_bounds(geometry, bounds):
-                filtered_features.append(feature)
+        # Only features whose bounding box overlaps the view are candidates,
+        # and one whose bounding box lies inside the view has every vertex
+        # inside it, so only the rest need the vertex check
+        candidates = self._candidate_feature_indices(geojson_data, bounds)
+        bboxes = self._get_spatial_index(geojson_data)[1][candidates]
+        contained = ((bboxes[:, 0] >= min_lon) & (bboxes[:, 2] <= max_lon) &
+                     (bboxes[:, 1] >= min_lat) & (bboxes[:, 3] <= max_lat))
+        for i, inside in zip(candidates, contained.tolist()):
+            if inside or self._geometry_intersects_bounds(features[i].get("geometry", {}), bounds):
+                filtered_features.append(features[i])
         
         return {
             "type": "FeatureCollection",
             "features": filtered_features
         }
     
+    def _candidate_feature_indices(self, geojson_data: Dict[str, Any],
+                                   bounds: Tuple[float, float, float, float]) -> List[int]:
+        """
+        Find features whose bounding box intersects bounds
+        
+        Uses an R-tree when rtree is installed, otherwise a vectorized test
+        against an array of feature bounding boxes. Either is built once per
+        dataset and reused for later queries.
+        
+        Args:
+            geojson_data: GeoJSON FeatureCollection
+            bounds: (min_lat, min_lon, max_lat, max_lon)
+            
+        Returns:
+            Sorted indices into geojson_data["features"]
+        """
+        min_lat, min_lon, max_lat, max_lon = bounds
+        spatial_index, bboxes = self._get_spatial_index(geojson_data)
+        
+        if RTREE_AVAILABLE:
+            if spatial_index is None:
+                return []
+            return sorted(spatial_index.intersection((min_lon, min_lat, max_lon, max_lat)))
+        
+        # NaN rows (features without coordinates) never compare true
+        overlaps = ((bboxes[:, 0] <= max_lon) & (bboxes[:, 2] >= min_lon) &
+                    (bboxes[:, 1] <= max_lat) & (bboxes[:, 3] >= min_lat))
+        return np.flatnonzero(overlaps).tolist()
+    
+    def _get_spatial_index(self, geojson_data: Dict[str, Any]) -> Tuple[Any, np.ndarray]:
+        """
+        Build or reuse the bounding box index for a GeoJSON dataset
+        
+        Returns:
+            Tuple of (R-tree or None without rtree, N x 4 array of feature
+            bounding boxes as min_lon, min_lat, max_lon, max_lat with NaN
+            rows for features without coordinates)
+        """
+        cached = self._spatial_indexes.get(id(geojson_data))
+        if cached is not None and cached[0] is geojson_data:
+            return cached[1], cached[2]
+        
+        features = geojson_data.get("features", [])
+        bboxes = np.full((len(features), 4), np.nan)
+        for i, feature in enumerate(features):
+            bbox = self._geometry_bbox(feature.get("geometry") or {})
+            if bbox is not None:
+                bboxes[i] = bbox
+        
+        if RTREE_AVAILABLE:
+            entries = [(i, tuple(bbox), None) for i, bbox in enumerate(bboxes.tolist())
+                       if bbox[0] == bbox[0]]
+            # Bulk loading from a stream packs the tree better than repeated inserts
+            spatial_index = rtree_index.Index(iter(entries)) if entries else None
+        else:
+            spatial_index = None
+        
+        # Keep a reference to the data so its id() cannot be reused
+        self._spatial_indexes[id(geojson_data)] = (geojson_data, spatial_index, bboxes)
+        return spatial_index, bboxes
+    
+    def _geometry_bbox(self, geometry: Dict[str, Any]) -> Optional[Tuple[float, float, float, float]]:
+        """Bounding box of a GeoJSON geometry as (min_lon, min_lat, max_lon, max_lat)"""
+        geom_type = geometry.get("type", "")
+        coordinates = geometry.get("coordinates", [])
+        
+        if not coordinates:
+            return None
+        
+        if geom_type == "Point":
+            rings = [[coordinates]]
+        elif geom_type in ["LineString", "MultiPoint"]:
+            rings = [coordinates]
+        elif geom_type in ["Polygon", "MultiLineString"]:
+            rings = coordinates
+        elif geom_type == "MultiPolygon":
+            rings = [ring for polygon in coordinates for ring in polygon]
+        else:
+            return None
+        
+        arrays = [np.asarray(ring, dtype=np.float64)[:, :2] for ring in rings if len(ring)]
+        if not arrays:
+            return None
+        
+        positions = np.concatenate(arrays)
+        min_lon, min_lat = positions.min(axis=0).tolist()
+        max_lon, max_lat = positions.max(axis=0).tolist()
+        return min_lon, min_lat, max_lon, max_lat
+    
     def _geometry_intersects_bounds(self, geometry: Dict[str, Any], 
                                   bounds: Tuple[float, float, float, float]) -> bool:
         min_lat, min_lon, max_lat, max_lon = bounds
@@ -251,24 +414,56 @@ class MapDataProvider:
 
     def is_japan_region(self, bounds: Tuple[float, float, float, float]) -> bool:
         """Check if bounds intersect with Japan"""
-        min_lat, min_lon, max_lat, max_lon = bounds
-        # Japan rough bounds: 24-46N, 123-146E
-        japan_bounds = (24, 123, 46, 146)
-        return self._bounds_intersect(bounds, japan_bounds)
+        return 'japan' in self.regions_for(bounds)
 
     def is_usa_region(self, bounds: Tuple[float, float, float, float]) -> bool:
         """Check if bounds intersect with USA"""
-        min_lat, min_lon, max_lat, max_lon = bounds
-        # USA rough bounds: 24-72N, -180 to -66W
-        usa_bounds = (24, -180, 72, -66)
-        return self._bounds_intersect(bounds, usa_bounds)
+        return 'usa' in self.regions_for(bounds)
 
     def is_minnesota_region(self, bounds: Tuple[float, float, float, float]) -> bool:
         """Check if bounds intersect with Minnesota"""
-        min_lat, min_lon, max_lat, max_lon = bounds
-        # Minnesota rough bounds: 43.5-49.4N, -97.2 to -89.5W
-        mn_bounds = (43.5, -97.2, 49.4, -89.5)
-        return self._bounds_intersect(bounds, mn_bounds)
+        return 'minnesota' in self.regions_for(bounds)
+
+    def regions_for(self, bounds: Tuple[float, float, float, float]) -> frozenset:
+        """
+        Names of the REGION_BOUNDS regions that bounds intersect
+        
+        Every region is tested in one vectorized comparison against the
+        table, computed once per bounds.
+        
+        Args:
+            bounds: (min_lat, min_lon, max_lat, max_lon)
+            
+        Returns:
+            Frozenset of REGION_NAMES entries
+        """
+        key = tuple(bounds)
+        if key not in self._region_flags:
+            min_lat, min_lon, max_lat, max_lon = key
+            # Same test as _bounds_intersect, against every row at once
+            hit = ~((max_lat < REGION_BOUNDS[:, 0]) | (min_lat > REGION_BOUNDS[:, 2]) |
+                    (max_lon < REGION_BOUNDS[:, 1]) | (min_lon > REGION_BOUNDS[:, 3]))
+            self._region_flags[key] = frozenset(name for name, inside in zip(REGION_NAMES, hit.tolist())
+                                                if inside)
+        return self._region_flags[key]
+
+    def classify_region(self, bounds: Tuple[float, float, float, float]) -> str:
+        """
+        Classify bounds by the detailed boundary set that covers them
+        
+        Args:
+            bounds: (min_lat, min_lon, max_lat, max_lon)
+            
+        Returns:
+            'japan' or 'usa' if the bounds intersect that country (Japan
+            wins when both do), otherwise 'other'
+        """
+        regions = self.regions_for(bounds)
+        if 'japan' in regions:
+            return 'japan'
+        if 'usa' in regions:
+            return 'usa'
+        return 'other'
 
     def _bounds_intersect(self, bounds1: Tuple[float, float, float, float], 
                          bounds2: Tuple[float, float, float, float]) -> bool:
@@ -279,63 +474,152 @@ class MapDataProvider:
         return not (max_lat1 < min_lat2 or min_lat1 > max_lat2 or 
                    max_lon1 < min_lon2 or min_lon1 > max_lon2)
 
+    def _filtered_boundary_paths(self, name: str, loader: Any,
+                                 bounds: Tuple[float, float, float, float]) -> List[List[Tuple[float, float]]]:
+        """
+        Boundary paths of one dataset within bounds, computed once per bounds
+        
+        Args:
+            name: Dataset name used as cache key
+            loader: Method returning the dataset's GeoJSON
+            bounds: (min_lat, min_lon, max_lat, max_lon)
+            
+        Returns:
+            List of paths as float32 N x 2 arrays of (lat, lon)
+        """
+        key = (name, tuple(bounds))
+        if key not in self._paths_cache:
+            filtered = self.filter_boundaries_by_bounds(loader(), bounds)
+            # float32 keeps ~1 m precision at half the memory and pickle size;
+            # the renderer projects in float64
+            self._paths_cache[key] = [np.asarray(path, dtype=np.float32)
+                                      for path in self.get_boundary_paths(filtered)]
+        return self._paths_cache[key]
+
     def get_detailed_boundaries(self, bounds: Tuple[float, float, float, float]) -> Dict[str, List[List[Tuple[float, float]]]]:
-        """Get all relevant boundary data based on geographic region"""
+        """
+        Get all relevant boundary data based on geographic region
+        
+        The result is pickled to ``boundaries_<key>.pkl`` in the cache
+        directory, keyed by the bounds and the modification times of the
+        source GeoJSON files, so a later run over the same bounds skips
+        loading and filtering the boundary files. Results with a failed
+        download or load are not cached, so they are retried next run.
+        
+        Args:
+            bounds: (min_lat, min_lon, max_lat, max_lon)
+            
+        Returns:
+            {layer name: list of paths as float32 N x 2 arrays of (lat, lon)}
+        """
+        cache_file = self._boundary_cache_file(bounds)
+        try:
+            with open(cache_file, 'rb') as f:
+                boundary_data = pickle.load(f)
+            self._log(f"  Using cached boundaries from {cache_file}")
+            return boundary_data
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass
+        
+        boundary_data, complete = self._load_detailed_boundaries(bounds)
+        if complete:
+            # Downloads during the load change the key, so compute it again
+            cache_file = self._boundary_cache_file(bounds)
+            try:
+                tmp_file = f"{cache_file}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    pickle.dump(boundary_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                print(f"    Warning: could not write {cache_file}: {e}")
+        
+        return boundary_data
+    
+    def _boundary_cache_file(self, bounds: Tuple[float, float, float, float]) -> str:
+        """Path of the get_detailed_boundaries cache for bounds and the current source files"""
+        stamps = []
+        for name in BOUNDARY_SOURCE_FILES.values():
+            try:
+                stamps.append(os.stat(os.path.join(self.cache_dir, name)).st_mtime_ns)
+            except OSError:
+                stamps.append(None)
+        
+        key = hashlib.blake2b(
+            repr((BOUNDARY_CACHE_VERSION, tuple(map(float, bounds)), stamps)).encode(),
+            digest_size=16
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"boundaries_{key}.pkl")
+    
+    def _load_detailed_boundaries(self, bounds: Tuple[float, float, float, float]) -> Tuple[Dict[str, List], bool]:
+        """
+        Load and filter the boundary layers relevant to bounds
+        
+        Returns:
+            Tuple of (boundary data, whether every layer loaded from its
+            source file without errors)
+        """
         boundary_data = {}
+        layers = []
+        complete = True
+        regions = self.regions_for(bounds)
+        in_japan, in_usa = 'japan' in regions, 'usa' in regions
         
         # World boundaries (load only if not in Japan/USA regions with detailed boundaries)
-        load_world = not (self.is_japan_region(bounds) or self.is_usa_region(bounds))
+        load_world = not (in_japan or in_usa)
         if load_world:
-            print("  Loading world boundaries...")
-            world_data = self.get_world_boundaries()
-            filtered_world = self.filter_boundaries_by_bounds(world_data, bounds)
-            boundary_data['world'] = self.get_boundary_paths(filtered_world)
+            self._log("  Loading world boundaries...")
+            layers.append('world')
+            boundary_data['world'] = self._filtered_boundary_paths('world', self.get_world_boundaries, bounds)
         else:
-            print("  Skipping world boundaries (loading detailed regional boundaries instead)...")
+            self._log("  Skipping world boundaries (loading detailed regional boundaries instead)...")
             boundary_data['world'] = []
         
         # Japan-specific boundaries
-        if self.is_japan_region(bounds):
-            print("  Loading Japan prefecture boundaries...")
+        if in_japan:
+            self._log("  Loading Japan prefecture boundaries...")
+            layers.append('japan_prefectures')
             try:
-                japan_data = self.get_japan_prefectures()
-                filtered_japan = self.filter_boundaries_by_bounds(japan_data, bounds)
-                boundary_data['japan_prefectures'] = self.get_boundary_paths(filtered_japan)
+                boundary_data['japan_prefectures'] = self._filtered_boundary_paths('japan_prefectures', self.get_japan_prefectures, bounds)
             except Exception as e:
                 print(f"  Warning: Failed to load Japan boundaries: {e}")
+                complete = False
                 boundary_data['japan_prefectures'] = []
         
         # USA-specific boundaries
-        if self.is_usa_region(bounds):
-            print("  Loading US state boundaries...")
+        if in_usa:
+            self._log("  Loading US state boundaries...")
+            layers.append('us_states')
             try:
-                us_data = self.get_us_states()
-                filtered_us = self.filter_boundaries_by_bounds(us_data, bounds)
-                boundary_data['us_states'] = self.get_boundary_paths(filtered_us)
+                boundary_data['us_states'] = self._filtered_boundary_paths('us_states', self.get_us_states, bounds)
             except Exception as e:
                 print(f"  Warning: Failed to load US state boundaries: {e}")
+                complete = False
                 boundary_data['us_states'] = []
             
             # Minnesota cities if in Minnesota region
-            if self.is_minnesota_region(bounds):
-                print("  Loading Minnesota city boundaries...")
+            if 'minnesota' in regions:
+                self._log("  Loading Minnesota city boundaries...")
+                layers.append('minnesota_cities')
                 try:
-                    mn_data = self.get_minnesota_cities()
-                    filtered_mn = self.filter_boundaries_by_bounds(mn_data, bounds)
-                    boundary_data['minnesota_cities'] = self.get_boundary_paths(filtered_mn)
+                    boundary_data['minnesota_cities'] = self._filtered_boundary_paths('minnesota_cities', self.get_minnesota_cities, bounds)
                 except Exception as e:
                     print(f"  Warning: Failed to load Minnesota cities: {e}")
+                    complete = False
                     boundary_data['minnesota_cities'] = []
         
         # Lakes (for both Japan and USA)
-        if self.is_japan_region(bounds) or self.is_usa_region(bounds):
-            print("  Loading lakes and water bodies...")
+        if in_japan or in_usa:
+            self._log("  Loading lakes and water bodies...")
+            layers.append('lakes')
             try:
-                lakes_data = self.get_lakes_data()
-                filtered_lakes = self.filter_boundaries_by_bounds(lakes_data, bounds)
-                boundary_data['lakes'] = self.get_boundary_paths(filtered_lakes)
+                boundary_data['lakes'] = self._filtered_boundary_paths('lakes', self.get_lakes_data, bounds)
             except Exception as e:
                 print(f"  Warning: Failed to load lakes data: {e}")
+                complete = False
                 boundary_data['lakes'] = []
         
-        return boundary_data
\ No newline at end of file
+        # A failed download leaves the source file missing
+        complete = complete and all(
+            os.path.exists(os.path.join(self.cache_dir, BOUNDARY_SOURCE_FILES[layer])) for layer in layers
+        )
+        return boundary_data, complete
\ No newline at end of file
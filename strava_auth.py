@@ -9,23 +9,57 @@ Eliminates duplication of authentication code across scripts.
 
 import time
 import requests
-from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, Tuple
-from strava_client import StravaClient
+from strava_client import StravaClient, create_session, seconds_until_rate_limit_reset
 from strava_config import StravaConfig
 
 
+def probe_rate_limit(session: requests.Session, access_token: str) -> Tuple[bool, int]:
+    """
+    Check current rate limit status with an athlete request
+    
+    Args:
+        session: Session to send the request on
+        access_token: Access token to check
+        
+    Returns:
+        Tuple of (can_proceed, wait_seconds)
+    """
+    headers = {'Authorization': f'Bearer {access_token}'}
+    
+    try:
+        response = session.get('https://www.strava.com/api/v3/athlete', headers=headers)
+        
+        if response.status_code == 200:
+            return True, 0
+        elif response.status_code == 429:
+            # Rate limit exceeded, wait for the next 15-minute window
+            return False, seconds_until_rate_limit_reset()
+        elif response.status_code == 401:
+            raise Exception("Invalid or expired access token. Please refresh your tokens.")
+        else:
+            response.raise_for_status()
+            
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Failed to check rate limit status: {e}")
+
+
 class StravaAuthenticator:
     """Handles Strava authentication and client creation"""
     
     def __init__(self, config_file: str = "config.json"):
         self.config_manager = StravaConfig(config_file)
         self.config = self.config_manager.load()
+        # Shared with created clients so the rate limit check's connection is reused
+        self.session = create_session()
     
-    def create_client(self) -> StravaClient:
+    def create_client(self, verify: bool = True) -> StravaClient:
         """
         Create and authenticate Strava client
         
+        Args:
+            verify: Confirm the credentials with an athlete request
+            
         Returns:
             Authenticated StravaClient instance
             
@@ -43,9 +77,14 @@ class StravaAuthenticator:
             client_secret=strava_config["client_secret"],
             access_token=strava_config.get("access_token"),
             refresh_token=strava_config.get("refresh_token"),
-            config_file=self.config_manager.config_file
+            config_file=self.config_manager.config_file,
+            session=self.session,
+            expires_at=strava_config.get("expires_at")
         )
         
+        if not verify:
+            return client
+        
         # Verify authentication
         try:
             athlete = client.get_athlete()
@@ -69,58 +108,7 @@ class StravaAuthenticator:
             if not access_token or access_token == "YOUR_ACCESS_TOKEN":
                 raise ValueError("No valid access token available")
         
-        headers = {'Authorization': f'Bearer {access_token}'}
-        
-        try:
-            response = requests.get('https://www.strava.com/api/v3/athlete', headers=headers)
-            
-            if response.status_code == 200:
-                return True, 0
-            elif response.status_code == 429:
-                # Rate limit exceeded, calculate wait time
-                wait_seconds = self._calculate_rate_limit_wait()
-                return False, wait_seconds
-            elif response.status_code == 401:
-                raise Exception("Invalid or expired access token. Please refresh your tokens.")
-            else:
-                response.raise_for_status()
-                
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Failed to check rate limit status: {e}")
-    
-    def _calculate_rate_limit_wait(self) -> int:
-        """
-        Calculate seconds to wait for rate limit reset
-        
-        Returns:
-            Seconds to wait until next rate limit window
-        """
-        now = datetime.now()
-        current_minute = now.minute
-        
-        # Strava resets rate limits at :00, :15, :30, :45
-        reset_minutes = [0, 15, 30, 45]
-        next_reset_minute = None
-        
-        for reset_minute in reset_minutes:
-            if current_minute < reset_minute:
-                next_reset_minute = reset_minute
-                break
-        
-        if next_reset_minute is None:
-            # Next reset is at the top of the next hour
-            next_reset_minute = 0
-            next_reset_hour = now.hour + 1
-            if next_reset_hour >= 24:
-                next_reset_hour = 0
-                next_reset = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-            else:
-                next_reset = now.replace(hour=next_reset_hour, minute=0, second=0, microsecond=0)
-        else:
-            next_reset = now.replace(minute=next_reset_minute, second=0, microsecond=0)
-        
-        wait_seconds = int((next_reset - now).total_seconds()) + 10  # 10 second buffer
-        return max(wait_seconds, 0)
+        return probe_rate_limit(self.session, access_token)
     
     def wait_for_rate_limit_reset(self, access_token: str = None) -> None:
         """
@@ -169,19 +157,18 @@ class StravaAuthenticator:
             print("Run get_refresh_token.py to obtain access tokens")
             raise ValueError("No access token configured")
         
-        # Check rate limit status
-        print("🔍 Checking rate limit status...")
-        try:
-            can_proceed, wait_seconds = self.check_rate_limit_status()
-            if not can_proceed:
-                print(f"⏱️  Rate limit reached. Waiting {wait_seconds} seconds...")
-                self.wait_for_rate_limit_reset()
-        except Exception as e:
-            print(f"⚠️  Could not check rate limit status: {e}")
-            print("Proceeding anyway...")
+        # A token known to be unexpired needs no verification round trip
+        if self.config_manager.access_token_valid_for(60):
+            print("✓ Access token still valid, skipping verification")
+            return self.create_client(verify=False)
+        
+        # Create and test client; the athlete call also reports rate limit usage
+        client = self.create_client()
+        
+        short_remaining, daily_remaining = client.get_rate_budget()
+        print(f"📊 Rate limit budget: {short_remaining} (15min), {daily_remaining} (daily) requests remaining")
         
-        # Create and test client
-        return self.create_client()
+        return client
 
 
 # Convenience functions for backward compatibility
@@ -200,7 +187,7 @@ def authenticate_strava(config: Dict[str, Any]) -> StravaClient:
     import json
     
     with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-        json.dump(config, f, indent=2)
+        json.dump(config, f)
         temp_config_file = f.name
     
     try:
@@ -221,9 +208,7 @@ def check_rate_limit_status(access_token: str) -> bool:
     Returns:
         True if can proceed, False if rate limited
     """
-    # Create temporary authenticator without config file
-    authenticator = StravaAuthenticator()
-    can_proceed, _ = authenticator.check_rate_limit_status(access_token)
+    can_proceed, _ = probe_rate_limit(create_session(), access_token)
     return can_proceed
 
 
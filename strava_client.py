@@ -1,17 +1,64 @@
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 import time
-from datetime import datetime, timedelta
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from strava_config import StravaConfig
+from strava_files import write_json, ACTIVITY_FILENAME_ID
+from strava_progress import get_activity_logger, flush_activity_log
+from strava_utils import INDOOR_ACTIVITY_TYPES
+
+
+def seconds_until_rate_limit_reset(buffer_seconds: int = 10, now: datetime = None) -> int:
+    """Seconds until Strava's next 15-minute window (:00, :15, :30, :45), plus a buffer"""
+    now = now or datetime.now()
+    next_reset = now.replace(minute=(now.minute // 15) * 15, second=0, microsecond=0) + timedelta(minutes=15)
+    return int((next_reset - now).total_seconds()) + buffer_seconds
+
+
+def seconds_until_daily_reset(now: datetime = None) -> int:
+    """Seconds until Strava's daily limit resets at midnight UTC"""
+    now = (now or datetime.now()).astimezone(timezone.utc)
+    return 86400 - (now.hour * 3600 + now.minute * 60 + now.second)
+
+
+def scan_saved_activities(output_dir: str) -> Set[int]:
+    """
+    Find activities already saved as activity_<date>_<id>_<name>.* files
+    
+    Args:
+        output_dir: Directory holding activity files
+        
+    Returns:
+        Set of saved activity IDs
+    """
+    known_ids = set()
+    
+    if os.path.isdir(output_dir):
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                match = ACTIVITY_FILENAME_ID.match(entry.name)
+                if match:
+                    known_ids.add(int(match.group(1)))
+    
+    return known_ids
 
 
 class StravaRateLimiter:
     def __init__(self):
         self.short_term_requests = 0
         self.short_term_reset = datetime.now() + timedelta(minutes=15)
+        self.short_term_limit = 100
         self.daily_requests = 0
         self.daily_reset = datetime.now() + timedelta(days=1)
+        self.daily_limit = 1000
+        self._lock = threading.Lock()
+        self._acquire_lock = threading.Lock()
         
     def can_make_request(self) -> bool:
         now = datetime.now()
@@ -25,13 +72,13 @@ class StravaRateLimiter:
             self.daily_requests = 0
             self.daily_reset = now + timedelta(days=1)
         
-        # Check limits (15 min: 100 requests, daily: 1000 requests)
-        return self.short_term_requests < 100 and self.daily_requests < 1000
+        # Check limits (defaults 15 min: 100 requests, daily: 1000 requests)
+        return self.short_term_requests < self.short_term_limit and self.daily_requests < self.daily_limit
     
     def wait_if_needed(self):
         while not self.can_make_request():
             now = datetime.now()
-            if self.short_term_requests >= 100:
+            if self.short_term_requests >= self.short_term_limit:
                 wait_seconds = (self.short_term_reset - now).total_seconds()
                 if wait_seconds > 0:
                     print(f"Rate limit reached. Waiting {wait_seconds:.0f} seconds...")
@@ -50,7 +97,7 @@ class StravaRateLimiter:
                     # Reset time has passed, update counters
                     self.short_term_requests = 0
                     self.short_term_reset = now + timedelta(minutes=15)
-            elif self.daily_requests >= 1000:
+            elif self.daily_requests >= self.daily_limit:
                 wait_seconds = (self.daily_reset - now).total_seconds()
                 if wait_seconds > 0:
                     print(f"Daily limit reached. Waiting {wait_seconds:.0f} seconds...")
@@ -76,20 +123,93 @@ class StravaRateLimiter:
                 break
     
     def record_request(self):
-        self.short_term_requests += 1
-        self.daily_requests += 1
+        with self._lock:
+            self.short_term_requests += 1
+            self.daily_requests += 1
+    
+    def update_from_headers(self, headers) -> None:
+        """Adopt the server's view of usage from X-RateLimit-Usage/-Limit headers
+        
+        Both headers have the form "<15 min>,<daily>". Strava's windows are
+        aligned to the clock, so the reset times are realigned as well.
+        """
+        usage = headers.get('X-RateLimit-Usage')
+        if not usage:
+            return
+        try:
+            short_used, daily_used = (int(value) for value in usage.split(',')[:2])
+            limit = headers.get('X-RateLimit-Limit')
+            limits = [int(value) for value in limit.split(',')[:2]] if limit else None
+        except ValueError:
+            return
+        
+        now = datetime.now()
+        with self._lock:
+            self.short_term_requests = short_used
+            self.daily_requests = daily_used
+            if limits and len(limits) == 2:
+                self.short_term_limit, self.daily_limit = limits
+            self.short_term_reset = now + timedelta(seconds=seconds_until_rate_limit_reset(0, now))
+            self.daily_reset = now + timedelta(seconds=seconds_until_daily_reset(now))
+    
+    def mark_exhausted(self, retry_after: Optional[str] = None) -> None:
+        """Block further requests until Retry-After (or the next 15-minute window) passes"""
+        if retry_after and retry_after.isdigit():
+            wait_seconds = int(retry_after)
+        else:
+            wait_seconds = seconds_until_rate_limit_reset()
+        
+        with self._lock:
+            self.short_term_requests = max(self.short_term_requests, self.short_term_limit)
+            self.short_term_reset = datetime.now() + timedelta(seconds=wait_seconds)
+    
+    def get_remaining(self) -> Tuple[int, int]:
+        """Remaining (15 min, daily) requests as last known"""
+        with self._lock:
+            return (max(0, self.short_term_limit - self.short_term_requests),
+                    max(0, self.daily_limit - self.daily_requests))
+    
+    def acquire(self):
+        """Wait until a request is allowed and reserve it (thread-safe)
+        
+        Checking and reserving under one lock keeps concurrent workers
+        from all passing the check at 99/100 and overshooting the limit.
+        """
+        with self._acquire_lock:
+            self.wait_if_needed()
+            self.record_request()
+
+
+def create_session(pool_connections: int = 16, pool_maxsize: int = 32) -> requests.Session:
+    """Create a requests session that keeps TCP/TLS connections alive between calls
+    
+    Transient 5xx responses are retried with backoff; 429 is left to the
+    caller so rate-limit handling stays in one place.
+    """
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504],
+                    raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          max_retries=retries)
+    session.mount('https://', adapter)
+    return session
 
 
 class StravaClient:
     def __init__(self, client_id: str, client_secret: str, access_token: str = None, 
-                 refresh_token: str = None, config_file: str = None):
+                 refresh_token: str = None, config_file: str = None,
+                 session: requests.Session = None, expires_at: int = None):
         self.client_id = client_id
         self.client_secret = client_secret
         self.access_token = access_token
         self.refresh_token = refresh_token
+        self.expires_at = expires_at
+        self._refresh_lock = threading.Lock()
         self.config_file = config_file
         self.base_url = "https://www.strava.com/api/v3"
         self.rate_limiter = StravaRateLimiter()
+        self.session = session or create_session()
+        self._athlete: Optional[Dict[str, Any]] = None
         
     def get_authorization_url(self, redirect_uri: str, scope: str = "activity:read_all") -> str:
         return (f"https://www.strava.com/oauth/authorize?"
@@ -108,10 +228,12 @@ class StravaClient:
             'grant_type': 'authorization_code'
         }
         
-        response = requests.post(token_url, data=data)
+        response = self.session.post(token_url, data=data)
         response.raise_for_status()
         token_data = response.json()
         self.access_token = token_data['access_token']
+        self.refresh_token = token_data.get('refresh_token', self.refresh_token)
+        self.expires_at = token_data.get('expires_at')
         return token_data
     
     def refresh_token_method(self, refresh_token: str) -> Dict[str, Any]:
@@ -123,11 +245,12 @@ class StravaClient:
             'grant_type': 'refresh_token'
         }
         
-        response = requests.post(token_url, data=data)
+        response = self.session.post(token_url, data=data)
         response.raise_for_status()
         token_data = response.json()
         self.access_token = token_data['access_token']
         self.refresh_token = token_data.get('refresh_token', refresh_token)
+        self.expires_at = token_data.get('expires_at')
         return token_data
     
     def _refresh_access_token(self):
@@ -140,71 +263,98 @@ class StravaClient:
         if self.config_file:
             self._save_tokens_to_config(token_data)
     
+    def _token_expiring(self, slack_seconds: int = 60) -> bool:
+        """True if a refreshable token is known to expire within slack_seconds"""
+        return bool(self.refresh_token and self.expires_at and
+                    self.expires_at - time.time() <= slack_seconds)
+    
     def _save_tokens_to_config(self, token_data: Dict[str, Any]):
         if not self.config_file or not os.path.exists(self.config_file):
             return
             
         try:
-            with open(self.config_file, 'r') as f:
-                config = json.load(f)
-            
-            config['strava']['access_token'] = token_data['access_token']
-            config['strava']['refresh_token'] = token_data.get('refresh_token', self.refresh_token)
-            
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            config_manager = StravaConfig(self.config_file)
+            config_manager.update_tokens(token_data['access_token'],
+                                         token_data.get('refresh_token', self.refresh_token),
+                                         token_data.get('expires_at'))
                 
             print(f"Updated tokens saved to {self.config_file}")
             
         except Exception as e:
             print(f"Failed to save tokens to config: {e}")
     
-    def _make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+    def _make_request(self, endpoint: str, params: Dict[str, Any] = None,
+                      max_retries: int = 4) -> Dict[str, Any]:
         if not self.access_token:
             raise ValueError("Access token not set")
         
-        # Check rate limits and wait if necessary
-        self.rate_limiter.wait_if_needed()
-        
-        headers = {'Authorization': f'Bearer {self.access_token}'}
         url = f"{self.base_url}/{endpoint}"
         
-        try:
-            response = requests.get(url, headers=headers, params=params)
+        # Loop rather than recurse on 429 so repeated rate limiting stays bounded
+        for attempt in range(max_retries + 1):
+            # Refresh up front when the token is known to expire, rather than spending a 401
+            if self._token_expiring():
+                with self._refresh_lock:
+                    if self._token_expiring():
+                        print("Access token expiring, refreshing...")
+                        self._refresh_access_token()
+            
+            # Check rate limits, waiting if necessary, and reserve this request
+            self.rate_limiter.acquire()
+            
+            sent_token = self.access_token
+            headers = {'Authorization': f'Bearer {sent_token}'}
+            response = self.session.get(url, headers=headers, params=params)
+            
+            # Every response carries the current usage, so no separate probe is needed
+            self.rate_limiter.update_from_headers(response.headers)
             
             # Check if token is expired (401 Unauthorized)
-            if response.status_code == 401 and self.refresh_token:
-                print("Access token expired, refreshing...")
-                self._refresh_access_token()
-                headers = {'Authorization': f'Bearer {self.access_token}'}
-                # Retry the request with new token
-                response = requests.get(url, headers=headers, params=params)
+            if response.status_code == 401 and self.refresh_token and attempt < max_retries:
+                # Only the first worker to see the rejected token refreshes it;
+                # the rest retry with the token it stored
+                with self._refresh_lock:
+                    if self.access_token == sent_token:
+                        print("Access token expired, refreshing...")
+                        self._refresh_access_token()
+                # Retry through acquire() so the request is counted
+                continue
             
-            response.raise_for_status()
+            if response.status_code == 429 and attempt < max_retries:  # Rate limit exceeded
+                # acquire() on the next attempt sleeps until the window resets
+                print(f"Rate limit exceeded by server (retry {attempt + 1}/{max_retries})")
+                self.rate_limiter.mark_exhausted(response.headers.get('Retry-After'))
+                continue
             
-            # Record successful request for rate limiting
-            self.rate_limiter.record_request()
+            response.raise_for_status()
             
             return response.json()
-            
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 429:  # Rate limit exceeded
-                print("Rate limit exceeded by server. Waiting 60 seconds...")
-                # Sleep in 1-second chunks to allow for keyboard interrupts
-                for i in range(60):
-                    try:
-                        time.sleep(1)
-                        if i % 10 == 0 and i > 0:  # Show countdown every 10 seconds
-                            remaining = 60 - i
-                            print(f"  {remaining} seconds remaining...")
-                    except KeyboardInterrupt:
-                        print("\nServer rate limit wait interrupted by user")
-                        raise
-                return self._make_request(endpoint, params)
-            raise
     
-    def get_athlete(self) -> Dict[str, Any]:
-        return self._make_request("athlete")
+    def get_rate_budget(self) -> Tuple[int, int]:
+        """
+        Remaining requests as reported by the most recent API response
+        
+        Returns:
+            Tuple of (short_term_remaining, daily_remaining)
+        """
+        return self.rate_limiter.get_remaining()
+    
+    def get_athlete(self, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get the authenticated athlete's profile
+        
+        The profile is fetched once per client, so verifying credentials and
+        later saving athlete info share a single API request.
+        
+        Args:
+            refresh: Fetch the profile again even if one is cached
+            
+        Returns:
+            Athlete profile dictionary
+        """
+        if self._athlete is None or refresh:
+            self._athlete = self._make_request("athlete")
+        return self._athlete
     
     def get_activities(self, per_page: int = 200, page: int = 1) -> List[Dict[str, Any]]:
         params = {
@@ -248,77 +398,87 @@ class StravaClient:
                 return streams['latlng']['data']
             return []
         except Exception as e:
-            print(f"Error downloading GPS data for activity {activity_id}: {e}")
+            get_activity_logger().warning(f"Error downloading GPS data for activity {activity_id}: {e}")
             return []
     
-    def download_all_gps_data(self) -> Dict[int, List[List[float]]]:
-        activities = self.get_all_activities()
-        gps_data = {}
+    def download_individual_activity_gps_data(self, output_dir: str, max_workers: int = 8,
+                                              incremental: bool = True) -> Dict[str, Any]:
+        """Download GPS data for each activity and save to individual files
+        
+        In incremental mode activities already saved in output_dir are
+        skipped. Every activity is still listed (listing costs one request
+        per 200 activities), so one whose stream download failed on an
+        earlier run is retried rather than falling behind a date watermark.
+        """
+        known_ids = scan_saved_activities(output_dir) if incremental else set()
+        if known_ids:
+            print(f"Skipping {len(known_ids)} already saved activities")
         
-        for activity in activities:
-            activity_id = activity['id']
-            activity_type = activity.get('type', 'Unknown')
-            
-            # Skip non-GPS activities
-            if activity_type in ['WeightTraining', 'Yoga', 'Workout']:
-                continue
-                
-            print(f"Downloading GPS data for activity {activity_id} ({activity_type})")
-            gps_points = self.download_activity_gps_data(activity_id)
-            
-            if gps_points:
-                gps_data[activity_id] = gps_points
-            
-            # Rate limiting is now handled in _make_request
-            
-        return gps_data
-    
-    def download_individual_activity_gps_data(self, output_dir: str) -> Dict[str, Any]:
-        """Download GPS data for each activity and save to individual files"""
         activities = self.get_all_activities()
         file_info = {}
+        out = Path(output_dir)
+        out.mkdir(parents=True, exist_ok=True)
         
-        for activity in activities:
-            activity_id = activity['id']
-            activity_type = activity.get('type', 'Unknown')
-            activity_date = activity.get('start_date', '').split('T')[0]  # Extract date part
-            activity_name = activity.get('name', f'Activity_{activity_id}')
-            
-            # Skip non-GPS activities
-            if activity_type in ['WeightTraining', 'Yoga', 'Workout']:
-                continue
-                
-            print(f"Downloading GPS data for activity {activity_id} ({activity_type}) - {activity_date}")
-            gps_points = self.download_activity_gps_data(activity_id)
-            
-            if gps_points:
-                # Create filename with date and activity info
-                safe_name = ''.join(c for c in activity_name if c.isalnum() or c in ' -_').strip()[:50]
-                filename = f"activity_{activity_date}_{activity_id}_{safe_name}.json"
-                filepath = os.path.join(output_dir, filename)
-                
-                # Save individual activity file
-                activity_data = {
-                    'activity_id': activity_id,
-                    'activity_type': activity_type,
-                    'activity_name': activity_name,
-                    'start_date': activity['start_date'],
-                    'gps_points': gps_points,
-                    'total_points': len(gps_points)
-                }
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for activity in activities:
+                activity_type = activity.get('type', 'Unknown')
                 
-                with open(filepath, 'w') as f:
-                    json.dump(activity_data, f, indent=2)
+                # Skip non-GPS and already saved activities
+                if activity_type in INDOOR_ACTIVITY_TYPES or activity['id'] in known_ids:
+                    continue
                 
-                file_info[activity_id] = {
-                    'filename': filename,
-                    'filepath': filepath,
-                    'activity_type': activity_type,
-                    'activity_name': activity_name,
-                    'start_date': activity['start_date'],
-                    'gps_points_count': len(gps_points)
-                }
-                
-                print(f"  Saved {len(gps_points)} GPS points to {filename}")
+                futures[activity['id']] = executor.submit(self._download_activity_file, activity, out)
             
-        return file_info
\ No newline at end of file
+            for activity_id, future in futures.items():
+                info = future.result()
+                if info:
+                    file_info[activity_id] = info
+        
+        flush_activity_log()
+        return file_info
+    
+    def _download_activity_file(self, activity: Dict[str, Any], out: Path) -> Optional[Dict[str, Any]]:
+        """Download one activity's GPS data to its own file; returns its file info or None"""
+        activity_id = activity['id']
+        activity_type = activity.get('type', 'Unknown')
+        activity_date = activity.get('start_date', '').split('T')[0]  # Extract date part
+        activity_name = activity.get('name', f'Activity_{activity_id}')
+        
+        activity_log = get_activity_logger()
+        activity_log.info("Downloading GPS data for activity %s (%s) - %s", activity_id, activity_type, activity_date)
+        gps_points = self.download_activity_gps_data(activity_id)
+        
+        if not gps_points:
+            return None
+        
+        # Create filename with date and activity info
+        safe_name = ''.join(c for c in activity_name if c.isalnum() or c in ' -_').strip()[:50]
+        filename = f"activity_{activity_date}_{activity_id}_{safe_name}.json"
+        filepath = out / filename
+        
+        # Save individual activity file
+        activity_data = {
+            'activity_id': activity_id,
+            'activity_type': activity_type,
+            'activity_name': activity_name,
+            'start_date': activity['start_date'],
+            'gps_points': gps_points,
+            'total_points': len(gps_points)
+        }
+        
+        write_json(filepath, activity_data, indent=False)
+        
+        activity_log.info("  Saved %d GPS points to %s", len(gps_points), filename, extra={'summary': {
+            'id': activity_id, 'type': activity_type, 'date': activity_date,
+            'points': len(gps_points), 'file': filename
+        }})
+        
+        return {
+            'filename': filename,
+            'filepath': str(filepath),
+            'activity_type': activity_type,
+            'activity_name': activity_name,
+            'start_date': activity['start_date'],
+            'gps_points_count': len(gps_points)
+        }
@@ -8,8 +8,15 @@ Eliminates duplication of config management code.
 """
 
 import os
+import copy
 import json
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Tuple
+from strava_files import read_json, write_json
+
+
+# Parsed config files keyed by absolute path: (st_mtime_ns, config)
+_CONFIG_CACHE: Dict[str, Tuple[int, Dict[str, Any]]] = {}
 
 
 class StravaConfig:
@@ -42,7 +49,8 @@ class StravaConfig:
             "batch_size": 50,
             "retry_attempts": 3,
             "retry_delay": 300,
-            "save_progress_interval": 10
+            "save_progress_interval": 10,
+            "workers": 8
         }
     }
     
@@ -70,17 +78,26 @@ class StravaConfig:
             else:
                 raise FileNotFoundError(f"Configuration file {self.config_file} not found")
         
-        try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                self._config = json.load(f)
+        # Reuse the parsed config while the file is unchanged; callers get a
+        # private copy so set() without save() never leaks into the cache
+        path = os.path.abspath(self.config_file)
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = _CONFIG_CACHE.get(path)
+        if cached and cached[0] == mtime_ns:
+            self._config = copy.deepcopy(cached[1])
             return self._config
+        
+        try:
+            self._config = read_json(self.config_file)
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in config file {self.config_file}: {e}")
+        
+        _CONFIG_CACHE[path] = (mtime_ns, copy.deepcopy(self._config))
+        return self._config
     
     def create_default(self) -> None:
         """Create default configuration file"""
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.DEFAULT_CONFIG, f, indent=2, ensure_ascii=False)
+        write_json(self.config_file, self.DEFAULT_CONFIG)
         
         print(f"Created {self.config_file}. Please update with your Strava API credentials.")
         print("\nTo get Strava API credentials:")
@@ -97,8 +114,12 @@ class StravaConfig:
             config: Configuration dictionary to save
         """
         self._config = config
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+        # Written atomically so an interrupted save cannot lose the tokens
+        write_json(self.config_file, config)
+        
+        # Refresh the cache entry with what was just written instead of re-reading it
+        path = os.path.abspath(self.config_file)
+        _CONFIG_CACHE[path] = (os.stat(path).st_mtime_ns, copy.deepcopy(config))
     
     def get(self, key_path: str, default: Any = None) -> Any:
         """
@@ -171,17 +192,34 @@ class StravaConfig:
         access_token = self.get("strava.access_token")
         return access_token and access_token != "YOUR_ACCESS_TOKEN"
     
-    def update_tokens(self, access_token: str, refresh_token: str = None) -> None:
+    def access_token_valid_for(self, min_seconds: int = 60) -> bool:
+        """
+        Check if the access token is known to stay valid for a while
+        
+        Args:
+            min_seconds: Required remaining lifetime in seconds
+            
+        Returns:
+            True if expires_at is stored and at least min_seconds away
+        """
+        expires_at = self.get("strava.expires_at")
+        return bool(self.has_access_token() and expires_at and expires_at - time.time() > min_seconds)
+    
+    def update_tokens(self, access_token: str, refresh_token: str = None,
+                      expires_at: int = None) -> None:
         """
         Update Strava tokens in configuration
         
         Args:
             access_token: New access token
             refresh_token: New refresh token (optional)
+            expires_at: Access token expiry as a Unix timestamp (optional)
         """
         self.set("strava.access_token", access_token)
         if refresh_token:
             self.set("strava.refresh_token", refresh_token)
+        if expires_at:
+            self.set("strava.expires_at", expires_at)
         self.save(self._config)
     
     def get_strava_config(self) -> Dict[str, str]:
@@ -189,13 +227,14 @@ class StravaConfig:
         Get Strava-specific configuration
         
         Returns:
-            Dictionary containing Strava API credentials
+            Dictionary containing Strava API credentials and token expiry
         """
         return {
             "client_id": self.get("strava.client_id"),
             "client_secret": self.get("strava.client_secret"),
             "access_token": self.get("strava.access_token"),
-            "refresh_token": self.get("strava.refresh_token")
+            "refresh_token": self.get("strava.refresh_token"),
+            "expires_at": self.get("strava.expires_at")
         }
     
     def get_output_dir(self) -> str:
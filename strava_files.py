@@ -8,9 +8,272 @@ Eliminates duplication of file handling code across scripts.
 """
 
 import os
+import re
 import json
+import mmap
+import shutil
+import fnmatch
+import uuid
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Optional, Tuple, Iterator
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# Top-level keys of an activity file that consolidation actually uses
+ACTIVITY_FILE_FIELDS = ('activity_id', 'activity_type', 'activity_name', 'start_date', 'gps_points')
+
+# Minimum number of files before activity loading uses a process pool
+PARALLEL_LOAD_THRESHOLD = 64
+
+# Activity files at least this large are stream-parsed instead of read whole
+STREAM_PARSE_MIN_BYTES = 4 * 1024 * 1024
+
+# Activity ID embedded in per-activity filenames (activity_<date>_<id>_<name>.*)
+ACTIVITY_FILENAME_ID = re.compile(r'^activity_[\d-]*_(\d+)_')
+
+# One metadata line per activity whose coordinates are stored as .npy
+ACTIVITY_INDEX_FILENAME = "_index.ndjson"
+
+
+def read_json(filepath: str) -> Any:
+    """
+    Read a JSON file, using orjson when available
+    
+    Args:
+        filepath: Path to JSON file
+        
+    Returns:
+        Parsed data
+    """
+    if ORJSON_AVAILABLE:
+        with open(filepath, 'rb') as f:
+            # Parse straight from the page cache instead of copying the
+            # whole file into a bytes object first (empty files cannot be mapped)
+            if os.fstat(f.fileno()).st_size == 0:
+                return orjson.loads(f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                with memoryview(buf) as view:
+                    return orjson.loads(view)
+    
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=16)
+def _read_json_cached(filepath: str, mtime_ns: int) -> Any:
+    """read_json memoized on path and modification time"""
+    return read_json(filepath)
+
+
+def load_geojson(filepath: str) -> Dict[str, Any]:
+    """
+    Read a GeoJSON overlay file, reusing the parsed data while it is unchanged
+    
+    The result is shared between calls, so callers must not modify it.
+    
+    Args:
+        filepath: Path to GeoJSON file
+        
+    Returns:
+        Parsed GeoJSON data
+        
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+    """
+    return _read_json_cached(filepath, os.stat(filepath).st_mtime_ns)
+
+
+def parse_json(data: bytes) -> Any:
+    """
+    Parse a JSON document from bytes, using orjson when available
+    
+    Args:
+        data: Encoded JSON document
+        
+    Returns:
+        Parsed data
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump_json_line(data: Any) -> bytes:
+    """
+    Serialize data as a single newline-terminated JSON line (NDJSON)
+    
+    Args:
+        data: Data to serialize
+        
+    Returns:
+        UTF-8 encoded JSON line
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(data, ensure_ascii=False) + "\n").encode('utf-8')
+
+
+def atomic_write_bytes(filepath: str, data: bytes) -> None:
+    """
+    Replace a file's contents in one write
+    
+    The data goes to a uniquely named temporary file in the same directory
+    that is then renamed over the target, so a killed process never leaves
+    a truncated file behind and concurrent writers never share a temp
+    file. The target keeps its permissions (config.json holds secrets);
+    new files get the usual umask-based mode, applied by the kernel when
+    the temporary file is created.
+    
+    Args:
+        filepath: Path to write
+        data: Complete file contents
+    """
+    try:
+        mode = os.stat(filepath).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+    
+    tmp_path = os.path.join(os.path.dirname(filepath),
+                            f".{os.path.basename(filepath)}.{os.getpid()}.{uuid.uuid4().hex[:12]}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(filepath: str, data: Any, indent: bool = True) -> None:
+    """
+    Write data as a UTF-8 JSON file, using orjson when available
+    
+    The document is serialized in memory and written atomically.
+    
+    Args:
+        filepath: Path to JSON file
+        data: Data to save (non-string dict keys are allowed)
+        indent: Pretty-print with 2-space indentation
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        atomic_write_bytes(filepath, orjson.dumps(data, option=option))
+        return
+    
+    # json.dumps without indent takes the C encoder; json.dump never does
+    atomic_write_bytes(filepath, json.dumps(data, indent=2 if indent else None,
+                                            ensure_ascii=False).encode('utf-8'))
+
+
+def load_activity_fields(filepath: str) -> Dict[str, Any]:
+    """
+    Load the fields of an activity file needed for consolidation
+    
+    Large files are streamed with ijson when available so unused metadata
+    is never kept around. Smaller files are read with a single read() and
+    parsed in one call, which is cheaper than streaming at that size.
+    
+    Args:
+        filepath: Path to activity JSON file
+        
+    Returns:
+        Activity data dictionary limited to ACTIVITY_FILE_FIELDS
+    """
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if IJSON_AVAILABLE and size >= STREAM_PARSE_MIN_BYTES:
+            return {key: value for key, value in ijson.kvitems(f, '', use_float=True)
+                    if key in ACTIVITY_FILE_FIELDS}
+        activity_data = parse_json(f.read(size))
+    
+    return {key: activity_data[key] for key in ACTIVITY_FILE_FIELDS if key in activity_data}
+
+
+def iter_shard_fields(shard_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the consolidation fields of each activity in an NDJSON shard
+    
+    Args:
+        shard_path: Path to activities_YYYY_MM.ndjson file
+        
+    Yields:
+        Activity data dictionaries limited to ACTIVITY_FILE_FIELDS
+    """
+    with open(shard_path, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                activity_data = parse_json(line)
+            except ValueError as e:
+                # A partially written last line is expected after a crash
+                print(f"⚠️  Skipping bad line {line_number} in {shard_path}: {e}")
+                continue
+            yield {key: activity_data[key] for key in ACTIVITY_FILE_FIELDS if key in activity_data}
+
+
+def save_activity_coords(filepath: str, gps_points: List[List[float]]) -> None:
+    """
+    Save the GPS points of one activity as a float32 N x 2 .npy array
+    
+    Args:
+        filepath: Path to .npy file
+        gps_points: List of [lat, lon] pairs
+    """
+    import numpy as np
+    
+    np.save(filepath, np.asarray(gps_points, dtype=np.float32).reshape(-1, 2))
+
+
+def load_activity_coords(filepath: str) -> List[List[float]]:
+    """
+    Load GPS points written by save_activity_coords
+    
+    Args:
+        filepath: Path to .npy file
+        
+    Returns:
+        List of [lat, lon] pairs
+    """
+    import numpy as np
+    
+    return np.load(filepath).tolist()
+
+
+def _load_activity_file_safely(filepath: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """Process-pool worker: load one activity file, reporting errors instead of raising"""
+    try:
+        return filepath, load_activity_fields(filepath), None
+    except Exception as e:
+        return filepath, None, str(e)
+
+
+def _load_shard(shard_path: str) -> List[Dict[str, Any]]:
+    """Process-pool worker: load every activity in one NDJSON shard"""
+    return list(iter_shard_fields(shard_path))
 
 
 class StravaFileManager:
@@ -18,6 +281,9 @@ class StravaFileManager:
     
     def __init__(self, output_dir: str = "strava_data"):
         self.output_dir = output_dir
+        # (min_lat, max_lat, min_lon, max_lon) measured while streaming the
+        # last GPS data file, or None when the loader did not measure them
+        self.gps_bounds: Optional[Tuple[float, float, float, float]] = None
         self.ensure_output_dir()
     
     def ensure_output_dir(self) -> None:
@@ -44,7 +310,8 @@ class StravaFileManager:
         else:
             return now.strftime("%Y%m%d_%H%M%S")
     
-    def save_json_file(self, data: Any, filename: str, create_latest: bool = True) -> str:
+    def save_json_file(self, data: Any, filename: str, create_latest: bool = True,
+                       indent: bool = True) -> str:
         """
         Save data as JSON file
         
@@ -52,14 +319,14 @@ class StravaFileManager:
             data: Data to save
             filename: Filename (without path)
             create_latest: Also create a *_latest.json version
+            indent: Pretty-print the JSON (disable for machine-read data)
             
         Returns:
             Full path to saved file
         """
         filepath = os.path.join(self.output_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        write_json(filepath, data, indent=indent)
         
         # Create latest version if requested
         if create_latest and not filename.endswith('_latest.json'):
@@ -67,18 +334,50 @@ class StravaFileManager:
             latest_filename = f"{base_name}_latest.json"
             latest_filepath = os.path.join(self.output_dir, latest_filename)
             
-            with open(latest_filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self.link_latest(filepath, latest_filepath)
         
         return filepath
     
-    def load_json_file(self, filename: str, try_latest: bool = True) -> Any:
+    def link_latest(self, filepath: str, latest_filepath: str) -> str:
+        """
+        Point a *_latest.json file at an already written file
+        
+        Uses a hardlink so the data is serialized and written only once,
+        falling back to a copy on filesystems without hardlink support.
+        The link is made under a temporary name and renamed over the old
+        latest file, so readers never see it missing or half-copied.
+        
+        Args:
+            filepath: Path to the freshly written file
+            latest_filepath: Path of the latest version to (re)create
+            
+        Returns:
+            Path to the latest file
+        """
+        temp_filepath = f"{latest_filepath}.tmp"
+        try:
+            os.remove(temp_filepath)
+        except FileNotFoundError:
+            pass
+        
+        try:
+            os.link(filepath, temp_filepath)
+        except OSError:
+            shutil.copyfile(filepath, temp_filepath)
+        os.replace(temp_filepath, latest_filepath)
+        
+        return latest_filepath
+    
+    def load_json_file(self, filename: str, try_latest: bool = True,
+                       key_type: Optional[Callable[[str], Any]] = None) -> Any:
         """
         Load data from JSON file
         
         Args:
             filename: Filename to load
             try_latest: Try *_latest.json version first
+            key_type: Convert the keys of a top-level object with this
+                (e.g. int for activity IDs), since JSON keys are always strings
             
         Returns:
             Loaded data
@@ -86,6 +385,8 @@ class StravaFileManager:
         Raises:
             FileNotFoundError: If file doesn't exist
         """
+        filepath = os.path.join(self.output_dir, filename)
+        
         # Try latest version first
         if try_latest and not filename.endswith('_latest.json'):
             base_name = filename.rsplit('.', 1)[0]  # Remove .json
@@ -93,16 +394,16 @@ class StravaFileManager:
             latest_filepath = os.path.join(self.output_dir, latest_filename)
             
             if os.path.exists(latest_filepath):
-                with open(latest_filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                filepath = latest_filepath
         
-        # Try original filename
-        filepath = os.path.join(self.output_dir, filename)
-        if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"Could not find {filename} or latest version in {self.output_dir}")
         
-        raise FileNotFoundError(f"Could not find {filename} or latest version in {self.output_dir}")
+        data = read_json(filepath)
+        if key_type is not None and isinstance(data, dict):
+            # Rebuilt in one pass without re-reading the values
+            data = dict(zip(map(key_type, data), data.values()))
+        return data
     
     def save_athlete_info(self, athlete_data: Dict[str, Any]) -> Tuple[str, str]:
         """
@@ -118,7 +419,7 @@ class StravaFileManager:
         timestamped_filename = f"athlete_info_{timestamp}.json"
         
         timestamped_path = self.save_json_file(athlete_data, timestamped_filename, create_latest=False)
-        latest_path = self.save_json_file(athlete_data, "athlete_info_latest.json", create_latest=False)
+        latest_path = self.link_latest(timestamped_path, os.path.join(self.output_dir, "athlete_info_latest.json"))
         
         return timestamped_path, latest_path
     
@@ -136,11 +437,275 @@ class StravaFileManager:
         timestamp = self.generate_timestamp()
         timestamped_filename = f"{prefix}_{timestamp}.json"
         
-        timestamped_path = self.save_json_file(gps_data, timestamped_filename, create_latest=False)
-        latest_path = self.save_json_file(gps_data, f"{prefix}_latest.json", create_latest=False)
+        timestamped_path = self.save_json_file(gps_data, timestamped_filename, create_latest=False, indent=False)
+        latest_path = self.link_latest(timestamped_path, os.path.join(self.output_dir, f"{prefix}_latest.json"))
+        
+        return timestamped_path, latest_path
+    
+    def _gps_data_arrays(self, gps_data: Dict[str, List[List[float]]]) -> Tuple[Any, Any, Any]:
+        """
+        Flatten GPS data into ids (int64), offsets (int64) and coords (float32 N x 2)
+        
+        Activity i owns ``coords[offsets[i]:offsets[i + 1]]``.
+        """
+        import numpy as np
+        
+        ids = np.fromiter((int(activity_id) for activity_id in gps_data.keys()),
+                          dtype=np.int64, count=len(gps_data))
+        offsets = np.zeros(len(gps_data) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, gps_data.values()), dtype=np.int64, count=len(gps_data)),
+                  out=offsets[1:])
+        if gps_data:
+            coords = np.concatenate([np.asarray(points, dtype=np.float32).reshape(-1, 2)
+                                     for points in gps_data.values()])
+        else:
+            coords = np.empty((0, 2), dtype=np.float32)
+        
+        return ids, offsets, coords
+    
+    def _gps_data_from_arrays(self, ids: Any, offsets: Any, coords: Any) -> Dict[int, List[List[float]]]:
+        """Rebuild the GPS data dictionary from flattened ids/offsets/coords arrays"""
+        ids = ids.tolist()
+        offsets = offsets.tolist()
+        
+        return {activity_id: coords[offsets[i]:offsets[i + 1]].tolist()
+                for i, activity_id in enumerate(ids)}
+    
+    def save_gps_data_npz(self, gps_data: Dict[str, List[List[float]]], prefix: str = "gps_data",
+                          arrays: Optional[Tuple[Any, Any, Any]] = None) -> Tuple[str, str]:
+        """
+        Save GPS data as compressed float32 arrays with timestamp
+        
+        The data is stored structure-of-arrays style: ``ids`` (int64),
+        ``offsets`` (int64, len(ids) + 1) and ``coords`` (float32, N x 2),
+        so activity i owns ``coords[offsets[i]:offsets[i + 1]]``.
+        
+        Args:
+            gps_data: GPS data dictionary {activity_id: [[lat, lon], ...]}
+            prefix: Filename prefix
+            arrays: Already flattened (ids, offsets, coords); gps_data is
+                then ignored
+            
+        Returns:
+            Tuple of (timestamped_file_path, latest_file_path)
+        """
+        import numpy as np
+        
+        ids, offsets, coords = arrays if arrays is not None else self._gps_data_arrays(gps_data)
+        
+        timestamped_path = os.path.join(self.output_dir, f"{prefix}_{self.generate_timestamp()}.npz")
+        np.savez_compressed(timestamped_path, ids=ids, offsets=offsets, coords=coords)
+        latest_path = self.link_latest(timestamped_path, os.path.join(self.output_dir, f"{prefix}_latest.npz"))
+        
+        return timestamped_path, latest_path
+    
+    def save_gps_data_arrow(self, gps_data: Dict[str, List[List[float]]], prefix: str = "gps_data",
+                            arrays: Optional[Tuple[Any, Any, Any]] = None) -> Tuple[str, str]:
+        """
+        Save GPS data as an uncompressed Arrow IPC file with timestamp
+        
+        One row per activity: ``id`` (int64) and ``points``
+        (large_list<fixed_size_list<float32, 2>>). The file can be memory
+        mapped, so readers get the coordinates without copying or parsing.
+        
+        Args:
+            gps_data: GPS data dictionary {activity_id: [[lat, lon], ...]}
+            prefix: Filename prefix
+            arrays: Already flattened (ids, offsets, coords); gps_data is
+                then ignored
+            
+        Returns:
+            Tuple of (timestamped_file_path, latest_file_path)
+            
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for Arrow output (pip install pyarrow)")
+        
+        ids, offsets, coords = arrays if arrays is not None else self._gps_data_arrays(gps_data)
+        points = pa.LargeListArray.from_arrays(
+            pa.array(offsets),
+            pa.FixedSizeListArray.from_arrays(pa.array(coords.reshape(-1)), 2)
+        )
+        table = pa.Table.from_arrays([pa.array(ids), points], names=['id', 'points'])
+        
+        timestamped_path = os.path.join(self.output_dir, f"{prefix}_{self.generate_timestamp()}.arrow")
+        with pa.OSFile(timestamped_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        latest_path = self.link_latest(timestamped_path, os.path.join(self.output_dir, f"{prefix}_latest.arrow"))
         
         return timestamped_path, latest_path
     
+    def load_gps_data_file(self, filename: str = "gps_data.json",
+                           as_arrays: bool = False) -> Dict[Any, Any]:
+        """
+        Load consolidated GPS data in the .npz, .arrow or legacy JSON format
+        
+        The most recently written of ``{base}_latest.npz``,
+        ``{base}_latest.arrow`` and ``{base}_latest.json`` wins; otherwise
+        falls back to load_json_file.
+        
+        With as_arrays, each activity's points are a float32 N x 2 view into
+        one shared coordinate array instead of nested lists. When the data
+        came from JSON, a binary copy is saved so later runs load it
+        instead: a memory-mapped .arrow file when pyarrow is installed,
+        otherwise an .npz file. Large JSON files are then streamed with
+        ijson (when installed) straight into the float32 arrays, so the
+        nested lists of the whole file never exist at once; their bounds
+        are measured along the way and left in ``self.gps_bounds``.
+        
+        Args:
+            filename: Configured GPS data filename (e.g. "gps_data.json")
+            as_arrays: Return NumPy array views instead of lists
+            
+        Returns:
+            GPS data dictionary {activity_id: [[lat, lon], ...]}
+            
+        Raises:
+            FileNotFoundError: If no GPS data file exists
+        """
+        base_name = filename.rsplit('.', 1)[0]
+        path = self.find_gps_data_file(filename)
+        self.gps_bounds = None
+        if not path.endswith('.json'):
+            arrays = self.load_gps_binary(path)
+            if as_arrays:
+                return self._gps_data_views(*arrays)
+            return self._gps_data_from_arrays(*arrays)
+        
+        if not as_arrays:
+            # JSON object keys are strings; activity IDs are ints everywhere else
+            return self.load_json_file(filename, key_type=int)
+        
+        if IJSON_AVAILABLE and os.path.exists(path) and os.path.getsize(path) >= STREAM_PARSE_MIN_BYTES:
+            arrays = self._stream_gps_data_arrays(path)
+        else:
+            arrays = self._gps_data_arrays(self.load_json_file(filename))
+        if PYARROW_AVAILABLE:
+            # Mapped rather than read and decompressed on later runs
+            self.save_gps_data_arrow(None, prefix=base_name, arrays=arrays)
+        else:
+            self.save_gps_data_npz(None, prefix=base_name, arrays=arrays)
+        return self._gps_data_views(*arrays)
+    
+    def _stream_gps_data_arrays(self, filepath: str) -> Tuple[Any, Any, Any]:
+        """
+        _gps_data_arrays of a JSON GPS data file, parsed one activity at a time
+        
+        Each activity's points become a float32 array as soon as they are
+        parsed, so peak memory is the arrays plus one activity's lists. The
+        running bounds are updated from each array while it is still in
+        cache and stored in ``self.gps_bounds``.
+        """
+        import numpy as np
+        
+        ids = []
+        tracks = []
+        mins = np.full(2, np.inf)
+        maxs = np.full(2, -np.inf)
+        with open(filepath, 'rb') as f:
+            for activity_id, points in ijson.kvitems(f, '', use_float=True):
+                ids.append(int(activity_id))
+                track = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+                tracks.append(track)
+                if len(track):
+                    np.minimum(mins, track.min(axis=0), out=mins)
+                    np.maximum(maxs, track.max(axis=0), out=maxs)
+        
+        if np.isfinite(mins).all():
+            (min_lat, min_lon), (max_lat, max_lon) = mins.tolist(), maxs.tolist()
+            self.gps_bounds = (min_lat, max_lat, min_lon, max_lon)
+        
+        offsets = np.zeros(len(tracks) + 1, dtype=np.int64)
+        np.cumsum([len(track) for track in tracks], out=offsets[1:])
+        if tracks:
+            coords = np.concatenate(tracks)
+        else:
+            coords = np.empty((0, 2), dtype=np.float32)
+        
+        return np.array(ids, dtype=np.int64), offsets, coords
+    
+    def find_gps_data_file(self, filename: str = "gps_data.json") -> str:
+        """
+        Path of the file load_gps_data_file reads for filename
+        
+        Args:
+            filename: Configured GPS data filename (e.g. "gps_data.json")
+            
+        Returns:
+            Newest existing ``{base}_latest`` .json/.npz/.arrow file, else
+            filename inside the output directory
+        """
+        base_name = filename.rsplit('.', 1)[0]
+        candidates = [os.path.join(self.output_dir, f"{base_name}_latest.json"),
+                      os.path.join(self.output_dir, f"{base_name}_latest.npz")]
+        if PYARROW_AVAILABLE:
+            candidates.append(os.path.join(self.output_dir, f"{base_name}_latest.arrow"))
+        
+        existing = [(os.path.getmtime(path), path) for path in candidates if os.path.exists(path)]
+        if existing:
+            return max(existing)[1]
+        return os.path.join(self.output_dir, filename)
+    
+    def _gps_data_views(self, ids: Any, offsets: Any, coords: Any) -> Dict[int, Any]:
+        """Map each activity ID to its slice of the shared coords array"""
+        offsets = offsets.tolist()
+        
+        return {activity_id: coords[offsets[i]:offsets[i + 1]]
+                for i, activity_id in enumerate(ids.tolist())}
+    
+    def load_gps_binary(self, filepath: str) -> Tuple[Any, Any, Any]:
+        """
+        Load the flattened arrays of a .npz or .arrow GPS data file
+        
+        Arrow files are memory mapped and viewed without copying.
+        
+        Args:
+            filepath: Path to .npz or .arrow file
+            
+        Returns:
+            Tuple of (ids int64, offsets int64, coords float32 N x 2)
+        """
+        if filepath.endswith('.arrow'):
+            with pa.memory_map(filepath, 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+            ids = table.column('id').to_numpy()
+            points = table.column('points').combine_chunks()
+            offsets = points.offsets.to_numpy()
+            coords = points.values.values.to_numpy().reshape(-1, 2)
+            return ids, offsets, coords
+        
+        import numpy as np
+        
+        with np.load(filepath) as data:
+            return data['ids'], data['offsets'], data['coords']
+    
+    def load_gps_data_npz(self, filepath: str) -> Dict[int, List[List[float]]]:
+        """
+        Load GPS data written by save_gps_data_npz
+        
+        Args:
+            filepath: Path to .npz file
+            
+        Returns:
+            GPS data dictionary {activity_id: [[lat, lon], ...]}
+        """
+        return self._gps_data_from_arrays(*self.load_gps_binary(filepath))
+    
+    def load_gps_data_arrow(self, filepath: str) -> Dict[int, List[List[float]]]:
+        """
+        Load GPS data written by save_gps_data_arrow
+        
+        Args:
+            filepath: Path to .arrow file
+            
+        Returns:
+            GPS data dictionary {activity_id: [[lat, lon], ...]}
+        """
+        return self._gps_data_from_arrays(*self.load_gps_binary(filepath))
+    
     def save_individual_activity(self, activity_data: Dict[str, Any]) -> str:
         """
         Save individual activity data with date-based naming
@@ -165,7 +730,7 @@ class StravaFileManager:
         safe_name = self.make_safe_filename(activity_name)
         filename = f"activity_{date_part}_{activity_id}_{safe_name}.json"
         
-        return self.save_json_file(activity_data, filename, create_latest=False)
+        return self.save_json_file(activity_data, filename, create_latest=False, indent=False)
     
     def make_safe_filename(self, name: str, max_length: int = 50) -> str:
         """
@@ -194,32 +759,114 @@ class StravaFileManager:
         
         return safe_name
     
-    def load_individual_activities(self, pattern: str = "activity_*.json") -> List[Dict[str, Any]]:
+    def load_individual_activities(self, pattern: str = "activity_*.json",
+                                   shard_pattern: str = "activities_*.ndjson",
+                                   coords_pattern: str = "activity_*.npy") -> List[Dict[str, Any]]:
         """
-        Load all individual activity files
+        Load all individual activity files, coordinate arrays and monthly shards
         
         Args:
             pattern: Glob pattern for activity files
+            shard_pattern: Glob pattern for NDJSON activity shards
+            coords_pattern: Glob pattern for .npy coordinate files
             
         Returns:
             List of activity data dictionaries
         """
-        import glob
+        activity_files = list(self.iter_matching_files(pattern))
+        shard_paths = sorted(self.iter_matching_files(shard_pattern))
+        activities = self.load_activity_coords_files(coords_pattern)
         
-        file_pattern = os.path.join(self.output_dir, pattern)
-        activity_files = glob.glob(file_pattern)
-        activities = []
+        # Parsing is CPU-bound, so spread it over processes once there is enough work
+        if len(activity_files) + len(shard_paths) >= PARALLEL_LOAD_THRESHOLD:
+            from concurrent.futures import ProcessPoolExecutor
+            
+            workers = os.cpu_count() or 1
+            chunksize = max(1, len(activity_files) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                file_results = pool.map(_load_activity_file_safely, activity_files, chunksize=chunksize)
+                shard_results = pool.map(_load_shard, shard_paths)
+                
+                for filepath, activity_data, error in file_results:
+                    if error is None:
+                        activities.append(activity_data)
+                    else:
+                        print(f"⚠️  Failed to load {filepath}: {error}")
+                for shard_activities in shard_results:
+                    activities.extend(shard_activities)
+            
+            return activities
         
         for filepath in activity_files:
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    activity_data = json.load(f)
-                    activities.append(activity_data)
+                activities.append(load_activity_fields(filepath))
             except Exception as e:
                 print(f"⚠️  Failed to load {filepath}: {e}")
         
+        for shard_path in shard_paths:
+            activities.extend(iter_shard_fields(shard_path))
+        
+        return activities
+    
+    def load_activity_coords_files(self, pattern: str = "activity_*.npy") -> List[Dict[str, Any]]:
+        """
+        Load .npy coordinate files joined with their metadata from the index
+        
+        Activities missing from the index (e.g. after a crash between the
+        two writes) are still returned, with only their ID and GPS points.
+        
+        Args:
+            pattern: Glob pattern for .npy coordinate files
+            
+        Returns:
+            List of activity data dictionaries
+        """
+        coords_files = list(self.iter_matching_files(pattern))
+        if not coords_files:
+            return []
+        
+        index = {}
+        index_path = os.path.join(self.output_dir, ACTIVITY_INDEX_FILENAME)
+        if os.path.exists(index_path):
+            for metadata in iter_shard_fields(index_path):
+                index[metadata.get('activity_id')] = metadata
+        
+        activities = []
+        for filepath in coords_files:
+            match = ACTIVITY_FILENAME_ID.match(os.path.basename(filepath))
+            if not match:
+                continue
+            activity_id = int(match.group(1))
+            try:
+                gps_points = load_activity_coords(filepath)
+            except Exception as e:
+                print(f"⚠️  Failed to load {filepath}: {e}")
+                continue
+            
+            activity_data = dict(index.get(activity_id, {'activity_id': activity_id}))
+            activity_data['gps_points'] = gps_points
+            activities.append(activity_data)
+        
         return activities
     
+    def iter_matching_files(self, pattern: str) -> Iterator[str]:
+        """
+        Yield paths of files in the output directory matching a glob pattern
+        
+        Streams directory entries with os.scandir instead of building the
+        full path list up front like glob.glob.
+        
+        Args:
+            pattern: Glob pattern matched against file names
+            
+        Yields:
+            Full file paths
+        """
+        with os.scandir(self.output_dir) as entries:
+            for entry in entries:
+                if fnmatch.fnmatch(entry.name, pattern) and entry.is_file():
+                    yield entry.path
+    
     def consolidate_gps_data_from_activities(self, activities: List[Dict[str, Any]]) -> Dict[str, List[List[float]]]:
         """
         Consolidate GPS data from individual activities
@@ -346,15 +993,18 @@ def save_gps_data(gps_data: Dict[str, List[List[float]]], output_dir: str = "str
     return file_manager.save_gps_data(gps_data)
 
 
-def load_gps_data(output_dir: str = "strava_data") -> Dict[str, List[List[float]]]:
+def load_gps_data(output_dir: str = "strava_data") -> Dict[int, List[List[float]]]:
     """
     Load GPS data (convenience function)
     
+    Picks the newest of the .npz, .arrow and JSON files, like
+    StravaFileManager.load_gps_data_file.
+    
     Args:
         output_dir: Output directory
         
     Returns:
-        GPS data dictionary
+        GPS data dictionary keyed by integer activity ID
     """
     file_manager = StravaFileManager(output_dir)
-    return file_manager.load_json_file("gps_data.json")
\ No newline at end of file
+    return file_manager.load_gps_data_file("gps_data.json")
\ No newline at end of file
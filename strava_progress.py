@@ -7,22 +7,94 @@ Centralizes progress reporting, statistics display, and summary generation.
 Eliminates duplication of progress tracking code across scripts.
 """
 
+import sys
 import time
+import logging
+import logging.handlers
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Union
 from collections import defaultdict
+from strava_files import dump_json_line
+
+
+# Per-activity lines are buffered and written this many at a time; warnings
+# and errors flush the buffer immediately
+ACTIVITY_LOG_BATCH = 50
+
+
+class ActivityLineFormatter(logging.Formatter):
+    """
+    Formats per-activity records for the terminal or for a pipe
+    
+    Records logged with extra={'summary': {...}} are written as the pretty
+    message on a terminal and as one compact JSON line when stdout is piped,
+    so unattended runs keep a machine-readable record of every activity
+    without paying for the pretty line.
+    """
+    
+    def __init__(self, is_tty: bool):
+        super().__init__('%(message)s')
+        self.is_tty = is_tty
+    
+    def format(self, record: logging.LogRecord) -> str:
+        summary = getattr(record, 'summary', None)
+        if summary is not None and not self.is_tty:
+            return dump_json_line(summary).decode('utf-8').rstrip('\n')
+        return super().format(record)
+
+
+def _keep_summaries(record: logging.LogRecord) -> bool:
+    """Drop info lines that have no JSON summary when stdout is piped"""
+    return record.levelno >= logging.WARNING or hasattr(record, 'summary')
+
+
+def get_activity_logger() -> logging.Logger:
+    """
+    Get the logger for per-activity progress lines
+    
+    Records go through a MemoryHandler to stdout, so a run over thousands
+    of activities does not write and flush the terminal once per line.
+    Call flush_activity_log() before printing anything that must appear
+    after them. When stdout is not a terminal, records carrying a summary
+    are written as JSON lines, other info lines are dropped and warnings
+    are kept as text.
+    
+    Returns:
+        Shared 'strava.activity' logger
+    """
+    logger = logging.getLogger('strava.activity')
+    if not logger.handlers:
+        is_tty = sys.stdout.isatty()
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(ActivityLineFormatter(is_tty))
+        if not is_tty:
+            stream_handler.addFilter(_keep_summaries)
+        logger.addHandler(logging.handlers.MemoryHandler(
+            ACTIVITY_LOG_BATCH, flushLevel=logging.WARNING, target=stream_handler
+        ))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def flush_activity_log() -> None:
+    """Write out any buffered per-activity lines"""
+    for handler in get_activity_logger().handlers:
+        handler.flush()
 
 
 class StravaProgressReporter:
     """Handles progress reporting and statistics for Strava operations"""
     
-    def __init__(self, title: str = "Strava Operation"):
+    def __init__(self, title: str = "Strava Operation", quiet: bool = False):
         self.title = title
+        self.quiet = quiet
         self.start_time = datetime.now()
         self.stats = defaultdict(int)
         self.activity_types = defaultdict(int)
         self.errors = []
         self.warnings = []
+        self.activity_log = get_activity_logger()
         
     def start_operation(self, description: str = None) -> None:
         """
@@ -33,15 +105,29 @@ class StravaProgressReporter:
         """
         self.start_time = datetime.now()
         
-        print(self.title)
-        print("=" * len(self.title))
+        self.log(self.title)
+        self.log("=" * len(self.title))
         
         if description:
-            print(description)
-            print()
+            self.log(description)
+            self.log()
         
-        print(f"Started at: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        print()
+        self.log(f"Started at: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        self.log()
+    
+    def log(self, message: str = "") -> None:
+        """
+        Print a progress message unless the reporter is quiet
+        
+        Args:
+            message: Message to print
+        """
+        if not self.quiet:
+            print(message)
+    
+    def flush(self) -> None:
+        """Write out buffered per-activity lines before printing other output"""
+        flush_activity_log()
     
     def log_activity_processed(self, activity: Dict[str, Any], gps_points: int = 0, 
                              skipped: bool = False, error: str = None) -> None:
@@ -64,19 +150,22 @@ class StravaProgressReporter:
         if error:
             self.stats['failed_activities'] += 1
             self.errors.append(f"Activity {activity_id} ({activity_type}): {error}")
-            print(f"❌ Failed: {activity_id} - {activity_type} - {error}")
+            self.activity_log.warning(f"❌ Failed: {activity_id} - {activity_type} - {error}")
         elif skipped:
             self.stats['skipped_activities'] += 1
-            print(f"⏭️  Skipped: {activity_id} - {activity_type} - {activity_name}")
+            self.activity_log.info("⏭️  Skipped: %s - %s - %s", activity_id, activity_type, activity_name,
+                                   extra={'summary': {'id': activity_id, 'type': activity_type, 'status': 'skipped'}})
         else:
             self.stats['processed_activities'] += 1
             self.stats['total_gps_points'] += gps_points
+            summary = {'id': activity_id, 'type': activity_type, 'status': 'processed', 'points': gps_points}
             
             if gps_points > 0:
                 self.stats['activities_with_gps'] += 1
-                print(f"✅ Processed: {activity_id} - {activity_type} - {gps_points:,} GPS points")
+                self.activity_log.info("✅ Processed: %s - %s - %s GPS points", activity_id, activity_type,
+                                       f"{gps_points:,}", extra={'summary': summary})
             else:
-                print(f"📍 No GPS: {activity_id} - {activity_type}")
+                self.activity_log.info("📍 No GPS: %s - %s", activity_id, activity_type, extra={'summary': summary})
     
     def log_rate_limit_info(self, client: Any) -> None:
         """
@@ -85,18 +174,22 @@ class StravaProgressReporter:
         Args:
             client: StravaClient instance with rate limiter
         """
+        flush_activity_log()
         if hasattr(client, 'rate_limiter'):
             rate_limiter = client.rate_limiter
             short_term = getattr(rate_limiter, 'short_term_requests', 0)
             daily = getattr(rate_limiter, 'daily_requests', 0)
+            # Limits as last reported by the API headers
+            short_term_limit = getattr(rate_limiter, 'short_term_limit', 100)
+            daily_limit = getattr(rate_limiter, 'daily_limit', 1000)
             
-            print(f"📊 Rate limit usage: {short_term}/100 (15min), {daily}/1000 (daily)")
+            print(f"📊 Rate limit usage: {short_term}/{short_term_limit} (15min), {daily}/{daily_limit} (daily)")
             
             # Warn if approaching limits
-            if short_term >= 90:
-                self.warnings.append(f"Approaching short-term rate limit: {short_term}/100")
-            if daily >= 900:
-                self.warnings.append(f"Approaching daily rate limit: {daily}/1000")
+            if short_term >= short_term_limit * 0.9:
+                self.warnings.append(f"Approaching short-term rate limit: {short_term}/{short_term_limit}")
+            if daily >= daily_limit * 0.9:
+                self.warnings.append(f"Approaching daily rate limit: {daily}/{daily_limit}")
     
     def log_page_progress(self, page: int, activities_count: int, 
                          processed_count: int = 0, skipped_count: int = 0) -> None:
@@ -109,6 +202,7 @@ class StravaProgressReporter:
             processed_count: Number of activities processed in this page
             skipped_count: Number of activities skipped in this page
         """
+        flush_activity_log()
         print(f"\n📄 Page {page}: {activities_count} activities")
         if processed_count > 0 or skipped_count > 0:
             print(f"   Processed: {processed_count}, Skipped: {skipped_count}")
@@ -122,6 +216,7 @@ class StravaProgressReporter:
             total: Total number of items
             item_type: Type of items being processed
         """
+        flush_activity_log()
         if total > 0:
             percentage = (current / total) * 100
             print(f"🔄 Progress: {current}/{total} {item_type} ({percentage:.1f}%)")
@@ -133,6 +228,7 @@ class StravaProgressReporter:
         Args:
             additional_stats: Additional statistics to include
         """
+        flush_activity_log()
         end_time = datetime.now()
         duration = end_time - self.start_time
         
@@ -232,6 +328,7 @@ class StravaProgressReporter:
         Args:
             message: Warning message
         """
+        flush_activity_log()
         self.warnings.append(message)
         print(f"⚠️  Warning: {message}")
     
@@ -242,6 +339,7 @@ class StravaProgressReporter:
         Args:
             message: Error message
         """
+        flush_activity_log()
         self.errors.append(message)
         print(f"❌ Error: {message}")
     
@@ -256,6 +354,7 @@ class StravaProgressReporter:
             size: File size in bytes (optional)
             count: Number of items in file (optional)
         """
+        flush_activity_log()
         message = f"📁 {operation.capitalize()}: {filepath}"
         
         if size is not None:
@@ -264,7 +363,7 @@ class StravaProgressReporter:
         if count is not None:
             message += f" [{count:,} items]"
         
-        print(message)
+        self.log(message)
     
     def _format_file_size(self, size_bytes: int) -> str:
         """
@@ -9,15 +9,21 @@ Eliminates duplication of utility code.
 
 import os
 import sys
+import argparse
+import traceback
 from typing import Dict, Any, List, Set, Optional
 from datetime import datetime
 
 
-# Activity type filters
-INDOOR_ACTIVITY_TYPES = {
-    'WeightTraining', 'Yoga', 'Workout', 'Crosstraining', 'Elliptical',
+# Full tracebacks on failure are only printed with STRAVA_DEBUG=1
+DEBUG = os.environ.get('STRAVA_DEBUG') == '1'
+
+
+# Activity type filters; INDOOR_ACTIVITY_TYPES is the one skip list every downloader uses
+INDOOR_ACTIVITY_TYPES = frozenset({
+    'WeightTraining', 'Yoga', 'Workout', 'Crosstraining', 'Crossfit', 'Elliptical',
     'StairStepper', 'Rowing', 'VirtualRide', 'VirtualRun'
-}
+})
 
 GPS_ACTIVITY_TYPES = {
     'Ride', 'Run', 'Hike', 'Walk', 'NordicSki', 'AlpineSki', 'BackcountrySki',
@@ -315,6 +321,25 @@ def print_script_header(title: str, description: str = None) -> None:
         print()
 
 
+def parse_download_args(description: str) -> argparse.Namespace:
+    """
+    Parse the command line options shared by the download scripts
+    
+    Args:
+        description: Description shown in --help
+        
+    Returns:
+        Parsed arguments (full: re-download activities already saved)
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='Re-download every activity, including ones already saved'
+    )
+    return parser.parse_args()
+
+
 def handle_keyboard_interrupt(operation_name: str = "Operation") -> None:
     """
     Handle keyboard interrupt gracefully
@@ -327,6 +352,12 @@ def handle_keyboard_interrupt(operation_name: str = "Operation") -> None:
     sys.exit(0)
 
 
+def print_debug_traceback() -> None:
+    """Print the traceback of the exception being handled when STRAVA_DEBUG=1"""
+    if DEBUG:
+        traceback.print_exc()
+
+
 def check_python_version(min_version: tuple = (3, 8)) -> None:
     """
     Check if Python version meets requirements
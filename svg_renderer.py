@@ -1,17 +1,200 @@
-import xml.etree.ElementTree as ET
+import gzip
+import zlib
+import base64
+import struct
 from typing import List, Tuple, Dict, Any
 import math
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from heatmap_utils import simplify_polyline, project_equirectangular
 try:
     from pyproj import Transformer
     PYPROJ_AVAILABLE = True
 except ImportError:
     PYPROJ_AVAILABLE = False
+try:
+    # Same Element/SubElement API, serialized in C
+    from lxml import etree as ET
+    LXML_AVAILABLE = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    LXML_AVAILABLE = False
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _product_error(a, b, product):
+        # Exact a * b - product for product = fl(a * b) (Dekker's two-product)
+        c = 134217729.0 * a  # 2**27 + 1 splits a double into two halves
+        a_hi = c - (c - a)
+        a_lo = a - a_hi
+        c = 134217729.0 * b
+        b_hi = c - (c - b)
+        b_lo = b - b_hi
+        return ((a_hi * b_hi - product) + a_hi * b_lo + a_lo * b_hi) + a_lo * b_lo
+    
+    @njit(cache=True)
+    def _write_fixed(buf, pos, value, precision, scale):
+        # Same digits as '%.{precision}f': printf rounds the exact value of
+        # the double, half to even on exact ties
+        if math.copysign(1.0, value) < 0:
+            buf[pos] = 45  # '-', also for -0.0 as printf does
+            pos += 1
+            value = -value
+        product = value * float(scale)
+        scaled = math.floor(product)
+        rest = product - scaled
+        if rest > 0.5:
+            scaled += 1.0
+        elif rest == 0.5:
+            # The product may only have been rounded onto the tie; its exact
+            # rounding error says which side the true value lies on
+            error = _product_error(value, float(scale), product)
+            if error > 0 or (error == 0 and scaled % 2 == 1):
+                scaled += 1.0
+        scaled = int(scaled)
+        whole = scaled // scale
+        frac = scaled - whole * scale
+        
+        start = pos
+        while True:
+            buf[pos] = 48 + whole % 10
+            pos += 1
+            whole //= 10
+            if whole == 0:
+                break
+        # Digits were written least significant first
+        end = pos - 1
+        while start < end:
+            buf[start], buf[end] = buf[end], buf[start]
+            start += 1
+            end -= 1
+        
+        if precision > 0:
+            buf[pos] = 46  # '.'
+            pos += 1
+            for k in range(precision - 1, -1, -1):
+                buf[pos + k] = 48 + frac % 10
+                frac //= 10
+            pos += precision
+        return pos
+    
+    @njit(cache=True)
+    def _format_paths_numba(xy, offsets, precision):
+        # All paths as "M x y L x y ..." ASCII in one buffer; path i ends at
+        # byte ends[i]. 24 bytes fit any |value| < 1e18 plus sign and point;
+        # an empty path is a bare "M " (2 bytes).
+        path_count = offsets.shape[0] - 1
+        buf = np.empty(xy.shape[0] * (2 * (24 + precision) + 4) + 2 * path_count, dtype=np.uint8)
+        ends = np.empty(path_count, dtype=np.int64)
+        scale = 10 ** precision
+        pos = 0
+        for p in range(path_count):
+            if offsets[p] == offsets[p + 1]:
+                buf[pos] = 77
+                buf[pos + 1] = 32
+                pos += 2
+            for i in range(offsets[p], offsets[p + 1]):
+                if i == offsets[p]:
+                    buf[pos] = 77  # 'M'
+                    buf[pos + 1] = 32
+                    pos += 2
+                else:
+                    buf[pos] = 32
+                    buf[pos + 1] = 76  # 'L'
+                    buf[pos + 2] = 32
+                    pos += 3
+                pos = _write_fixed(buf, pos, xy[i, 0], precision, scale)
+                buf[pos] = 32
+                pos += 1
+                pos = _write_fixed(buf, pos, xy[i, 1], precision, scale)
+            ends[p] = pos
+        return buf[:pos], ends
+
+
+def _format_paths_xy(xy: np.ndarray, offsets: List[int], precision: int,
+                     simplify_tolerance: float) -> List[str]:
+    """
+    Format consecutive projected paths as SVG path strings
+    
+    Module-level so process pool workers can run it. With numba installed
+    the coordinates of all paths are written as ASCII by one compiled
+    kernel instead of being %-formatted one point at a time; both produce
+    the same bytes, including half-to-even rounding of exact ties.
+    
+    Args:
+        xy: Projected points of all paths, concatenated
+        offsets: Path i owns xy[offsets[i]:offsets[i + 1]]
+        precision: Decimal places per coordinate
+        simplify_tolerance: Douglas-Peucker tolerance in pixels (0 disables)
+        
+    Returns:
+        One "M x y L x y ..." string per path
+    """
+    paths = []
+    for i in range(len(offsets) - 1):
+        points = xy[offsets[i]:offsets[i + 1]]
+        if simplify_tolerance > 0 and len(points) > 2:
+            points = simplify_polyline(points, simplify_tolerance)
+        paths.append(points)
+    
+    if NUMBA_AVAILABLE and paths:
+        kept_offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+        np.cumsum([len(points) for points in paths], out=kept_offsets[1:])
+        text, ends = _format_paths_numba(np.ascontiguousarray(np.concatenate(paths), dtype=np.float64),
+                                         kept_offsets, int(precision))
+        text = text.tobytes().decode('ascii')
+        starts = [0] + ends[:-1].tolist()
+        return [text[start:end] for start, end in zip(starts, ends.tolist())]
+    
+    coord_format = f'%.{int(precision)}f %.{int(precision)}f'
+    return ['M ' + ' L '.join([coord_format % tuple(point) for point in points.tolist()])
+            for points in paths]
+
+
+def _encode_png(rgba: np.ndarray) -> bytes:
+    """
+    Encode an H x W x 4 uint8 array as an RGBA PNG
+    
+    Args:
+        rgba: Image rows from top to bottom
+        
+    Returns:
+        PNG file contents
+    """
+    height, width = rgba.shape[:2]
+    
+    # Every scanline starts with filter type 0 (none)
+    raw = np.zeros((height, 1 + width * 4), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(height, -1)
+    
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+    
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) +
+            chunk(b'IEND', b''))
 
 
 class SVGRenderer:
-    def __init__(self, width: int = 1200, height: int = 800):
+    def __init__(self, width: int = 1200, height: int = 800, coord_precision: int = 2,
+                 simplify_tolerance: float = 0.0, jobs: int = 1):
         self.width = width
         self.height = height
+        # Worker processes used to format GPS track paths
+        self.jobs = max(1, jobs)
+        # Decimal places of path coordinates, and one %-format for both
+        # coordinates of a path point
+        self.coord_precision = int(coord_precision)
+        self.coord_format = f'%.{self.coord_precision}f %.{self.coord_precision}f'
+        # Douglas-Peucker tolerance in SVG pixels for paths (0 disables)
+        self.simplify_tolerance = simplify_tolerance
         self.svg_root = None
         self.projection = None
         self.utm_transformer = None
@@ -174,14 +357,112 @@ class SVGRenderer:
         
         return svg_x, svg_y
     
+    def project_points(self, coords: np.ndarray) -> np.ndarray:
+        """
+        Vectorized lat_lon_to_svg for an N x 2 array of (lat, lon)
+        
+        Args:
+            coords: N x 2 array of (lat, lon)
+            
+        Returns:
+            N x 2 float64 array of SVG (x, y)
+        """
+        if not self.projection:
+            raise ValueError("Projection not set up")
+        
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        proj = self.projection
+        
+        if self.projection_type in ('utm', 'albers'):
+            transformer = self.utm_transformer if self.projection_type == 'utm' else self.albers_transformer
+            if transformer:
+                # pyproj transforms whole arrays in one call
+                px, py = transformer.transform(coords[:, 1], coords[:, 0])
+                out = np.empty((len(coords), 2))
+                out[:, 0] = (px - proj['center_x']) * proj['scale'] + proj['offset_x']
+                if self.projection_type == 'utm':
+                    out[:, 1] = (proj['center_y'] - py) * proj['scale'] + proj['offset_y']
+                else:
+                    out[:, 1] = proj['offset_y'] - (py - proj['center_y']) * proj['scale']
+                return out
+        
+        return project_equirectangular(coords, proj['center_lat'], proj['center_lon'],
+                                       proj['scale'], proj['offset_x'], proj['offset_y'])
+    
+    def _format_path_xy(self, xy: np.ndarray) -> str:
+        """
+        Format projected points as an SVG path "M x y L x y ..." string
+        
+        With a simplify_tolerance set, vertices that would move the line by
+        less than the tolerance (in pixels) are dropped first.
+        """
+        return _format_paths_xy(xy, [0, len(xy)], self.coord_precision, self.simplify_tolerance)[0]
+    
+    def _format_tracks_parallel(self, xy: np.ndarray, offsets: List[int]) -> List[str]:
+        """Format track paths in self.jobs worker processes, preserving order"""
+        track_count = len(offsets) - 1
+        bounds = [track_count * k // self.jobs for k in range(self.jobs + 1)]
+        
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            futures = []
+            for first, last in zip(bounds, bounds[1:]):
+                if first == last:
+                    continue
+                start, end = offsets[first], offsets[last]
+                chunk_offsets = [offset - start for offset in offsets[first:last + 1]]
+                futures.append(executor.submit(_format_paths_xy, xy[start:end], chunk_offsets,
+                                               self.coord_precision, self.simplify_tolerance))
+            
+            return [path for future in futures for path in future.result()]
+    
+    def _project_features(self, features: List[Dict[str, Any]],
+                          margin: float = 0) -> List[Tuple[Dict[str, Any], float, float]]:
+        """
+        Project GeoJSON point features to SVG in one project_points call
+        
+        Features whose marker would fall entirely outside the canvas are
+        dropped with one vectorized bounds test, so regional maps do not
+        carry every off-screen marker of a nationwide data file.
+        
+        Args:
+            features: GeoJSON features with [lon, lat, ...] point coordinates
+            margin: How far (in pixels) a marker extends from its point
+            
+        Returns:
+            (feature, x, y) for each feature with at least two coordinates
+            whose marker can be visible
+        """
+        located = [feature for feature in features
+                   if len(feature.get('geometry', {}).get('coordinates', [])) >= 2]
+        if not located:
+            return []
+        
+        coords = [(feature['geometry']['coordinates'][1], feature['geometry']['coordinates'][0])
+                  for feature in located]
+        xy = self.project_points(coords)
+        visible = ((xy[:, 0] >= -margin) & (xy[:, 0] <= self.width + margin) &
+                   (xy[:, 1] >= -margin) & (xy[:, 1] <= self.height + margin))
+        return [(located[i], x, y)
+                for i, (x, y) in zip(np.flatnonzero(visible).tolist(), xy[visible].tolist())]
+    
+    def _path_data(self, points: List[Any]) -> str:
+        """Project points and format them as an SVG path string"""
+        return self._format_path_xy(self.project_points(points))
+    
     def create_svg(self, bounds: Tuple[float, float, float, float], 
                    background_color: str = '#ffffff', projection_type: str = 'equirectangular') -> ET.Element:
         self.setup_projection(bounds, projection_type)
         
-        self.svg_root = ET.Element('svg')
-        self.svg_root.set('width', str(self.width))
-        self.svg_root.set('height', str(self.height))
-        self.svg_root.set('xmlns', 'http://www.w3.org/2000/svg')
+        if LXML_AVAILABLE:
+            # lxml writes namespace declarations from nsmap, not attributes
+            self.svg_root = ET.Element('svg', nsmap={None: 'http://www.w3.org/2000/svg'})
+            self.svg_root.set('width', str(self.width))
+            self.svg_root.set('height', str(self.height))
+        else:
+            self.svg_root = ET.Element('svg')
+            self.svg_root.set('width', str(self.width))
+            self.svg_root.set('height', str(self.height))
+            self.svg_root.set('xmlns', 'http://www.w3.org/2000/svg')
         self.svg_root.set('viewBox', f'0 0 {self.width} {self.height}')
         
         # Add configurable background
@@ -196,7 +477,7 @@ class SVGRenderer:
                           land_color: str = '#e8f5e8', water_color: str = '#b3d9ff',
                           stroke_color: str = '#dee2e6', stroke_width: str = '0.5'):
         """Add map background with land and water areas"""
-        if not self.svg_root:
+        if self.svg_root is None:
             raise ValueError("SVG not initialized")
         
         # Change the background to water color
@@ -214,111 +495,133 @@ class SVGRenderer:
             
             svg_path = ET.SubElement(map_group, 'path')
             
-            path_data = []
-            for i, (lat, lon) in enumerate(path):
-                x, y = self.lat_lon_to_svg(lat, lon)
-                if i == 0:
-                    path_data.append(f'M {x:.2f} {y:.2f}')
-                else:
-                    path_data.append(f'L {x:.2f} {y:.2f}')
-            
             # Close path to make it a polygon
-            path_data.append('Z')
-            
-            svg_path.set('d', ' '.join(path_data))
+            svg_path.set('d', self._path_data(path) + ' Z')
             svg_path.set('fill', land_color)
             svg_path.set('stroke', stroke_color)
             svg_path.set('stroke-width', stroke_width)
 
     def add_boundary_paths(self, boundary_paths: List[List[Tuple[float, float]]], 
                           stroke_color: str = '#dee2e6', stroke_width: str = '0.5'):
-        if not self.svg_root:
+        self.add_boundary_paths_batched([(boundary_paths, stroke_color, stroke_width)])
+    
+    def add_boundary_paths_batched(self, layers: List[Tuple[List[List[Tuple[float, float]]], str, str]]):
+        """
+        Add several boundary layers, projecting and formatting them together
+        
+        Each layer is drawn exactly as add_boundary_paths would draw it, but
+        the points of all layers go through one projection call and one
+        formatting pass.
+        
+        Args:
+            layers: (boundary_paths, stroke_color, stroke_width) per layer,
+                in drawing order
+        """
+        if self.svg_root is None:
             raise ValueError("SVG not initialized")
         
-        boundaries_group = ET.SubElement(self.svg_root, 'g')
-        boundaries_group.set('id', 'boundaries')
-        
-        for path in boundary_paths:
-            if len(path) < 2:
-                continue
+        arrays = []
+        closed = []
+        layer_ends = []
+        for boundary_paths, _, _ in layers:
+            for path in boundary_paths:
+                if len(path) < 2:
+                    continue
+                points = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+                arrays.append(points)
+                # Close path if it's a polygon (first and last points are close)
+                closed.append(len(points) > 2 and bool((np.abs(points[0] - points[-1]) < 0.001).all()))
+            layer_ends.append(len(arrays))
+        
+        path_strings = []
+        if arrays:
+            offsets = np.cumsum([0] + [len(points) for points in arrays]).tolist()
+            xy = self.project_points(np.concatenate(arrays))
+            path_strings = _format_paths_xy(xy, offsets, self.coord_precision, self.simplify_tolerance)
+        
+        start = 0
+        for (_, stroke_color, stroke_width), end in zip(layers, layer_ends):
+            boundaries_group = ET.SubElement(self.svg_root, 'g')
+            boundaries_group.set('id', 'boundaries')
             
-            svg_path = ET.SubElement(boundaries_group, 'path')
+            # All boundaries of a layer share one style and have no opacity,
+            # so they are drawn as subpaths of a single <path> element
+            subpaths = [path_data + ' Z' if is_closed else path_data
+                        for path_data, is_closed in zip(path_strings[start:end], closed[start:end])]
+            start = end
             
-            path_data = []
-            for i, (lat, lon) in enumerate(path):
-                x, y = self.lat_lon_to_svg(lat, lon)
-                if i == 0:
-                    path_data.append(f'M {x:.2f} {y:.2f}')
-                else:
-                    path_data.append(f'L {x:.2f} {y:.2f}')
-            
-            # Close path if it's a polygon (first and last points are close)
-            if len(path) > 2:
-                first_point = path[0]
-                last_point = path[-1]
-                if (abs(first_point[0] - last_point[0]) < 0.001 and 
-                    abs(first_point[1] - last_point[1]) < 0.001):
-                    path_data.append('Z')
-            
-            svg_path.set('d', ' '.join(path_data))
-            svg_path.set('stroke', stroke_color)
-            svg_path.set('stroke-width', stroke_width)
-            svg_path.set('fill', 'none')
+            if subpaths:
+                svg_path = ET.SubElement(boundaries_group, 'path')
+                svg_path.set('d', ' '.join(subpaths))
+                svg_path.set('stroke', stroke_color)
+                svg_path.set('stroke-width', stroke_width)
+                svg_path.set('fill', 'none')
     
     def add_heatmap_paths(self, heatmap_paths: List[List[Tuple[float, float]]], 
                          stroke_color: str = '#dc3545', stroke_width: str = '1.5'):
-        if not self.svg_root:
+        """
+        Add HeatmapGenerator.get_heatmap_paths components as one <path>
+        
+        The components share one style and have no opacity, so they are
+        drawn as subpaths of a single element (caps and joins apply per
+        subpath), projected and formatted in one pass.
+        
+        Args:
+            heatmap_paths: Components as lists of (lat, lon)
+            stroke_color: Stroke color
+            stroke_width: Stroke width
+        """
+        if self.svg_root is None:
             raise ValueError("SVG not initialized")
         
         heatmap_group = ET.SubElement(self.svg_root, 'g')
         heatmap_group.set('id', 'heatmap')
         
-        for path in heatmap_paths:
-            if len(path) < 2:
-                continue
-            
-            svg_path = ET.SubElement(heatmap_group, 'path')
-            
-            path_data = []
-            for i, (lat, lon) in enumerate(path):
-                x, y = self.lat_lon_to_svg(lat, lon)
-                if i == 0:
-                    path_data.append(f'M {x:.2f} {y:.2f}')
-                else:
-                    path_data.append(f'L {x:.2f} {y:.2f}')
-            
-            svg_path.set('d', ' '.join(path_data))
-            svg_path.set('stroke', stroke_color)
-            svg_path.set('stroke-width', stroke_width)
-            svg_path.set('fill', 'none')
-            svg_path.set('stroke-linecap', 'round')
-            svg_path.set('stroke-linejoin', 'round')
+        arrays = [np.asarray(path, dtype=np.float64).reshape(-1, 2)
+                  for path in heatmap_paths if len(path) >= 2]
+        if not arrays:
+            return
+        
+        offsets = np.cumsum([0] + [len(points) for points in arrays]).tolist()
+        xy = self.project_points(np.concatenate(arrays))
+        path_strings = _format_paths_xy(xy, offsets, self.coord_precision, self.simplify_tolerance)
+        
+        svg_path = ET.SubElement(heatmap_group, 'path')
+        svg_path.set('d', ' '.join(path_strings))
+        svg_path.set('stroke', stroke_color)
+        svg_path.set('stroke-width', stroke_width)
+        svg_path.set('fill', 'none')
+        svg_path.set('stroke-linecap', 'round')
+        svg_path.set('stroke-linejoin', 'round')
     
     def add_gps_tracks(self, gps_data: Dict[int, List[List[float]]], 
                       stroke_color: str = '#007bff', stroke_width: str = '1',
                       opacity: str = '0.6'):
-        if not self.svg_root:
+        if self.svg_root is None:
             raise ValueError("SVG not initialized")
         
         tracks_group = ET.SubElement(self.svg_root, 'g')
         tracks_group.set('id', 'gps-tracks')
         
-        for activity_id, points in gps_data.items():
-            if len(points) < 2:
-                continue
-            
+        tracks = [np.asarray(points, dtype=np.float64).reshape(-1, 2)
+                  for points in gps_data.values() if len(points) >= 2]
+        if not tracks:
+            return
+        
+        # Project every track in one call, then slice each one back out
+        offsets = np.cumsum([0] + [len(track) for track in tracks]).tolist()
+        xy = self.project_points(np.concatenate(tracks))
+        
+        if self.jobs > 1 and len(tracks) > self.jobs:
+            path_strings = self._format_tracks_parallel(xy, offsets)
+        else:
+            path_strings = _format_paths_xy(xy, offsets, self.coord_precision, self.simplify_tolerance)
+        
+        for path_string in path_strings:
+            # Tracks stay separate elements so overlapping activities
+            # stack their opacity
             svg_path = ET.SubElement(tracks_group, 'path')
-            
-            path_data = []
-            for i, point in enumerate(points):
-                lat, lon = point[0], point[1]
-                x, y = self.lat_lon_to_svg(lat, lon)
-                if i == 0:
-                    path_data.append(f'M {x:.2f} {y:.2f}')
-                else:
-                    path_data.append(f'L {x:.2f} {y:.2f}')
-            
-            svg_path.set('d', ' '.join(path_data))
+            svg_path.set('d', path_string)
             svg_path.set('stroke', stroke_color)
             svg_path.set('stroke-width', stroke_width)
             svg_path.set('fill', 'none')
@@ -326,8 +629,115 @@ class SVGRenderer:
             svg_path.set('stroke-linecap', 'round')
             svg_path.set('stroke-linejoin', 'round')
     
+    def add_track_segments(self, gps_data: Dict[int, List[List[float]]],
+                           stroke_color: str = '#007bff', stroke_width: str = '1',
+                           opacity: str = '0.6', cell_size: float = 1.0):
+        """
+        Add GPS tracks as a single path of unique grid-snapped segments
+        
+        Points are snapped to a cell_size pixel grid and segments shared by
+        several activities (or repeated within one) are written once, so
+        dense areas produce far fewer path commands. Overlaps no longer
+        stack their opacity: the result is a coverage map rather than a
+        heatmap.
+        
+        Args:
+            gps_data: GPS data dictionary {activity_id: [[lat, lon], ...]}
+            stroke_color: Track color
+            stroke_width: Track width
+            opacity: Opacity of the whole track layer
+            cell_size: Snapping grid size in SVG pixels
+        """
+        if self.svg_root is None:
+            raise ValueError("SVG not initialized")
+        
+        tracks_group = ET.SubElement(self.svg_root, 'g')
+        tracks_group.set('id', 'gps-tracks')
+        
+        tracks = [np.asarray(points, dtype=np.float64).reshape(-1, 2)
+                  for points in gps_data.values() if len(points) >= 2]
+        if not tracks:
+            return
+        
+        xy = self.project_points(np.concatenate(tracks))
+        
+        # Canonical vertex per grid cell
+        cells = np.floor(xy / cell_size).astype(np.int64)
+        vertices, vertex_ids = np.unique(cells, axis=0, return_inverse=True)
+        vertex_ids = vertex_ids.reshape(-1).astype(np.uint64)
+        
+        # Segments join consecutive points of the same track only
+        track_starts = np.cumsum([len(track) for track in tracks[:-1]], dtype=np.int64)
+        same_track = np.ones(len(xy) - 1, dtype=bool)
+        same_track[track_starts - 1] = False
+        a, b = vertex_ids[:-1][same_track], vertex_ids[1:][same_track]
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        
+        # One key per undirected edge; zero-length edges are dropped
+        edges = np.unique((lo << np.uint64(32)) | hi)
+        lo = (edges >> np.uint64(32)).astype(np.int64)
+        hi = (edges & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        keep = lo != hi
+        
+        centers = ((vertices + 0.5) * cell_size).tolist()
+        coord_format = self.coord_format
+        path_data = ' '.join([f'M {coord_format % tuple(centers[i])} L {coord_format % tuple(centers[j])}'
+                              for i, j in zip(lo[keep].tolist(), hi[keep].tolist())])
+        if not path_data:
+            return
+        
+        svg_path = ET.SubElement(tracks_group, 'path')
+        svg_path.set('d', path_data)
+        svg_path.set('stroke', stroke_color)
+        svg_path.set('stroke-width', stroke_width)
+        svg_path.set('fill', 'none')
+        svg_path.set('opacity', opacity)
+        svg_path.set('stroke-linecap', 'round')
+        svg_path.set('stroke-linejoin', 'round')
+    
+    def add_heatmap_image(self, grid: np.ndarray, bounds: Tuple[float, float, float, float],
+                          color: str = '#007bff', opacity: str = '0.6'):
+        """
+        Add a heatmap grid as one embedded PNG image
+        
+        A single <image> stays light to render however many activities the
+        grid covers. Cell alpha scales with the grid value; the image is
+        stretched over the projected bounding box of the grid bounds.
+        
+        Args:
+            grid: HeatmapGenerator grid indexed [lat cell, lon cell]
+            bounds: Grid bounds (min_lat, min_lon, max_lat, max_lon)
+            color: Heatmap color as #rrggbb
+            opacity: Opacity of the densest cells
+        """
+        if self.svg_root is None:
+            raise ValueError("SVG not initialized")
+        
+        peak = grid.max()
+        if peak <= 0:
+            return
+        
+        # Rows run south to north in the grid, north to south in the image
+        rgba = np.empty(grid.shape + (4,), dtype=np.uint8)
+        rgba[..., :3] = [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+        rgba[..., 3] = np.rint(grid[::-1] * (255 * float(opacity) / peak))
+        
+        min_lat, min_lon, max_lat, max_lon = bounds
+        corners = self.project_points([[min_lat, min_lon], [min_lat, max_lon],
+                                       [max_lat, min_lon], [max_lat, max_lon]])
+        (x0, y0), (x1, y1) = corners.min(axis=0).tolist(), corners.max(axis=0).tolist()
+        
+        image = ET.SubElement(self.svg_root, 'image')
+        image.set('id', 'heatmap')
+        image.set('x', f'{x0:.2f}')
+        image.set('y', f'{y0:.2f}')
+        image.set('width', f'{x1 - x0:.2f}')
+        image.set('height', f'{y1 - y0:.2f}')
+        image.set('preserveAspectRatio', 'none')
+        image.set('href', 'data:image/png;base64,' + base64.b64encode(_encode_png(rgba)).decode('ascii'))
+    
     def add_title(self, title: str):
-        if not self.svg_root:
+        if self.svg_root is None:
             raise ValueError("SVG not initialized")
         
         title_text = ET.SubElement(self.svg_root, 'text')
@@ -344,113 +754,95 @@ class SVGRenderer:
                        stroke_color: str = '#ff0000', fill_color: str = 'none',
                        radius: int = 20, stroke_width: int = 2):
         """Add state parks as circles to the SVG"""
-        if not self.svg_root:
+        if self.svg_root is None:
             raise ValueError("SVG not initialized")
         
         parks_group = ET.SubElement(self.svg_root, 'g')
         parks_group.set('id', 'state-parks')
         
-        for park in state_parks_data:
-            geometry = park.get('geometry', {})
-            coordinates = geometry.get('coordinates', [])
+        for park, x, y in self._project_features(state_parks_data, radius + stroke_width):
             properties = park.get('properties', {})
             
-            if len(coordinates) >= 2:
-                lon, lat = coordinates[0], coordinates[1]
-                x, y = self.lat_lon_to_svg(lat, lon)
-                
-                # Create circle element
-                circle = ET.SubElement(parks_group, 'circle')
-                circle.set('cx', f'{x:.2f}')
-                circle.set('cy', f'{y:.2f}')
-                circle.set('r', str(radius))
-                circle.set('stroke', stroke_color)
-                circle.set('stroke-width', str(stroke_width))
-                circle.set('fill', fill_color)
-                
-                # Add park name as title for tooltips
-                title = ET.SubElement(circle, 'title')
-                title.text = properties.get('name', 'State Park')
+            # Create circle element
+            circle = ET.SubElement(parks_group, 'circle')
+            circle.set('cx', f'{x:.2f}')
+            circle.set('cy', f'{y:.2f}')
+            circle.set('r', str(radius))
+            circle.set('stroke', stroke_color)
+            circle.set('stroke-width', str(stroke_width))
+            circle.set('fill', fill_color)
+            
+            # Add park name as title for tooltips
+            title = ET.SubElement(circle, 'title')
+            title.text = properties.get('name', 'State Park')
 
     def add_national_parks(self, national_parks_data: List[Dict[str, Any]], 
                           stroke_color: str = '#ff6b00', fill_color: str = 'none',
                           size: int = 12, stroke_width: int = 2):
         """Add national parks as triangles to the SVG"""
-        if not self.svg_root:
+        if self.svg_root is None:
             raise ValueError("SVG not initialized")
         
         parks_group = ET.SubElement(self.svg_root, 'g')
         parks_group.set('id', 'national-parks')
         
-        for park in national_parks_data:
-            geometry = park.get('geometry', {})
-            coordinates = geometry.get('coordinates', [])
+        for park, x, y in self._project_features(national_parks_data, size + stroke_width):
             properties = park.get('properties', {})
             
-            if len(coordinates) >= 2:
-                lon, lat = coordinates[0], coordinates[1]
-                x, y = self.lat_lon_to_svg(lat, lon)
-                
-                # Create triangle polygon (equilateral triangle pointing up)
-                height = size * 0.866  # height of equilateral triangle
-                half_base = size / 2
-                
-                # Triangle points: top, bottom-left, bottom-right
-                points = [
-                    (x, y - height * 2/3),  # top point
-                    (x - half_base, y + height * 1/3),  # bottom-left
-                    (x + half_base, y + height * 1/3)   # bottom-right
-                ]
-                
-                points_str = ' '.join([f'{px:.2f},{py:.2f}' for px, py in points])
-                
-                triangle = ET.SubElement(parks_group, 'polygon')
-                triangle.set('points', points_str)
-                triangle.set('stroke', stroke_color)
-                triangle.set('stroke-width', str(stroke_width))
-                triangle.set('fill', fill_color)
-                
-                # Add park name as title for tooltips
-                title = ET.SubElement(triangle, 'title')
-                title.text = properties.get('name', 'National Park')
+            # Create triangle polygon (equilateral triangle pointing up)
+            height = size * 0.866  # height of equilateral triangle
+            half_base = size / 2
+            
+            # Triangle points: top, bottom-left, bottom-right
+            points = [
+                (x, y - height * 2/3),  # top point
+                (x - half_base, y + height * 1/3),  # bottom-left
+                (x + half_base, y + height * 1/3)   # bottom-right
+            ]
+            
+            points_str = ' '.join([f'{px:.2f},{py:.2f}' for px, py in points])
+            
+            triangle = ET.SubElement(parks_group, 'polygon')
+            triangle.set('points', points_str)
+            triangle.set('stroke', stroke_color)
+            triangle.set('stroke-width', str(stroke_width))
+            triangle.set('fill', fill_color)
+            
+            # Add park name as title for tooltips
+            title = ET.SubElement(triangle, 'title')
+            title.text = properties.get('name', 'National Park')
 
     def add_cities(self, cities_data: List[Dict[str, Any]], 
                    stroke_color: str = '#ff0000', fill_color: str = 'none',
                    size: int = 16, stroke_width: int = 2):
         """Add cities as squares to the SVG"""
-        if not self.svg_root:
+        if self.svg_root is None:
             raise ValueError("SVG not initialized")
         
         cities_group = ET.SubElement(self.svg_root, 'g')
         cities_group.set('id', 'cities')
         
-        for city in cities_data:
-            geometry = city.get('geometry', {})
-            coordinates = geometry.get('coordinates', [])
+        for city, x, y in self._project_features(cities_data, size + stroke_width):
             properties = city.get('properties', {})
             
-            if len(coordinates) >= 2:
-                lon, lat = coordinates[0], coordinates[1]
-                x, y = self.lat_lon_to_svg(lat, lon)
-                
-                # Create square (rectangle) element centered on the point
-                half_size = size / 2
-                
-                square = ET.SubElement(cities_group, 'rect')
-                square.set('x', f'{x - half_size:.2f}')
-                square.set('y', f'{y - half_size:.2f}')
-                square.set('width', str(size))
-                square.set('height', str(size))
-                square.set('stroke', stroke_color)
-                square.set('stroke-width', str(stroke_width))
-                square.set('fill', fill_color)
-                
-                # Add city name as title for tooltips
-                title = ET.SubElement(square, 'title')
-                title.text = properties.get('name', 'City')
+            # Create square (rectangle) element centered on the point
+            half_size = size / 2
+            
+            square = ET.SubElement(cities_group, 'rect')
+            square.set('x', f'{x - half_size:.2f}')
+            square.set('y', f'{y - half_size:.2f}')
+            square.set('width', str(size))
+            square.set('height', str(size))
+            square.set('stroke', stroke_color)
+            square.set('stroke-width', str(stroke_width))
+            square.set('fill', fill_color)
+            
+            # Add city name as title for tooltips
+            title = ET.SubElement(square, 'title')
+            title.text = properties.get('name', 'City')
 
     def add_legend(self):
-        if not self.svg_root:
+        if self.svg_root is None:
             raise ValueError("SVG not initialized")
         
         legend_group = ET.SubElement(self.svg_root, 'g')
@@ -551,15 +943,25 @@ class SVGRenderer:
         city_text.set('fill', '#333')
         city_text.text = 'Cities'
     
-    def save_svg(self, filename: str):
-        if not self.svg_root:
+    def save_svg(self, filename: str, compress: bool = None):
+        if self.svg_root is None:
             raise ValueError("SVG not initialized")
         
         # Create a rough indentation for readability
         self._indent(self.svg_root)
         
-        tree = ET.ElementTree(self.svg_root)
-        tree.write(filename, encoding='unicode', xml_declaration=True)
+        # Serialize straight to UTF-8 bytes and hand the file one write,
+        # instead of many small writes through a text layer
+        data = ET.tostring(self.svg_root, encoding='utf-8', xml_declaration=True)
+        
+        # .svgz is gzipped SVG, which browsers and Inkscape open directly
+        if compress is None:
+            compress = filename.endswith('.svgz')
+        if compress:
+            data = gzip.compress(data, compresslevel=6)
+        
+        with open(filename, 'wb') as f:
+            f.write(data)
     
     def _indent(self, elem, level=0):
         i = "\n" + level * "  "